@@ -14,6 +14,7 @@ Building Stats:
 
 # ===== MODIFIED PARAMETERS =====
 # (Copy from skyscraper_superior_design.py and modify these lines)
+# Headless equivalent: --spec examples/specs/compact_tower_30floors.json
 
 # Building Dimensions
 num_floors = 30              # Reduced from 50
@@ -14,6 +14,7 @@ Building Stats:
 
 # ===== MODIFIED PARAMETERS =====
 # (Copy from skyscraper_superior_design.py and modify these lines)
+# Headless equivalent: --spec examples/specs/residential_tower_40floors.json
 
 # Building Dimensions
 num_floors = 40
@@ -14,6 +14,7 @@ Building Stats:
 
 # ===== MODIFIED PARAMETERS =====
 # (Copy from skyscraper_superior_design.py and modify these lines)
+# Headless equivalent: --spec examples/specs/supertall_tower_100floors.json
 
 # Building Dimensions
 num_floors = 100             # Increased from 50
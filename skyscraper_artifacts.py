@@ -0,0 +1,217 @@
+"""
+SKYSCRAPER ARTIFACT CACHE
+=========================
+
+On-disk cache of generated data, so rebuilding a tower that has been built
+before (a preset, or a client variant that only changes the facade) loads
+arrays instead of generating them. Every artifact is one .npz file named by
+a digest of everything it was generated from - the parameters involved and
+GENERATOR_VERSION - so identical inputs map to the same file across runs,
+scenes and machines sharing the directory. Least recently used files are
+evicted once the cache grows past its size limit. Pure NumPy (no bpy): the
+Blender backend caches the mesh arrays of each subsystem here, and the
+layout can be cached from plain Python.
+
+Usage:
+    from skyscraper_artifacts import ArtifactCache, cached_layout
+    artifacts = ArtifactCache("~/.cache/skyscraper", max_size=2 * 1024 ** 3)
+    layout = cached_layout(artifacts, spec)
+    build_tower(spec, artifacts=artifacts)   # inside Blender
+
+    python skyscraper_artifacts.py --cache ~/.cache/skyscraper --list
+    python skyscraper_artifacts.py --cache ~/.cache/skyscraper --warm examples/specs/*.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from skyscraper_layout import TowerSpec, compute_layout, load_spec, spec_hash
+
+# Part of every artifact key: bump whenever the generated data changes for
+# the same parameters, so stale artifacts are never loaded
+GENERATOR_VERSION = 1
+
+# Default size limit of a cache directory (bytes)
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# Once a store() takes the cache past its limit, evict down to this fraction
+# of it, so the next full scan is many stores away
+EVICT_TARGET = 0.9
+
+# Temporary files older than this (seconds) belong to store() calls that died
+STALE_TEMP_AGE = 3600
+
+class ArtifactCache:
+    """Directory of .npz artifacts, each a dict of NumPy arrays.
+
+    Files are written to a temporary name and renamed into place, so
+    concurrent runs (skyscraper_batch.py) never see half-written artifacts.
+    A load() refreshes the file's modification time, which is what eviction
+    orders by. Unreadable files count as misses and are removed. store()
+    keeps a running total of the cache size, from one scan plus the files
+    it wrote, and only scans and evicts again once that crosses max_size.
+    """
+
+    def __init__(self, root, max_size=DEFAULT_MAX_SIZE):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Running total of the bytes stored, None until the first scan
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, *inputs):
+        """Digest of JSON-serializable `inputs` and the generator version"""
+        return hashlib.sha1(json.dumps([GENERATOR_VERSION, inputs],
+                                       sort_keys=True).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.npz")
+
+    def load(self, key):
+        """The arrays stored under `key` (name -> array, in stored order), or None"""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, zipfile.BadZipFile):
+            self.remove(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def store(self, key, arrays):
+        """Write `arrays` (name -> array) under `key`; evicts once the cache outgrows max_size"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(suffix=".npz.tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+                size = f.tell()
+            try:
+                size -= os.path.getsize(path)  # Replacing an artifact another run stored
+            except FileNotFoundError:
+                pass
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += size
+        if self._size > self.max_size:
+            self.evict(int(self.max_size * EVICT_TARGET))
+
+    def remove(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def files(self):
+        """(path, os.stat result) of every file in the cache, artifacts and temporary files"""
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:  # Evicted or renamed by another run meanwhile
+                    continue
+
+    def entries(self):
+        """(last used, size in bytes, path) of every artifact, least recently used first"""
+        return sorted((stat.st_mtime, stat.st_size, path) for path, stat in self.files()
+                      if path.endswith(".npz"))
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_size=None):
+        """Delete least recently used artifacts until the total fits; returns how many.
+
+        Also deletes temporary files older than STALE_TEMP_AGE, left behind
+        by store() calls that crashed or were killed.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        stale = time.time() - STALE_TEMP_AGE
+        entries = []
+        for path, stat in self.files():
+            if path.endswith(".npz"):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif path.endswith(".npz.tmp") and stat.st_mtime < stale:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+def cached_layout(artifacts, spec, executor=None):
+    """compute_layout(spec, executor), loaded from `artifacts` when built before"""
+    key = artifacts.key('layout', spec_hash(spec))
+    layout = artifacts.load(key)
+    if layout is None:
+        layout = compute_layout(spec, executor)
+        artifacts.store(key, layout)
+    return layout
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--cache", required=True, help="Cache directory")
+    parser.add_argument("--max-size", type=float, default=DEFAULT_MAX_SIZE / 1024 ** 2,
+                        help="Size limit in MB (default: 2048)")
+    parser.add_argument("--list", action="store_true", help="List artifacts, most recent first")
+    parser.add_argument("--evict", action="store_true", help="Evict down to --max-size")
+    parser.add_argument("--clear", action="store_true", help="Delete every artifact")
+    parser.add_argument("--warm", nargs="+", metavar="SPEC",
+                        help="Compute and store the layout of these spec files")
+    args = parser.parse_args(argv)
+
+    artifacts = ArtifactCache(args.cache, int(args.max_size * 1024 ** 2))
+    if args.clear:
+        print(f"Removed {artifacts.evict(0)} artifacts")
+    if args.evict:
+        print(f"Removed {artifacts.evict()} artifacts")
+    for path in args.warm or []:
+        start = time.perf_counter()
+        cached_layout(artifacts, TowerSpec.from_dict(load_spec(path)))
+        state = "cached" if artifacts.hits else "computed"
+        print(f"{path}: layout {state} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        artifacts.hits = 0
+    if args.list:
+        for used, size, path in reversed(artifacts.entries()):
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}  "
+                  f"{size / 1024:10.1f} KB  {os.path.relpath(path, artifacts.root)}")
+    print(f"{artifacts.root}: {artifacts.size() / 1024 ** 2:.1f} MB "
+          f"of {artifacts.max_size / 1024 ** 2:.0f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+BATCH TOWER GENERATOR
+=====================
+
+Runs skyscraper_superior_design.py headless once per building spec, with one
+background Blender process per spec and as many processes in flight as there
+are CPU cores.
+
+Usage:
+    python skyscraper_batch.py examples/specs/ --out-dir build/
+    python skyscraper_batch.py variants/*.json --format glb --jobs 8 --blender /opt/blender/blender
+    python skyscraper_batch.py examples/specs/ --cache ~/.cache/skyscraper
+    python skyscraper_batch.py variants/ --server --jobs 4
+
+Each spec is a JSON (or TOML, Blender 4.1+) file of parameter overrides, e.g.
+examples/specs/compact_tower_30floors.json. Outputs are named after the spec
+file; Blender's console output goes to a .log file next to each output.
+With --cache, all processes share one artifact cache (skyscraper_artifacts.py),
+so subsystems that several specs have in common are generated once.
+With --server, each of the --jobs processes is a long-lived generator server
+(skyscraper_server.py) that builds spec after spec, so Blender startup,
+scene setup and materials are paid once per process instead of once per spec.
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from skyscraper_server import RESULT_PREFIX
+
+SCRIPT = Path(__file__).resolve().parent / "skyscraper_superior_design.py"
+SERVER = Path(__file__).resolve().parent / "skyscraper_server.py"
+SPEC_SUFFIXES = (".json", ".toml")
+
+def collect_specs(paths):
+    """Expand directories into the spec files they contain"""
+    specs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            specs.extend(sorted(p for p in path.iterdir() if p.suffix in SPEC_SUFFIXES))
+        else:
+            specs.append(path)
+    return specs
+
+def blender_command(blender, spec, output, cache=None):
+    """Command line for one headless generation run"""
+    command = [
+        blender, "--background", "--factory-startup", "--python-exit-code", "1",
+        "--python", str(SCRIPT), "--",
+        "--spec", str(spec), "--output", str(output),
+    ]
+    if cache:
+        command += ["--cache", str(cache)]
+    return command
+
+def run_spec(blender, spec, output, cache=None):
+    """Generate one tower in its own Blender process; returns (returncode, seconds)"""
+    start = time.perf_counter()
+    with open(output.with_suffix(".log"), "w") as log:
+        result = subprocess.run(blender_command(blender, spec, output, cache),
+                                stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode, time.perf_counter() - start
+
+def server_command(blender, cache=None):
+    """Command line for one generator server process"""
+    command = [blender, "--background", "--factory-startup", "--python", str(SERVER), "--"]
+    if cache:
+        command += ["--cache", str(cache)]
+    return command
+
+def read_result(stream, log):
+    """Copy console lines to `log` up to the next result line; None if the server exited"""
+    for line in stream:
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+        log.write(line)
+    return None
+
+def run_server(blender, jobs, results, cache=None):
+    """Feed (spec, output) pairs from the `jobs` queue to one server until the queue is empty.
+
+    Puts (spec, returncode, seconds) on `results` per job, with returncode 1
+    for a failed build; if the server itself dies, its current job fails and
+    the remaining jobs are left to the other servers.
+    """
+    process = subprocess.Popen(server_command(blender, cache), stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        while True:
+            try:
+                spec, output = jobs.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            with open(output.with_suffix(".log"), "w") as log:
+                process.stdin.write(json.dumps({'spec': str(spec), 'output': str(output)}) + "\n")
+                process.stdin.flush()
+                result = read_result(process.stdout, log)
+                if result and not result['ok']:
+                    log.write(result['error'])
+            results.put((spec, 0 if result and result['ok'] else 1, time.perf_counter() - start))
+            if result is None:
+                break
+    finally:
+        process.stdin.close()
+        process.wait()
+
+def run_servers(blender, specs, out_dir, fmt, servers, cache=None):
+    """Generate every spec on `servers` long-lived Blender processes; yields results as they come"""
+    jobs = queue.Queue()
+    for spec in specs:
+        jobs.put((spec, out_dir / f"{spec.stem}.{fmt}"))
+    results = queue.Queue()
+    with ThreadPoolExecutor(max_workers=servers) as pool:
+        futures = [pool.submit(run_server, blender, jobs, results, cache) for _ in range(servers)]
+        for _ in specs:
+            # A server that died leaves its queued jobs to the others; stop once all are gone
+            while True:
+                try:
+                    yield results.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    if all(future.done() for future in futures) and results.empty():
+                        return
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("specs", nargs="+", help="Spec files or directories of spec files")
+    parser.add_argument("--out-dir", default="build", help="Output directory (default: build)")
+    parser.add_argument("--format", choices=("blend", "glb", "gltf"), default="blend")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Concurrent Blender processes (default: CPU count)")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"),
+                        help="Blender executable (default: $BLENDER or 'blender')")
+    parser.add_argument("--cache", help="Artifact cache directory shared by all runs")
+    parser.add_argument("--server", action="store_true",
+                        help="Reuse --jobs long-lived Blender processes for all specs")
+    args = parser.parse_args(argv)
+
+    specs = collect_specs(args.specs)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Generating {len(specs)} towers with {args.jobs} Blender processes...")
+    failures = 0
+
+    if args.server:
+        done = 0
+        for spec, returncode, seconds in run_servers(args.blender, specs, out_dir, args.format,
+                                                     args.jobs, args.cache):
+            status = "ok" if returncode == 0 else "FAILED (see log)"
+            failures += returncode != 0
+            done += 1
+            print(f"  {spec.name}: {status} in {seconds:.1f}s")
+        failures += len(specs) - done  # Left over when every server died
+        print(f"Done: {len(specs) - failures} succeeded, {failures} failed")
+        return 1 if failures else 0
+
+    # Each job is its own Blender process; the threads only wait on them
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(run_spec, args.blender, spec,
+                        out_dir / f"{spec.stem}.{args.format}", args.cache): spec
+            for spec in specs
+        }
+        for future in as_completed(futures):
+            spec = futures[future]
+            returncode, seconds = future.result()
+            status = "ok" if returncode == 0 else f"FAILED (exit {returncode})"
+            failures += returncode != 0
+            print(f"  {spec.name}: {status} in {seconds:.1f}s")
+
+    print(f"Done: {len(specs) - failures} succeeded, {failures} failed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
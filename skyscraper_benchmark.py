@@ -0,0 +1,176 @@
+"""
+SKYSCRAPER BENCHMARKS
+=====================
+
+Measures how generation cost grows with the tower configuration: the
+standard 50-story tower plus every spec in examples/specs/, optionally swept
+over single parameters. Results are written to JSON so runs can be compared
+between releases.
+
+Two modes:
+- layout (default): times the bpy-free layout stage per subsystem in this
+  Python process and records element counts and peak traced memory
+- blender (--blender PATH): runs skyscraper_superior_design.py in background
+  Blender per configuration and records wall time per phase (structure,
+  slabs, stairs, facade, ...), per-phase counters, object/mesh/vertex/face
+  counts and peak RSS
+
+Usage:
+    python skyscraper_benchmark.py
+    python skyscraper_benchmark.py --blender blender --output bench/blender.json
+    python skyscraper_benchmark.py --sweep num_floors=10,50,100,200 --sweep window_module=0.75,1.5
+    python skyscraper_benchmark.py --workers 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from skyscraper_layout import (
+    FLOOR_SUBSYSTEMS, TowerSpec, compute_layout, core_walls, elevator_shafts, floor_layout,
+    floor_slabs, layout_pool, load_spec, lobby_feature, stair_flights, stair_landings,
+    structural_columns,
+)
+
+ROOT = Path(__file__).resolve().parent
+SCRIPT = ROOT / "skyscraper_superior_design.py"
+SPEC_DIR = ROOT / "examples" / "specs"
+
+# Tower-wide layout stages; per-floor stages come from FLOOR_SUBSYSTEMS
+TOWER_STAGES = {
+    'structure': structural_columns,
+    'slabs': floor_slabs,
+    'core_walls': core_walls,
+    'stairs': stair_flights,
+    'landings': stair_landings,
+    'elevators': elevator_shafts,
+    'lobby': lobby_feature,
+}
+
+def benchmark_configs(sweeps):
+    """name -> parameter dict for the example specs plus any parameter sweeps"""
+    configs = {path.stem: load_spec(path) for path in sorted(SPEC_DIR.glob("*.json"))}
+    base = configs.get("standard_tower_50floors", {})
+    for sweep in sweeps:
+        name, _, values = sweep.partition("=")
+        for value in values.split(","):
+            configs[f"standard[{name}={value}]"] = {**base, name: json.loads(value)}
+    return configs
+
+def time_call(fn, repeat):
+    """Best wall time of `repeat` calls, and the last result"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_layout(params, repeat, executor=None):
+    """Time each layout stage in-process, and the whole layout on `executor` if given"""
+    spec = TowerSpec.from_dict(params)
+    sections = {}
+    elements = {}
+    nbytes = 0
+
+    stages = dict(TOWER_STAGES)
+    for name in FLOOR_SUBSYSTEMS:
+        stages[name] = lambda spec, name=name: floor_layout(spec, name)
+
+    for name, stage in stages.items():
+        seconds, array = time_call(lambda: stage(spec), repeat)
+        sections[name] = seconds
+        elements[name] = len(array)
+        nbytes += array.nbytes
+
+    parallel = None
+    if executor is not None:
+        parallel, _ = time_call(lambda: compute_layout(spec, executor), repeat)
+
+    # Memory is traced in a separate pass so tracing overhead stays out of the timings
+    tracemalloc.start()
+    compute_layout(spec)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'wall_time': sum(sections.values()),
+        'sections': sections,
+        'parallel_wall_time': parallel,
+        'elements': elements,
+        'layout_mb': nbytes / 2**20,
+        'peak_traced_mb': peak / 2**20,
+    }
+
+def bench_blender(blender, params, workdir):
+    """Run one full generation in background Blender and collect its phase report"""
+    spec_path = Path(workdir) / "spec.json"
+    stats_path = Path(workdir) / "stats.json"
+    spec_path.write_text(json.dumps(params))
+    command = [blender, "--background", "--factory-startup", "--python-exit-code", "1",
+               "--python", str(SCRIPT), "--", "--spec", str(spec_path), "--stats", str(stats_path)]
+
+    start = time.perf_counter()
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    wall_time = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"Blender exited with {process.returncode}: {' '.join(command)}\n"
+                           f"{process.stdout[-2000:]}")
+
+    # Phase timings and counters come from the script's instrumentation report
+    stats = json.loads(stats_path.read_text())
+    report = stats.pop('instrumentation')
+    sections = {'startup': wall_time - report['total_seconds']}
+    sections.update({name: phase['seconds'] for name, phase in report['phases'].items()})
+
+    return {'wall_time': wall_time, 'sections': sections, 'phases': report['phases'],
+            'counters': report['counters'], **stats}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--blender", help="Benchmark full generation with this Blender executable")
+    parser.add_argument("--sweep", action="append", default=[], metavar="PARAM=V1,V2,...",
+                        help="Also benchmark the standard tower with PARAM set to each value")
+    parser.add_argument("--repeat", type=int, default=3, help="Layout mode: best of N runs (default: 3)")
+    parser.add_argument("--workers", type=int,
+                        help="Layout mode: also time the layout fanned out over N processes")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file")
+    args = parser.parse_args(argv)
+    executor = layout_pool(args.workers) if args.workers and not args.blender else None
+
+    results = {}
+    for name, params in benchmark_configs(args.sweep).items():
+        if args.blender:
+            with tempfile.TemporaryDirectory() as workdir:
+                result = bench_blender(args.blender, params, workdir)
+        else:
+            result = bench_layout(params, args.repeat, executor)
+        results[name] = result
+        print(f"{name:40s} {result['wall_time']:9.3f}s")
+
+    if executor:
+        executor.shutdown()
+
+    report = {
+        'mode': 'blender' if args.blender else 'layout',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
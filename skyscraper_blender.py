@@ -0,0 +1,1469 @@
+"""
+SKYSCRAPER BLENDER BACKEND
+==========================
+
+Turns the element arrays from skyscraper_layout.py into Blender data:
+materials, one mesh per building subsystem, instanced facades, floor
+templates and districts of instanced towers. All geometry decisions live in the layout module; this file only
+knows how to get arrays into bpy quickly.
+
+Usage (inside Blender):
+    from skyscraper_layout import TowerSpec
+    from skyscraper_blender import build_tower
+    build_tower(TowerSpec(num_floors=30))
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from itertools import chain, product
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils import Vector
+
+from skyscraper_artifacts import DEFAULT_MAX_SIZE, ArtifactCache, cached_layout
+from skyscraper_instrument import Instrumentation
+from skyscraper_layout import (
+    FLOOR_SUBSYSTEMS, LEATHER, MATERIALS, TowerSpec, box_geometry, box_projection_uvs,
+    compute_layout, element_floors, elevator_door_bottoms, floor_interior, group_identical,
+    interior_bounds, interior_floors, layout_element_ids, layout_pool, lod_layout, shaft_geometry,
+    slab_geometry, stair_flight_geometry, stair_locations, subsystem_hash, vertical_zones,
+)
+
+# ===== MATERIALS =====
+# Custom properties: the layout material a Blender material stands for, and
+# the hash of the arguments it was built from (see registry_material)
+MATERIAL_TAG = "skyscraper_material"
+MATERIAL_HASH = "skyscraper_material_hash"
+
+def create_advanced_material(name, base_color, metallic=0.0, roughness=0.5,
+                             emission=0.0, ior=1.45, transmission=0.0):
+    """Create physically-based material with advanced properties"""
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    # Create shader nodes
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Position nodes
+    bsdf.location = (0, 0)
+    output.location = (300, 0)
+
+    # Configure BSDF
+    bsdf.inputs['Base Color'].default_value = (*base_color, 1.0)
+    bsdf.inputs['Metallic'].default_value = metallic
+    bsdf.inputs['Roughness'].default_value = roughness
+    bsdf.inputs['IOR'].default_value = ior
+    bsdf.inputs['Transmission Weight'].default_value = transmission
+
+    if emission > 0:
+        bsdf.inputs['Emission Strength'].default_value = emission
+        bsdf.inputs['Emission Color'].default_value = (*base_color, 1.0)
+
+    # Link nodes
+    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+    return mat
+
+def create_leather_material(name):
+    """Enhanced shiny black leather with proper subsurface"""
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    # Nodes
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+    noise = nodes.new(type='ShaderNodeTexNoise')
+    bump = nodes.new(type='ShaderNodeBump')
+    color_ramp = nodes.new(type='ShaderNodeValToRGB')
+    mapping = nodes.new(type='ShaderNodeMapping')
+    tex_coord = nodes.new(type='ShaderNodeTexCoord')
+
+    # Position
+    tex_coord.location = (-800, 0)
+    mapping.location = (-600, 0)
+    noise.location = (-400, 0)
+    color_ramp.location = (-200, 100)
+    bump.location = (-200, -100)
+    bsdf.location = (100, 0)
+    output.location = (400, 0)
+
+    # Configure
+    bsdf.inputs['Base Color'].default_value = (0.01, 0.01, 0.01, 1.0)
+    bsdf.inputs['Metallic'].default_value = 0.2
+    bsdf.inputs['Roughness'].default_value = 0.05  # Very shiny
+    bsdf.inputs['Sheen Weight'].default_value = 0.3  # Leather sheen
+    bsdf.inputs['Subsurface Weight'].default_value = 0.08
+    bsdf.inputs['Subsurface Radius'].default_value = (0.1, 0.1, 0.1)
+
+    noise.inputs['Scale'].default_value = 20.0
+    noise.inputs['Detail'].default_value = 8.0
+    noise.inputs['Roughness'].default_value = 0.6
+
+    bump.inputs['Strength'].default_value = 0.2
+
+    mapping.inputs['Scale'].default_value = (2.0, 2.0, 2.0)
+
+    color_ramp.color_ramp.elements[0].color = (0.008, 0.008, 0.008, 1.0)
+    color_ramp.color_ramp.elements[1].color = (0.018, 0.018, 0.018, 1.0)
+
+    # Link
+    mat.node_tree.links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
+    mat.node_tree.links.new(mapping.outputs['Vector'], noise.inputs['Vector'])
+    mat.node_tree.links.new(noise.outputs['Fac'], color_ramp.inputs['Fac'])
+    mat.node_tree.links.new(noise.outputs['Fac'], bump.inputs['Height'])
+    mat.node_tree.links.new(color_ramp.outputs['Color'], bsdf.inputs['Base Color'])
+    mat.node_tree.links.new(bump.outputs['Normal'], bsdf.inputs['Normal'])
+    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+    return mat
+
+def create_facade_band_material(name, floor_height, spandrel_h):
+    """Glass and spandrel stripes by world height, so one plane reads as a curtain wall"""
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    # Nodes
+    geometry = nodes.new(type='ShaderNodeNewGeometry')
+    separate = nodes.new(type='ShaderNodeSeparateXYZ')
+    per_floor = nodes.new(type='ShaderNodeMath')
+    within_floor = nodes.new(type='ShaderNodeMath')
+    is_spandrel = nodes.new(type='ShaderNodeMath')
+    glass = nodes.new(type='ShaderNodeBsdfPrincipled')
+    spandrel = nodes.new(type='ShaderNodeBsdfPrincipled')
+    mix = nodes.new(type='ShaderNodeMixShader')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Position
+    geometry.location = (-800, 0)
+    separate.location = (-600, 0)
+    per_floor.location = (-400, 0)
+    within_floor.location = (-200, 0)
+    is_spandrel.location = (0, 0)
+    glass.location = (0, -200)
+    spandrel.location = (0, -600)
+    mix.location = (300, 0)
+    output.location = (500, 0)
+
+    # Configure: spandrel below spandrel_h on every floor, vision glass above
+    per_floor.operation = 'DIVIDE'
+    per_floor.inputs[1].default_value = floor_height
+    within_floor.operation = 'FRACT'
+    is_spandrel.operation = 'LESS_THAN'
+    is_spandrel.inputs[1].default_value = spandrel_h / floor_height
+
+    glass.inputs['Base Color'].default_value = (0.8, 0.9, 1.0, 1.0)
+    glass.inputs['Metallic'].default_value = 0.1
+    glass.inputs['Roughness'].default_value = 0.05
+    spandrel.inputs['Base Color'].default_value = (0.02, 0.02, 0.02, 1.0)
+    spandrel.inputs['Metallic'].default_value = 0.8
+    spandrel.inputs['Roughness'].default_value = 0.15
+
+    # Link
+    mat.node_tree.links.new(geometry.outputs['Position'], separate.inputs['Vector'])
+    mat.node_tree.links.new(separate.outputs['Z'], per_floor.inputs[0])
+    mat.node_tree.links.new(per_floor.outputs['Value'], within_floor.inputs[0])
+    mat.node_tree.links.new(within_floor.outputs['Value'], is_spandrel.inputs[0])
+    mat.node_tree.links.new(is_spandrel.outputs['Value'], mix.inputs['Fac'])
+    mat.node_tree.links.new(glass.outputs['BSDF'], mix.inputs[1])
+    mat.node_tree.links.new(spandrel.outputs['BSDF'], mix.inputs[2])
+    mat.node_tree.links.new(mix.outputs['Shader'], output.inputs['Surface'])
+
+    return mat
+
+def registry_material(builder, name, *args, **kwargs):
+    """builder(name, ...) unless an identical material already exists in this file.
+
+    Materials are tagged with a hash of the builder and its arguments, so
+    every run and every tower in the scene shares one node tree (and one
+    compiled shader) per distinct material instead of piling up .001 copies.
+    """
+    digest = hashlib.sha1(json.dumps([builder.__name__, name, args, kwargs],
+                                     sort_keys=True).encode()).hexdigest()
+    for mat in bpy.data.materials:
+        if mat.get(MATERIAL_HASH) == digest:
+            return mat
+    mat = builder(name, *args, **kwargs)
+    mat[MATERIAL_HASH] = digest
+    return mat
+
+def load_material_library(path):
+    """Link the tagged materials of a library .blend (see save_material_library)"""
+    path = bpy.path.abspath(path)
+    linked = [mat for mat in bpy.data.materials
+              if mat.library and bpy.path.abspath(mat.library.filepath) == path]
+    if not linked:
+        with bpy.data.libraries.load(path, link=True) as (data_from, data_to):
+            data_to.materials = list(data_from.materials)
+        linked = [mat for mat in data_to.materials if mat is not None]
+    return {mat[MATERIAL_TAG]: mat for mat in linked if MATERIAL_TAG in mat}
+
+def create_materials(spec=None):
+    """Material library, indexed by the layout's material IDs.
+
+    Materials in spec.material_library (a .blend) are linked and take
+    precedence; the rest come from registry_material().
+    """
+    spec = spec or TowerSpec()
+    library = load_material_library(spec.material_library) if spec.material_library else {}
+    builders = {
+        'leather': lambda: registry_material(create_leather_material, "ShinyBlackLeather"),
+        'glass': lambda: registry_material(create_advanced_material, "VisionGlass", (0.8, 0.9, 1.0),
+                                           metallic=0.1, roughness=0.05,
+                                           transmission=0.95, ior=1.52),
+        'spandrel': lambda: registry_material(create_advanced_material, "SpandrelPanel",
+                                              (0.02, 0.02, 0.02), metallic=0.8, roughness=0.15),
+        'mullion': lambda: registry_material(create_advanced_material, "Mullion", (0.3, 0.3, 0.3),
+                                             metallic=0.9, roughness=0.2),
+        'column': lambda: registry_material(create_leather_material, "StructuralColumn"),
+        'facade_bands': lambda: registry_material(
+            create_facade_band_material, "FacadeBands",
+            spec.floor_height, spec.floor_height - spec.vision_glass_h - 0.2),
+    }
+    for name in MATERIALS:
+        if name not in library:
+            library[name] = builders[name]()
+            library[name][MATERIAL_TAG] = name
+    return [library[name] for name in MATERIALS]
+
+def save_material_library(path, spec=None):
+    """Write the materials to a .blend that create_materials() can link from"""
+    bpy.data.libraries.write(bpy.path.abspath(path), set(create_materials(spec)), fake_user=True)
+
+# ===== BULK GEOMETRY BUILDER =====
+def write_mesh(mesh, verts, loops=None, poly_sizes=None, uvs=None, material_indices=None):
+    """Fill an empty Mesh from NumPy arrays with one foreach_set call per attribute.
+
+    `verts` is (V, 3); `loops` the vertex index of every polygon corner,
+    polygon after polygon, and `poly_sizes` the corner count of each
+    polygon; `uvs` one (u, v) per loop and `material_indices` one slot per
+    polygon. No operators, mode switches or per-vertex Python; without
+    polygons the mesh is a point cloud.
+    """
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+
+    if poly_sizes is not None and len(poly_sizes):
+        sizes = np.asarray(poly_sizes, dtype=np.int32)
+        mesh.loops.add(int(sizes.sum()))
+        mesh.loops.foreach_set("vertex_index", np.asarray(loops, dtype=np.int32))
+        mesh.polygons.add(len(sizes))
+        mesh.polygons.foreach_set("loop_start", np.cumsum(sizes, dtype=np.int32) - sizes)
+        # Derived from loop_start since Blender 4.0; still has to be set before that
+        if not mesh.polygons.bl_rna.properties['loop_total'].is_readonly:
+            mesh.polygons.foreach_set("loop_total", sizes)
+        if material_indices is not None:
+            mesh.polygons.foreach_set("material_index", np.asarray(material_indices, dtype=np.int32))
+        if uvs is not None:
+            mesh.uv_layers.new(name="UVMap").data.foreach_set(
+                "uv", np.asarray(uvs, dtype=np.float32).ravel())
+
+    mesh.update(calc_edges=True)
+    return mesh
+
+class MeshBatch:
+    """Collect building elements and emit them as one mesh object.
+
+    Boxes arrive as layout element arrays (center, size, material ID), other
+    shapes as ready-made (verts, faces); the whole batch is written in one
+    pass of write_mesh() with one material slot per material used and
+    box-projected UVs.
+    Elements may carry global element IDs (see skyscraper_layout.layout_element_ids),
+    which build(element_ids=True) stores as an `element_id` face attribute.
+
+    With an ArtifactCache (see skyscraper_artifacts.py), the mesh arrays are
+    stored under the batch name and `digest` (what the queued elements were
+    generated from). When they are already there, queueing is skipped and
+    build() writes the stored arrays.
+    """
+
+    def __init__(self, name, materials, artifacts=None, digest=None):
+        self.name = name
+        self.materials = materials
+        self.boxes = []
+        self.box_ids = []
+        self.parts = []
+        self.artifacts = artifacts if digest else None
+        self.artifact_key = self.artifacts and self.artifacts.key('mesh', digest, name)
+        self.cached = self.artifacts and self.artifacts.load(self.artifact_key)
+
+    def add_elements(self, elements, ids=None):
+        """Queue an ELEMENT_DTYPE array of boxes"""
+        if len(elements) and self.cached is None:
+            self.boxes.append(elements)
+            self.box_ids.append(np.full(len(elements), -1) if ids is None else ids)
+
+    def add_geometry(self, verts, faces, material, element_id=-1):
+        """Queue arbitrary polygons (indices local to `verts`)"""
+        if self.cached is None:
+            self.parts.append((verts, faces, material, element_id))
+
+    def add_slabs(self, slabs, ids=None):
+        """Queue a SLAB_DTYPE array; slabs with an inner_half get a core void"""
+        if self.cached is not None:
+            return
+        for i, slab in enumerate(slabs):
+            self.add_geometry(*slab_geometry(slab), LEATHER, -1 if ids is None else ids[i])
+
+    def add_shafts(self, shafts, door_w, door_h, door_bottoms, door_depth, ids=None):
+        """Queue shafts with a door recess starting at each of `door_bottoms`"""
+        if self.cached is not None:
+            return
+        for i, shaft in enumerate(shafts):
+            self.add_geometry(*shaft_geometry(shaft['center'], shaft['size'], door_w, door_h,
+                                              door_bottoms, door_depth),
+                              int(shaft['material']), -1 if ids is None else ids[i])
+
+    def add_flights(self, flights, tread, riser, width, detail=True, ids=None):
+        """Queue a FLIGHT_DTYPE array, each flight as one stepped solid"""
+        if self.cached is not None:
+            return
+        for i, flight in enumerate(flights):
+            self.add_geometry(*stair_flight_geometry(flight['start'], flight['direction'],
+                                                     flight['steps'], tread, riser, width, detail),
+                              LEATHER, -1 if ids is None else ids[i])
+
+    def mesh_arrays(self):
+        """write_mesh() arguments for every queued element, plus per-face element IDs.
+
+        `slots` lists the layout material of each material slot; None if
+        nothing is queued.
+        """
+        if not self.boxes and not self.parts:
+            return None
+
+        boxes = np.concatenate(self.boxes) if self.boxes else None
+        used = set(part[2] for part in self.parts)
+        if boxes is not None:
+            used.update(np.unique(boxes['material']).tolist())
+        slots = sorted(used)
+        slot_index = {material: i for i, material in enumerate(slots)}
+
+        verts = []
+        loops = []
+        sizes = []
+        face_slots = []
+        face_ids = []
+
+        if boxes is not None:
+            box_verts, box_faces = box_geometry(boxes['center'], boxes['size'])
+            verts.append(box_verts)
+            loops.append(box_faces.ravel())
+            sizes.append(np.full(len(box_faces), 4))
+            face_slots.append(np.repeat(np.searchsorted(slots, boxes['material']), 6))
+            face_ids.append(np.repeat(np.concatenate(self.box_ids), 6))
+
+        offset = len(verts[0]) if verts else 0
+        for part_verts, part_faces, material, element_id in self.parts:
+            part_verts = np.asarray(part_verts, dtype=np.float64).reshape(-1, 3)
+            part_sizes = np.fromiter(map(len, part_faces), dtype=np.int64, count=len(part_faces))
+            verts.append(part_verts)
+            loops.append(np.fromiter(chain.from_iterable(part_faces), dtype=np.int64,
+                                     count=int(part_sizes.sum())) + offset)
+            sizes.append(part_sizes)
+            face_slots.append(np.full(len(part_faces), slot_index[material]))
+            face_ids.append(np.full(len(part_faces), int(element_id)))
+            offset += len(part_verts)
+
+        verts, loops, sizes = np.concatenate(verts), np.concatenate(loops), np.concatenate(sizes)
+        return {
+            'verts': verts.astype(np.float32),
+            'loops': loops.astype(np.int32),
+            'poly_sizes': sizes.astype(np.int32),
+            'uvs': box_projection_uvs(verts, loops, sizes).astype(np.float32),
+            'material_indices': np.concatenate(face_slots).astype(np.int32),
+            'slots': np.array(slots, dtype=np.int32),
+            'element_ids': np.concatenate(face_ids).astype(np.int32),
+        }
+
+    def build(self, collection=None, element_ids=False):
+        """Create the mesh object for every queued element"""
+        arrays = self.cached
+        if arrays is None:
+            arrays = self.mesh_arrays()
+            if arrays is None:
+                return None
+            if self.artifacts:
+                self.artifacts.store(self.artifact_key, arrays)
+
+        mesh = bpy.data.meshes.new(self.name)
+        for material in arrays['slots']:
+            mesh.materials.append(self.materials[material])
+        write_mesh(mesh, arrays['verts'], arrays['loops'], arrays['poly_sizes'], arrays['uvs'],
+                   arrays['material_indices'])
+        if element_ids:
+            mesh.attributes.new("element_id", 'INT', 'FACE').data.foreach_set(
+                "value", arrays['element_ids'])
+
+        obj = bpy.data.objects.new(self.name, mesh)
+        (collection or bpy.context.collection).objects.link(obj)
+        return obj
+
+class MaterialMerger(MeshBatch):
+    """Merge all static geometry into one mesh per material.
+
+    With split='floor' or 'zone' there is one mesh per material and floor
+    (or vertical zone between mechanical floors); elements taller than a
+    floor, such as columns, walls and shafts, go to a shared 'Tower' mesh.
+    Elements are routed to their target batch as they are queued, so no
+    bpy.ops.object.join pass is needed afterwards. With `artifacts`, each
+    target batch is cached under `digest` (see MeshBatch).
+    """
+
+    def __init__(self, spec, materials, split='none', artifacts=None, digest=None):
+        super().__init__("Merged", materials)
+        if split not in ('none', 'floor', 'zone'):
+            raise ValueError(f"Unknown merge split {split!r}; expected 'none', 'floor' or 'zone'")
+        self.spec = spec
+        self.split = split
+        self.batches = {}
+        self.batch_artifacts = artifacts
+        self.digest = digest
+
+    def split_keys(self, z_min, z_max):
+        """Target group of each element from its vertical extent (-1 = full tower)"""
+        z_min, z_max = np.atleast_1d(z_min), np.atleast_1d(z_max)
+        if self.split == 'none':
+            return np.zeros(len(z_min), dtype=int)
+        floors = element_floors(self.spec, z_min, z_max)
+        keys = vertical_zones(self.spec, floors) if self.split == 'zone' else floors
+        return np.where(z_max - z_min > self.spec.floor_height + 1e-6, -1, keys)
+
+    def batch(self, material, key):
+        """MeshBatch for one (material, floor/zone) group"""
+        if (material, key) not in self.batches:
+            name = f"Merged_{self.materials[material].name}"
+            if key == -1:
+                name += "_Tower"
+            elif self.split != 'none':
+                name += f"_{self.split.capitalize()}{key}"
+            self.batches[material, key] = MeshBatch(name, self.materials, self.batch_artifacts,
+                                                    self.digest)
+        return self.batches[material, key]
+
+    def add_elements(self, elements, ids=None):
+        if not len(elements):
+            return
+        ids = np.full(len(elements), -1) if ids is None else np.asarray(ids)
+        half_height = elements['size'][:, 2] / 2
+        keys = self.split_keys(elements['center'][:, 2] - half_height,
+                               elements['center'][:, 2] + half_height)
+        groups = np.column_stack([elements['material'], keys])
+        for material, key in np.unique(groups, axis=0):
+            members = (groups[:, 0] == material) & (groups[:, 1] == key)
+            self.batch(int(material), int(key)).add_elements(elements[members], ids[members])
+
+    def add_geometry(self, verts, faces, material, element_id=-1):
+        z = np.asarray(verts, dtype=np.float64)[:, 2]
+        key = int(self.split_keys(z.min(), z.max())[0])
+        self.batch(material, key).add_geometry(verts, faces, material, element_id)
+
+    def build(self, collection=None, element_ids=False):
+        """Create one mesh object per (material, floor/zone) group"""
+        return [batch.build(collection, element_ids) for batch in self.batches.values()]
+
+def get_instance_on_points_tree():
+    """Shared Geometry Nodes tree: instance the `Prototype` object on every point"""
+    tree = bpy.data.node_groups.get("SkyscraperInstanceOnPoints")
+    if tree:
+        return tree
+
+    tree = bpy.data.node_groups.new("SkyscraperInstanceOnPoints", 'GeometryNodeTree')
+    tree.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    tree.interface.new_socket("Prototype", in_out='INPUT', socket_type='NodeSocketObject')
+    tree.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = tree.nodes
+    group_in = nodes.new(type='NodeGroupInput')
+    object_info = nodes.new(type='GeometryNodeObjectInfo')
+    instance = nodes.new(type='GeometryNodeInstanceOnPoints')
+    group_out = nodes.new(type='NodeGroupOutput')
+
+    group_in.location = (-400, 0)
+    object_info.location = (-200, -150)
+    instance.location = (0, 0)
+    group_out.location = (200, 0)
+
+    tree.links.new(group_in.outputs['Prototype'], object_info.inputs['Object'])
+    tree.links.new(group_in.outputs['Geometry'], instance.inputs['Points'])
+    tree.links.new(object_info.outputs['Geometry'], instance.inputs['Instance'])
+    tree.links.new(instance.outputs['Instances'], group_out.inputs['Geometry'])
+
+    return tree
+
+class PanelInstancer:
+    """Place repeated boxes as Geometry Nodes instances of shared prototypes.
+
+    Same add_elements interface as MeshBatch, but boxes are grouped by (size,
+    material) - i.e. panel type, orientation and height. Each group gets one
+    hidden prototype mesh plus one point cloud of its centers, so memory and
+    viewport cost scale with the number of unique panel types. The point
+    clouds come straight from the layout, so `artifacts` is not used.
+    """
+
+    def __init__(self, name, materials, artifacts=None, digest=None):
+        self.name = name
+        self.materials = materials
+        self.boxes = []
+        self.box_ids = []
+
+    def add_elements(self, elements, ids=None):
+        """Queue an instance of the (size, material) prototype at each element center"""
+        if len(elements):
+            self.boxes.append(elements)
+            self.box_ids.append(np.full(len(elements), -1) if ids is None else ids)
+
+    def build(self, collection=None, element_ids=False):
+        """Create prototypes and one instancing point cloud per panel type"""
+        if not self.boxes:
+            return []
+
+        boxes = np.concatenate(self.boxes)
+        box_ids = np.concatenate(self.box_ids)
+        keys = np.column_stack([np.round(boxes['size'], 4), boxes['material']])
+        unique_keys, group_of = np.unique(keys, axis=0, return_inverse=True)
+        group_of = group_of.ravel()
+
+        prototypes = bpy.data.collections.new(f"{self.name}_Prototypes")
+        bpy.context.scene.collection.children.link(prototypes)
+        prototypes.hide_viewport = True
+        prototypes.hide_render = True
+
+        tree = get_instance_on_points_tree()
+        prototype_socket = tree.interface.items_tree['Prototype'].identifier
+
+        objects = []
+        for group, key in enumerate(unique_keys):
+            members = boxes[group_of == group]
+            material = int(key[3])
+            label = (f"{self.name}_{self.materials[material].name}_"
+                     f"{key[0]:.2f}x{key[1]:.2f}x{key[2]:.2f}")
+
+            proto_batch = MeshBatch(f"{label}_Prototype", self.materials)
+            proto_batch.add_geometry(*box_geometry((0, 0, 0), members['size'][0]), material)
+            prototype = proto_batch.build(prototypes)
+
+            points = bpy.data.meshes.new(label)
+            write_mesh(points, members['center'])
+            if element_ids:
+                # Point attributes carry over to the instances
+                points.attributes.new("element_id", 'INT', 'POINT').data.foreach_set(
+                    "value", box_ids[group_of == group].tolist())
+            obj = bpy.data.objects.new(label, points)
+            (collection or bpy.context.collection).objects.link(obj)
+
+            mod = obj.modifiers.new(name="PanelInstances", type='NODES')
+            mod.node_group = tree
+            mod[prototype_socket] = prototype
+            objects.append(obj)
+
+        return objects
+
+# ===== FLOOR TEMPLATES =====
+def get_template_root():
+    """Collection holding floor templates, excluded from the view layer"""
+    root = bpy.data.collections.get("FloorTemplates")
+    if root is None:
+        root = bpy.data.collections.new("FloorTemplates")
+        root[SUBSYSTEM_TAG] = 'shared'  # Holds templates of several subsystems
+        bpy.context.scene.collection.children.link(root)
+        bpy.context.view_layer.layer_collection.children[root.name].exclude = True
+    return root
+
+def build_floor_subsystem(spec, name, subsystem, layout, materials, batch_type=MeshBatch, key=None,
+                          ids=None, artifacts=None, digest=None):
+    """Build a per-floor layout subsystem (see FLOOR_SUBSYSTEMS).
+
+    Without templates the subsystem's layout goes into one batch as-is. With
+    spec.use_floor_templates, the layout runs once per distinct key(floor)
+    (the floor type by default), shifted to z = 0, into a template
+    collection, and each floor becomes an empty instancing that collection
+    at its height - the mesh data is shared. Element IDs (`ids`, one per
+    layout record) are only written without templates, since instanced floors
+    share one template mesh. `artifacts` and `digest` go to every batch (see
+    MeshBatch).
+    """
+    floor_fn, floors_fn = FLOOR_SUBSYSTEMS[subsystem]
+    key = key or spec.floor_type
+
+    if not spec.use_floor_templates:
+        batch = batch_type(name, materials, artifacts, digest)
+        batch.add_elements(layout[subsystem], ids)
+        batch.build(element_ids=spec.element_ids)
+        return
+
+    templates = {}
+    for floor in floors_fn(spec):
+        z_base = floor * spec.floor_height
+        template_key = key(floor)
+        if template_key not in templates:
+            template = bpy.data.collections.new(f"{name}_{template_key}_Template")
+            get_template_root().children.link(template)
+            floor_elements = floor_fn(spec, floor)
+            floor_elements['center'][:, 2] -= z_base
+            batch = batch_type(f"{name}_{template_key}", materials, artifacts, digest)
+            batch.add_elements(floor_elements)
+            batch.build(template)
+            templates[template_key] = template
+
+        instance = bpy.data.objects.new(f"{name}_Floor_{floor}", None)
+        instance.instance_type = 'COLLECTION'
+        instance.instance_collection = templates[template_key]
+        instance.location = (0, 0, z_base)
+        bpy.context.collection.objects.link(instance)
+
+# ===== TOWER =====
+@contextmanager
+def scene_phase(instr, name, label=None):
+    """instr.phase() that also counts the objects, meshes and vertices it adds"""
+    objects, meshes = len(bpy.data.objects), len(bpy.data.meshes)
+    vertices = sum(len(mesh.vertices) for mesh in bpy.data.meshes)
+    with instr.phase(name, label):
+        yield
+        instr.count('objects', len(bpy.data.objects) - objects)
+        instr.count('meshes', len(bpy.data.meshes) - meshes)
+        instr.count('vertices', sum(len(mesh.vertices) for mesh in bpy.data.meshes) - vertices)
+
+def clear_scene(instr=None):
+    """Delete every object in the current scene (one batch_remove, no operators)"""
+    objects = list(bpy.context.scene.objects)
+    bpy.data.batch_remove(objects)
+    if instr:
+        instr.count('objects_removed', len(objects))
+
+def reset_scene():
+    """Remove all objects, meshes, collections, cameras, lights and build records.
+
+    Materials and node trees are kept, so the next build in a long-lived
+    process (see skyscraper_server.py) reuses them through
+    registry_material() instead of creating them again. The LOD switch and
+    lazy interior handlers of the previous build are unregistered; the next
+    build registers them again if its spec needs them.
+    """
+    for handler in (lod_switch_handler, interior_handler):
+        remove_scene_handler(handler)
+    if bpy.app.timers.is_registered(update_interiors):
+        bpy.app.timers.unregister(update_interiors)
+    bpy.data.batch_remove([*bpy.data.objects, *bpy.data.meshes, *bpy.data.collections,
+                           *bpy.data.cameras, *bpy.data.lights])
+    scene = bpy.context.scene
+    for key in [key for key in scene.keys() if key.startswith(SUBSYSTEM_RECORD)]:
+        del scene[key]
+
+# ===== INCREMENTAL REBUILDS =====
+# Custom property naming the subsystem that generated an object, mesh or collection
+SUBSYSTEM_TAG = "skyscraper_subsystem"
+# Scene custom property: subsystem name -> subsystem_hash() it was last built from
+SUBSYSTEM_RECORD = "skyscraper_subsystems"
+# Custom property: spec_hash() of the district tower a datablock was built for
+TOWER_TAG = "skyscraper_tower"
+
+def subsystem_record_key(scope=None):
+    """Scene custom property holding the subsystem record of a district tower (or the tower)"""
+    return SUBSYSTEM_RECORD if scope is None else f"{SUBSYSTEM_RECORD}:{scope}"
+
+def datablock_collections():
+    """The bpy.data collections whose members a subsystem can create"""
+    return (bpy.data.objects, bpy.data.meshes, bpy.data.collections)
+
+class SubsystemCache:
+    """Tag generated data by subsystem so a rerun only rebuilds what changed.
+
+    Every datablock a phase creates is tagged with the subsystem name, and
+    the scene records the subsystem_hash() it was built from. With
+    incremental=True, stale() is False for a subsystem whose hash still
+    matches, so its objects are kept; otherwise the old objects are removed
+    and the phase runs again. In merge_mode 'material' all geometry ends up
+    in shared meshes, so the subsystems are only current as a whole.
+    Materials are shared through registry_material() and not tracked here.
+
+    A `scope` (the spec_hash() of a district tower) keeps one tower's data
+    and record apart from the others in the same scene.
+    """
+
+    def __init__(self, spec, incremental=False, scope=None):
+        self.spec = spec
+        self.incremental = incremental
+        self.scope = scope
+        self.record = dict(bpy.context.scene.get(subsystem_record_key(scope), {}))
+        self.digests = {}
+
+    def stale(self, name, *extra):
+        """True if subsystem `name` must be built; removes its outdated data first"""
+        key = name if self.spec.merge_mode == 'subsystem' else 'tower'
+        self.digests[name] = subsystem_hash(self.spec, key, *extra)
+        if self.incremental and self.record.get(name) == self.digests[name]:
+            return False
+        self.remove(name)
+        return True
+
+    def remove(self, name):
+        """Delete every datablock tagged with subsystem `name`"""
+        for datablocks in datablock_collections():
+            for datablock in [d for d in datablocks if d.get(SUBSYSTEM_TAG) == name and
+                              d.get(TOWER_TAG) == self.scope]:
+                datablocks.remove(datablock)
+        self.record.pop(name, None)
+
+    @contextmanager
+    def phase(self, instr, name, label=None):
+        """scene_phase() that tags what it creates and records the subsystem as built"""
+        before = [set(datablocks) for datablocks in datablock_collections()]
+        with scene_phase(instr, name, label):
+            yield
+        for datablocks, existing in zip(datablock_collections(), before):
+            for datablock in set(datablocks) - existing:
+                if SUBSYSTEM_TAG not in datablock:
+                    datablock[SUBSYSTEM_TAG] = name
+                    if self.scope is not None:
+                        datablock[TOWER_TAG] = self.scope
+        self.record[name] = self.digests.get(name) or subsystem_hash(self.spec, name)
+
+    def save(self):
+        """Store the record of what has been built so far"""
+        bpy.context.scene[subsystem_record_key(self.scope)] = self.record
+
+    def finish(self):
+        """Drop subsystems that this run no longer generates and store the record"""
+        for name in set(self.record) - set(self.digests):
+            self.remove(name)
+        self.save()
+
+# ===== BUILD STEPS =====
+# Generation runs as generators that yield a label after every subsystem, so
+# build_tower() can run them to the end and GenerateTowerOperator can run them
+# a few steps per timer tick
+
+# Subsystems built at full detail, in build order
+DETAILED_SUBSYSTEMS = ('structure', 'slabs', 'core_walls', 'stairs', 'elevators', 'facade',
+                       'offices', 'restrooms', 'mechanical', 'lobby')
+
+def run_steps(steps):
+    """Run a build generator to completion and return its result"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def tower_step_count(spec):
+    """Number of labels tower_steps() yields for `spec`"""
+    count = 1  # Materials
+    for level in spec.lod_levels:
+        if level == 0:
+            count += 1 + len(DETAILED_SUBSYSTEMS) + (spec.merge_mode == 'material')
+        else:
+            count += 1
+    return count
+
+def detailed_steps(spec, materials, instr, cache, executor=None, artifacts=None):
+    """LOD0: every subsystem at full detail, one phase of `instr` per subsystem.
+
+    A generator yielding after the layout and after every subsystem (see
+    DETAILED_SUBSYSTEMS); returns the layout.
+
+    Subsystems that `cache` (a SubsystemCache) reports as current are skipped.
+    The layout runs on `executor` if given (see skyscraper_layout.layout_pool);
+    meshes are then built from its arrays here, on the main thread. With an
+    ArtifactCache, the layout and the mesh arrays of every subsystem are
+    loaded from it when they were generated before.
+
+    With spec.merge_mode = 'material' every subsystem is routed into one
+    MaterialMerger instead (templates and instancing do not apply) and the
+    merged meshes are created in a final 'merge' phase.
+
+    With spec.interior_mode = 'lazy', offices, restrooms and mechanical
+    equipment are replaced by one placeholder per floor, and each floor's
+    interior is built when it is viewed (see update_floor_interiors).
+    """
+    if spec.backend != 'python':
+        raise ValueError(f"Backend {spec.backend!r} towers are built by "
+                         "skyscraper_nodes.build_node_tower, not build_tower")
+    if spec.merge_mode not in ('subsystem', 'material'):
+        raise ValueError(f"Unknown merge mode {spec.merge_mode!r}; expected 'subsystem' or 'material'")
+    if spec.interior_mode not in ('full', 'lazy'):
+        raise ValueError(f"Unknown interior mode {spec.interior_mode!r}; expected 'full' or 'lazy'")
+
+    with instr.phase('layout'):
+        layout = (cached_layout(artifacts, spec, executor) if artifacts
+                  else compute_layout(spec, executor))
+        ids = layout_element_ids(layout)
+    yield "layout"
+
+    merger = None
+    if spec.merge_mode == 'material':
+        merger = MaterialMerger(spec, materials, spec.merge_split, artifacts,
+                                subsystem_hash(spec, 'tower'))
+
+    def batch_for(name, subsystem):
+        return merger or MeshBatch(name, materials, artifacts, cache.digests[subsystem])
+
+    def build(batch):
+        if batch is not merger:
+            batch.build(element_ids=spec.element_ids)
+
+    def stale(name):
+        # Element IDs are numbered across subsystems, so they depend on the first ID too
+        return cache.stale(name, int(ids[name][0]) if spec.element_ids and len(ids[name]) else None)
+
+    def floor_subsystem(name, subsystem, **kwargs):
+        if merger:
+            merger.add_elements(layout[subsystem], ids[subsystem])
+        else:
+            build_floor_subsystem(spec, name, subsystem, layout, materials, ids=ids[subsystem],
+                                  artifacts=artifacts, digest=cache.digests[subsystem], **kwargs)
+
+    if stale('structure'):
+        with cache.phase(instr, 'structure', "structural system"):
+            batch = batch_for("StructuralColumns", 'structure')
+            batch.add_elements(layout['structure'], ids['structure'])
+            build(batch)
+    yield "structural system"
+
+    if stale('slabs'):
+        with cache.phase(instr, 'slabs', "floor slabs"):
+            batch = batch_for("FloorSlabs", 'slabs')
+            batch.add_slabs(layout['slabs'], ids['slabs'])
+            build(batch)
+    yield "floor slabs"
+
+    if stale('core_walls'):
+        with cache.phase(instr, 'core_walls', "core walls"):
+            batch = batch_for("CoreWalls", 'core_walls')
+            batch.add_elements(layout['core_walls'], ids['core_walls'])
+            build(batch)
+    yield "core walls"
+
+    if stale('stairs'):
+        with cache.phase(instr, 'stairs', "scissor stair system"):
+            # One mesh per stair tower: every flight as a stepped solid, plus the landings
+            locations = stair_locations(spec)
+            landing_groups = np.array_split(np.arange(len(layout['landings'])), len(locations))
+            for stair, (loc, landings) in enumerate(zip(locations, landing_groups)):
+                flights = np.flatnonzero(layout['stairs']['stair'] == stair)
+                batch = batch_for(f"ScissorStair_{loc['name']}", 'stairs')
+                batch.add_flights(layout['stairs'][flights], spec.stair_tread, spec.stair_riser,
+                                  spec.stair_width, spec.stair_tread_detail, ids['stairs'][flights])
+                batch.add_elements(layout['landings'][landings], ids['landings'][landings])
+                build(batch)
+    yield "scissor stair system"
+
+    if stale('elevators'):
+        with cache.phase(instr, 'elevators', "elevator banks"):
+            # Door openings on each floor, recessed half the old cutter depth into the south face
+            batch = batch_for("ElevatorShafts", 'elevators')
+            batch.add_shafts(layout['elevators'], spec.elev_door_w, spec.elev_door_h,
+                             elevator_door_bottoms(spec), 0.1, ids['elevators'])
+            build(batch)
+    yield "elevator banks"
+
+    if stale('facade'):
+        with cache.phase(instr, 'facade', "curtain wall facade"):
+            floor_subsystem("CurtainWall", 'facade',
+                            batch_type=PanelInstancer if spec.facade_mode == 'instanced' else MeshBatch)
+    yield "curtain wall facade"
+
+    lazy = spec.interior_mode == 'lazy'
+    if lazy and cache.stale('interiors'):
+        with cache.phase(instr, 'interiors', "interior placeholders"):
+            build_interior_placeholders(spec)
+
+    if not lazy and stale('offices'):
+        with cache.phase(instr, 'offices', "interior office layouts"):
+            batch = batch_for("OfficeInteriors", 'offices')
+            batch.add_elements(layout['offices'], ids['offices'])
+            build(batch)
+    yield "interior office layouts"
+
+    if not lazy and stale('restrooms'):
+        with cache.phase(instr, 'restrooms', "restroom cores"):
+            floor_subsystem("RestroomCores", 'restrooms')
+    yield "restroom cores"
+
+    if not lazy and stale('mechanical'):
+        with cache.phase(instr, 'mechanical', "mechanical equipment"):
+            floor_subsystem("MechanicalEquipment", 'mechanical')
+    yield "mechanical equipment"
+
+    if stale('lobby'):
+        with cache.phase(instr, 'lobby', "lobby features"):
+            batch = batch_for("LobbyFeature", 'lobby')
+            batch.add_elements(layout['lobby'], ids['lobby'])
+            build(batch)
+    yield "lobby features"
+
+    if merger and cache.stale('merge'):
+        with cache.phase(instr, 'merge', "merged meshes"):
+            merger.build(element_ids=spec.element_ids)
+    if merger:
+        yield "merged meshes"
+
+    return layout
+
+def build_detailed(spec, materials, instr, cache, executor=None, artifacts=None):
+    """LOD0 in one go (see detailed_steps); returns the layout"""
+    return run_steps(detailed_steps(spec, materials, instr, cache, executor, artifacts))
+
+def simplified_steps(spec, level, materials, instr, cache, artifacts=None):
+    """LOD1 or LOD2 (see skyscraper_layout.lod_layout): one mesh per subsystem, one step"""
+    with instr.phase(f'lod{level}_layout'):
+        layout = lod_layout(spec, level)
+
+    if cache.stale(f'lod{level}'):
+        with cache.phase(instr, f'lod{level}', f"LOD{level}"):
+            for name, array in layout.items():
+                batch = MeshBatch(f"{name.title().replace('_', '')}_LOD{level}", materials,
+                                  artifacts, cache.digests[f'lod{level}'])
+                if name == 'slabs':
+                    batch.add_slabs(array)
+                else:
+                    batch.add_elements(array)
+                batch.build()
+    yield f"LOD{level}"
+    return layout
+
+# ===== LEVELS OF DETAIL =====
+def find_layer_collection(layer_collection, name):
+    """The view layer entry for collection `name`, searched depth-first"""
+    if layer_collection.name == name:
+        return layer_collection
+    for child in layer_collection.children:
+        found = find_layer_collection(child, name)
+        if found:
+            return found
+    return None
+
+@contextmanager
+def active_collection(collection):
+    """Build into `collection`: make it what bpy.context.collection returns"""
+    view_layer = bpy.context.view_layer
+    previous = view_layer.active_layer_collection
+    view_layer.active_layer_collection = find_layer_collection(view_layer.layer_collection,
+                                                               collection.name)
+    try:
+        yield collection
+    finally:
+        view_layer.active_layer_collection = previous
+
+# Far limit of the coarsest LOD (kept finite for ID properties and exporters)
+LOD_UNBOUNDED = 1e12
+
+def lod_ranges(spec):
+    """(level, near, far) camera distance range of each generated LOD.
+
+    spec.lod_distances[k] is where LOD k hands over to LOD k+1; a level that
+    is not generated hands its range to the next coarser one that is.
+    """
+    levels = sorted(spec.lod_levels)
+    ranges = []
+    for i, level in enumerate(levels):
+        near = spec.lod_distances[levels[i - 1]] if i > 0 else 0.0
+        far = spec.lod_distances[level] if i + 1 < len(levels) else LOD_UNBOUNDED
+        ranges.append((level, near, far))
+    return ranges
+
+# Handler lists the LOD switch and lazy interiors run from
+SCENE_HANDLERS = ('frame_change_post', 'depsgraph_update_post')
+
+def add_scene_handler(handler):
+    """Run `handler` on every frame change and scene edit; registered once, matched by
+    name so rerunning the script does not add a reloaded copy"""
+    for name in SCENE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if not any(getattr(h, '__name__', None) == handler.__name__ for h in handlers):
+            handlers.append(handler)
+
+def remove_scene_handler(handler):
+    """Remove `handler` from SCENE_HANDLERS, matched by name like a reloaded copy of it"""
+    for name in SCENE_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        for h in [h for h in handlers if getattr(h, '__name__', None) == handler.__name__]:
+            handlers.remove(h)
+
+def set_hidden(collection, hidden):
+    """Hide or show a collection in viewport and render; returns whether that changed.
+
+    Scene handlers call this, so it only writes on change: the write itself
+    triggers another depsgraph update.
+    """
+    if collection.hide_viewport == hidden:
+        return False
+    collection.hide_viewport = collection.hide_render = hidden
+    return True
+
+@persistent
+def lod_switch_handler(scene, depsgraph=None):
+    """Show each LOD collection only while the active camera is within its range"""
+    if scene.camera is None:
+        return
+    camera = scene.camera.matrix_world.translation
+    for collection in bpy.data.collections:
+        if "lod_range" not in collection:
+            continue
+        near, far = collection["lod_range"]
+        set_hidden(collection, not near <= (camera - Vector(collection["lod_center"])).length < far)
+
+# ===== LAZY INTERIORS =====
+# Custom properties: the floor a placeholder or generated interior stands for,
+# the spec of a placeholder collection (as JSON) and when a generated floor
+# was last hidden. Objects with SECTION_BOX_TAG set are section boxes: every
+# floor they touch is viewed.
+FLOOR_TAG = "skyscraper_floor"
+SPEC_TAG = "skyscraper_spec"
+LAST_USED_TAG = "skyscraper_last_used"
+SECTION_BOX_TAG = "skyscraper_section_box"
+
+def build_interior_placeholders(spec, collection=None):
+    """FloorPlaceholders collection: one cube empty around each interior floor (see interior_bounds)"""
+    placeholders = bpy.data.collections.new("FloorPlaceholders")
+    placeholders[SPEC_TAG] = json.dumps(asdict(spec))
+    (collection or bpy.context.collection).children.link(placeholders)
+    floors = interior_floors(spec)
+    for floor, bounds in zip(floors, interior_bounds(spec, floors)):
+        empty = bpy.data.objects.new(f"Floor_{floor}_Placeholder", None)
+        empty.empty_display_type = 'CUBE'
+        empty.location = bounds['center']
+        empty.scale = bounds['size'] / 2
+        empty[FLOOR_TAG] = floor
+        placeholders.objects.link(empty)
+    return placeholders
+
+def world_bounds(obj):
+    """World-space (min, max) corners of a mesh object, or of a cube empty's display box"""
+    corners = obj.bound_box if obj.type == 'MESH' else product((-1.0, 1.0), repeat=3)
+    points = np.array([obj.matrix_world @ Vector(corner) for corner in corners])
+    return points.min(axis=0), points.max(axis=0)
+
+def viewed_floors(placeholders, scene):
+    """Floors whose placeholder is selected, isolated in a local view or inside a section box"""
+    section_boxes = [world_bounds(obj) for obj in scene.objects if obj.get(SECTION_BOX_TAG)]
+    local_views = [area.spaces.active for window in bpy.context.window_manager.windows
+                   for area in window.screen.areas
+                   if area.type == 'VIEW_3D' and area.spaces.active.local_view]
+    floors = set()
+    for obj in placeholders.objects:
+        if FLOOR_TAG not in obj:
+            continue
+        lo, hi = world_bounds(obj)
+        if (obj.select_get() or any(obj.local_view_get(space) for space in local_views)
+                or any((lo < box_hi).all() and (box_lo < hi).all()
+                       for box_lo, box_hi in section_boxes)):
+            floors.add(obj[FLOOR_TAG])
+    return floors
+
+def build_floor_interior(spec, floor, materials, placeholders):
+    """Offices, restrooms and HVAC units of one floor, in a collection below `placeholders`"""
+    # Tagged like the placeholders (and their district tower, if any), so a rebuild
+    # of the interiors removes them too (see SubsystemCache.remove)
+    tags = {SUBSYSTEM_TAG: 'interiors'}
+    if TOWER_TAG in placeholders:
+        tags[TOWER_TAG] = placeholders[TOWER_TAG]
+    collection = bpy.data.collections.new(f"Floor_{floor}_Interior")
+    collection[FLOOR_TAG] = floor
+    for key, value in tags.items():
+        collection[key] = value
+    placeholders.children.link(collection)
+    for name, array in floor_interior(spec, floor).items():
+        batch = MeshBatch(f"{name.title()}_Floor_{floor}", materials)
+        batch.add_elements(array)
+        obj = batch.build(collection)
+        if obj is not None:
+            for key, value in tags.items():
+                obj[key] = obj.data[key] = value
+    return collection
+
+def remove_floor_interior(collection):
+    """Delete a generated floor interior and its meshes"""
+    for obj in list(collection.objects):
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        if mesh is not None and not mesh.users:
+            bpy.data.meshes.remove(mesh)
+    bpy.data.collections.remove(collection)
+
+def update_floor_interiors(placeholders, scene):
+    """Build the interiors of viewed floors, hide the others and evict the oldest.
+
+    Hidden interiors stay cached, so a floor viewed again shows at once,
+    until more than spec.interior_cache_floors of them pile up; the least
+    recently hidden are removed first.
+    """
+    spec = TowerSpec.from_dict(json.loads(placeholders[SPEC_TAG]))
+    generated = {child[FLOOR_TAG]: child for child in placeholders.children if FLOOR_TAG in child}
+    viewed = viewed_floors(placeholders, scene)
+    materials = None
+    for floor in viewed - set(generated):
+        materials = materials or create_materials(spec)
+        generated[floor] = build_floor_interior(spec, floor, materials, placeholders)
+
+    for floor, collection in generated.items():
+        if set_hidden(collection, floor not in viewed):
+            collection[LAST_USED_TAG] = time.time()
+    cached = sorted((collection.get(LAST_USED_TAG, 0.0), floor)
+                    for floor, collection in generated.items() if floor not in viewed)
+    for _, floor in cached[:max(0, len(cached) - spec.interior_cache_floors)]:
+        remove_floor_interior(generated[floor])
+
+def update_interiors():
+    """Timer callback: update_floor_interiors() for every lazy tower in the file"""
+    for placeholders in [c for c in bpy.data.collections if SPEC_TAG in c]:
+        update_floor_interiors(placeholders, bpy.context.scene)
+    return None  # Run once
+
+@persistent
+def interior_handler(scene, depsgraph=None):
+    """Schedule update_interiors(); data is not created from inside the depsgraph update"""
+    if not bpy.app.timers.is_registered(update_interiors):
+        bpy.app.timers.register(update_interiors, first_interval=0.0)
+
+# ===== ASSEMBLY =====
+def build_tower(spec, materials=None, instr=None, incremental=False, scope=None, executor=None,
+                artifacts=None):
+    """Generate the whole tower described by `spec` into the current collection.
+
+    Runs tower_steps() to the end; see there for the options.
+    """
+    return run_steps(tower_steps(spec, materials, instr, incremental, scope, executor, artifacts))
+
+def tower_steps(spec, materials=None, instr=None, incremental=False, scope=None, executor=None,
+                artifacts=None):
+    """Generator building the tower step by step (see tower_step_count).
+
+    Each subsystem runs as a phase of `instr` (an Instrumentation), which
+    records its time and the objects, meshes and vertices it created.
+
+    With incremental=True, subsystems whose inputs are unchanged since the
+    last build in this scene are kept as they are (see SubsystemCache);
+    `scope` separates towers built into the same scene (see build_district).
+    With an `executor` the per-floor layout is computed in parallel. With
+    `artifacts` (a skyscraper_artifacts.ArtifactCache) the layout and mesh
+    arrays generated by earlier runs are loaded instead of generated again;
+    the 'artifact_hits' and 'artifact_misses' counters record how that went.
+
+    With more than LOD0 in spec.lod_levels, each level is built into its own
+    LOD<n> collection. Only the most detailed level is visible, unless
+    spec.lod_camera_switch picks the level from the active camera distance
+    (see lod_ranges). With spec.interior_mode = 'lazy', floor interiors are
+    built as floors are viewed (see update_floor_interiors). Returns the
+    layout of the most detailed level.
+
+    Closing the generator early keeps what has been built and records it, so
+    an incremental rerun continues from there.
+    """
+    instr = instr or Instrumentation()
+    cache = SubsystemCache(spec, incremental, scope)
+    hits, misses = (artifacts.hits, artifacts.misses) if artifacts else (0, 0)
+    try:
+        layout = yield from levels_steps(spec, materials, instr, cache, scope, executor, artifacts)
+    except GeneratorExit:
+        cache.save()
+        raise
+    cache.finish()
+    if artifacts:
+        instr.count('artifact_hits', artifacts.hits - hits)
+        instr.count('artifact_misses', artifacts.misses - misses)
+    if spec.lod_camera_switch:
+        add_scene_handler(lod_switch_handler)
+        lod_switch_handler(bpy.context.scene)
+    if spec.interior_mode == 'lazy':
+        # Re-checks viewed floors on every selection change, scene edit and frame change
+        add_scene_handler(interior_handler)
+    return layout
+
+def levels_steps(spec, materials, instr, cache, scope, executor, artifacts):
+    """Materials, then every level of detail; returns the most detailed layout"""
+    with scene_phase(instr, 'materials'):
+        materials = materials or create_materials(spec)
+    yield "materials"
+
+    if list(spec.lod_levels) == [0] and not spec.lod_camera_switch:
+        return (yield from detailed_steps(spec, materials, instr, cache, executor, artifacts))
+
+    layouts = {}
+    for level, near, far in lod_ranges(spec):
+        # Looked up below the current collection: each district tower has its own levels
+        collection = next((child for child in bpy.context.collection.children
+                           if child.get("lod_level") == level), None)
+        if collection is None:
+            collection = bpy.data.collections.new(f"LOD{level}")
+            collection["lod_level"] = level
+            if scope is not None:
+                collection[TOWER_TAG] = scope
+            bpy.context.collection.children.link(collection)
+        collection["lod_range"] = (near, far)
+        collection["lod_center"] = (0.0, 0.0, spec.total_height / 2)
+        with active_collection(collection):
+            if level == 0:
+                layouts[level] = yield from detailed_steps(spec, materials, instr, cache, executor,
+                                                           artifacts)
+            else:
+                layouts[level] = yield from simplified_steps(spec, level, materials, instr, cache,
+                                                             artifacts)
+        # Levels are built finest first; only the finest stays visible
+        collection.hide_viewport = collection.hide_render = len(layouts) > 1
+    return layouts[min(layouts)]
+
+# ===== DISTRICTS =====
+def get_district_root():
+    """Collection holding one source collection per distinct district tower spec"""
+    root = bpy.data.collections.get("DistrictTowers")
+    if root is None:
+        root = bpy.data.collections.new("DistrictTowers")
+        bpy.context.scene.collection.children.link(root)
+    return root
+
+def remove_district_tower(key):
+    """Delete everything built for the district tower spec `key`, and its record"""
+    for datablocks in datablock_collections():
+        for datablock in [d for d in datablocks if d.get(TOWER_TAG) == key]:
+            datablocks.remove(datablock)
+    bpy.context.scene.pop(subsystem_record_key(key), None)
+
+def build_district(towers, instr=None, incremental=False, executor=None, artifacts=None):
+    """Generate a district (DistrictTower list, see load_district) in one pass.
+
+    Towers with identical specs are built once, by build_tower(), into a
+    source collection under the excluded DistrictTowers collection. Every
+    tower is then an empty in the District collection instancing its
+    source at the tower's location and rotation, so identical towers share
+    meshes, facade prototypes and floor templates; materials are shared by
+    all towers through registry_material(). With incremental=True sources
+    are rebuilt per subsystem as in build_tower(); sources no longer used by
+    any tower are removed. Returns spec_hash -> source collection.
+    """
+    instr = instr or Instrumentation()
+    groups = group_identical(towers)
+    for group in groups.values():
+        if group[0].spec.lod_camera_switch:
+            # The switch hides LOD collections, which every instance of a source shares
+            raise ValueError(f"District tower {group[0].name!r}: lod_camera_switch is not "
+                             "supported for instanced towers")
+        if group[0].spec.interior_mode == 'lazy':
+            # Placeholders in an excluded source collection can never be selected or viewed
+            raise ValueError(f"District tower {group[0].name!r}: interior_mode 'lazy' is not "
+                             "supported for instanced towers")
+
+    root = get_district_root()
+    layer = find_layer_collection(bpy.context.view_layer.layer_collection, root.name)
+    layer.exclude = False  # Built into while included, excluded again below
+    for key in {child[TOWER_TAG] for child in root.children if TOWER_TAG in child} - set(groups):
+        remove_district_tower(key)
+
+    sources = {}
+    for key, group in groups.items():
+        source = next((child for child in root.children if child.get(TOWER_TAG) == key), None)
+        if source is None:
+            source = bpy.data.collections.new(f"{group[0].name}_Source")
+            source[TOWER_TAG] = key
+            root.children.link(source)
+        if instr.verbose:
+            print(f"District tower {source.name}: {len(group)} instance(s)")
+        with active_collection(source):
+            build_tower(group[0].spec, instr=instr, incremental=incremental, scope=key,
+                        executor=executor, artifacts=artifacts)
+        sources[key] = source
+    # Look the layer up again: building may have rebuilt the view layer tree
+    find_layer_collection(bpy.context.view_layer.layer_collection, root.name).exclude = True
+
+    with scene_phase(instr, 'district', "district instances"):
+        district = bpy.data.collections.get("District")
+        if district is None:
+            district = bpy.data.collections.new("District")
+            bpy.context.scene.collection.children.link(district)
+        for obj in list(district.objects):
+            bpy.data.objects.remove(obj)
+        for key, group in groups.items():
+            for tower in group:
+                instance = bpy.data.objects.new(tower.name, None)
+                instance.instance_type = 'COLLECTION'
+                instance.instance_collection = sources[key]
+                instance.location = tower.location
+                instance.rotation_euler = (0.0, 0.0, math.radians(tower.rotation))
+                district.objects.link(instance)
+    return sources
+
+# ===== INTERACTIVE GENERATION =====
+class SKYSCRAPER_OT_generate(bpy.types.Operator):
+    """Generate a skyscraper in time slices, keeping the UI responsive (Esc cancels)"""
+    bl_idname = "skyscraper.generate"
+    bl_label = "Generate Skyscraper"
+
+    spec_json: bpy.props.StringProperty(name="Spec", default="{}",
+                                        description="Building parameters as a JSON object")
+    incremental: bpy.props.BoolProperty(name="Incremental", default=False,
+                                        description="Rebuild only subsystems whose parameters changed")
+    time_slice: bpy.props.FloatProperty(name="Time Slice", default=0.05, min=0.0,
+                                        description="Seconds of building per timer tick before "
+                                                    "the UI gets control back")
+    artifact_cache: bpy.props.StringProperty(name="Artifact Cache", subtype='DIR_PATH',
+                                             description="Directory of cached layouts and mesh "
+                                                         "arrays (empty: no cache)")
+    artifact_cache_mb: bpy.props.FloatProperty(name="Artifact Cache Size",
+                                               default=DEFAULT_MAX_SIZE / 1024 ** 2, min=0.0,
+                                               description="Size limit of the cache in MB")
+    layout_workers: bpy.props.IntProperty(name="Layout Workers", default=0, min=0,
+                                          description="Worker processes for the per-floor layout "
+                                                      "(0: in Blender's process)")
+
+    def artifacts(self):
+        if not self.artifact_cache:
+            return None
+        return ArtifactCache(self.artifact_cache, int(self.artifact_cache_mb * 1024 ** 2))
+
+    def executor(self):
+        return layout_pool(self.layout_workers) if self.layout_workers > 0 else None
+
+    def execute(self, context):
+        # No window to stay responsive for (scripts, background mode): build in one go
+        executor = self.executor()
+        try:
+            build_tower(TowerSpec.from_dict(json.loads(self.spec_json)),
+                        incremental=self.incremental, executor=executor,
+                        artifacts=self.artifacts())
+        finally:
+            if executor:
+                executor.shutdown()
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        spec = TowerSpec.from_dict(json.loads(self.spec_json))
+        self.instr = Instrumentation()
+        # Owned by the operator: the pool lives until the build finishes or is cancelled
+        self.layout_executor = self.executor()
+        self.steps = tower_steps(spec, instr=self.instr, incremental=self.incremental,
+                                 executor=self.layout_executor, artifacts=self.artifacts())
+        self.total = tower_step_count(spec)
+        self.done = 0
+        wm = context.window_manager
+        wm.progress_begin(0, self.total)
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # Closing the generator keeps and records what is built (see tower_steps)
+            self.steps.close()
+            self.end(context)
+            self.report({'WARNING'}, f"Skyscraper generation cancelled after "
+                                     f"{self.done}/{self.total} steps")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        deadline = time.perf_counter() + self.time_slice
+        try:
+            while True:
+                label = next(self.steps)
+                self.done += 1
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            self.end(context)
+            print(self.instr.format_report())
+            self.report({'INFO'}, "Skyscraper generated")
+            return {'FINISHED'}
+        except Exception:
+            self.end(context)
+            raise
+
+        context.window_manager.progress_update(self.done)
+        context.workspace.status_text_set(f"Skyscraper: {label} ({self.done}/{self.total}), "
+                                          "Esc to cancel")
+        return {'PASS_THROUGH'}
+
+    def end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        if self.layout_executor:
+            self.layout_executor.shutdown(cancel_futures=True)
+
+def register():
+    if not hasattr(bpy.types, SKYSCRAPER_OT_generate.__name__):
+        bpy.utils.register_class(SKYSCRAPER_OT_generate)
+
+def unregister():
+    if hasattr(bpy.types, SKYSCRAPER_OT_generate.__name__):
+        bpy.utils.unregister_class(SKYSCRAPER_OT_generate)
+
+def start_generation(spec, incremental=False, time_slice=0.05, artifacts=None, layout_workers=0,
+                     instr=None):
+    """Start generating `spec` with SKYSCRAPER_OT_generate in the UI.
+
+    The tower is built a few subsystems per timer tick while the viewport
+    stays usable, with a progress bar and Esc to cancel; the build finishes
+    after this returns True. Returns False, without building, when there is
+    no window (background mode) - use build_tower() then. An ArtifactCache
+    in `artifacts` is passed on by directory and size limit; with
+    layout_workers the operator computes the layout in its own layout_pool(),
+    shut down when the build finishes or is cancelled. The operator call is
+    counted in `instr`.
+    """
+    window = bpy.context.window or next(iter(bpy.context.window_manager.windows), None)
+    if bpy.app.background or window is None:
+        return False
+    register()
+    cache_options = {}
+    if artifacts:
+        cache_options = {'artifact_cache': artifacts.root,
+                         'artifact_cache_mb': artifacts.max_size / 1024 ** 2}
+    if instr:
+        instr.count('operator_calls')
+    with bpy.context.temp_override(window=window):
+        bpy.ops.skyscraper.generate('INVOKE_DEFAULT', spec_json=json.dumps(asdict(spec)),
+                                    incremental=incremental, time_slice=time_slice,
+                                    layout_workers=layout_workers, **cache_options)
+    return True
+
+def scene_stats():
+    """Object, mesh, vertex and face counts plus peak process memory"""
+    stats = {
+        'objects': len(bpy.data.objects),
+        'meshes': len(bpy.data.meshes),
+        'vertices': sum(len(mesh.vertices) for mesh in bpy.data.meshes),
+        'faces': sum(len(mesh.polygons) for mesh in bpy.data.meshes),
+        'peak_rss_mb': None,
+    }
+    try:
+        import resource
+    except ImportError:  # Windows
+        return stats
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    stats['peak_rss_mb'] = peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return stats
+
+def save_output(path, instr=None):
+    """Save the scene as .blend or export it as glTF, based on the file extension.
+
+    The save or export operator call is counted in `instr`, like every bpy.ops
+    call of the generator.
+    """
+    if instr:
+        instr.count('operator_calls')
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if path.endswith(".blend"):
+        bpy.ops.wm.save_as_mainfile(filepath=path)
+    elif path.endswith((".glb", ".gltf")):
+        bpy.ops.export_scene.gltf(filepath=path,
+                                  export_format='GLB' if path.endswith(".glb") else 'GLTF_SEPARATE')
+    else:
+        raise ValueError(f"Unsupported output format: {path}")
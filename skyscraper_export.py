@@ -0,0 +1,373 @@
+"""
+SKYSCRAPER STREAMING EXPORT
+===========================
+
+Writes a tower straight from the layout arrays to glTF or USD, without
+Blender and without holding the whole building in memory. The tower is
+generated and written one chunk at a time: first the full-height elements
+(columns, core walls, shafts, lobby), then one floor or one vertical zone
+after another. Box elements (panels, columns, walls, interior blocks) are
+written as instances of one unit cube per material - EXT_mesh_gpu_instancing
+nodes in glTF, PointInstancers in USD - and slabs, stair flights and shafts
+as plain meshes.
+
+Usage:
+    python skyscraper_export.py --spec examples/specs/supertall_tower_100floors.json \\
+        --output build/supertall.glb --split zone
+    python skyscraper_export.py --spec tower.json --output build/tower.usda
+"""
+
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from skyscraper_instrument import Instrumentation
+from skyscraper_layout import (
+    BOX_CORNERS, BOX_FACES, FLOOR_SUBSYSTEMS, MATERIALS, TowerSpec, core_walls, element_floors,
+    elevator_door_bottoms, elevator_shafts, flight_boxes, floor_layout, floor_slabs,
+    load_spec, lobby_feature, shaft_geometry, slab_geometry, stair_flight_geometry, stair_flights,
+    stair_landings, structural_columns, vertical_zones,
+)
+
+# ===== MATERIALS =====
+# Layout material -> (name, base color, metallic, roughness, transmission), as in
+# skyscraper_blender.create_materials
+MATERIAL_PBR = {
+    'leather': ("ShinyBlackLeather", (0.01, 0.01, 0.01), 0.2, 0.05, 0.0),
+    'glass': ("VisionGlass", (0.8, 0.9, 1.0), 0.1, 0.05, 0.95),
+    'spandrel': ("SpandrelPanel", (0.02, 0.02, 0.02), 0.8, 0.15, 0.0),
+    'mullion': ("Mullion", (0.3, 0.3, 0.3), 0.9, 0.2, 0.0),
+    'column': ("StructuralColumn", (0.01, 0.01, 0.01), 0.2, 0.05, 0.0),
+    'facade_bands': ("FacadeBands", (0.8, 0.9, 1.0), 0.1, 0.05, 0.0),
+}
+
+# ===== CHUNKS =====
+def box_floors(spec, boxes):
+    """element_floors() of ELEMENT_DTYPE boxes, the same split as the Blender merger"""
+    half = boxes['size'][:, 2] / 2
+    return element_floors(spec, boxes['center'][:, 2] - half, boxes['center'][:, 2] + half)
+
+def chunk_floors(spec, split):
+    """(chunk name, floors) for split='floor' (one per floor) or 'zone' (between mechanical floors)"""
+    floors = np.arange(spec.num_floors)
+    if split == 'floor':
+        return [(f"Floor_{floor}", [int(floor)]) for floor in floors]
+    if split == 'zone':
+        zones = vertical_zones(spec, floors)
+        return [(f"Zone_{zone}", floors[zones == zone].tolist()) for zone in np.unique(zones)]
+    raise ValueError(f"Unknown export split {split!r}; expected 'floor' or 'zone'")
+
+def export_chunks(spec, split='floor'):
+    """Yield (name, boxes, parts) chunk by chunk.
+
+    `boxes` is an ELEMENT_DTYPE array and `parts` a list of (verts, faces,
+    material). The full-height elements come first as the 'Tower' chunk;
+    per-floor subsystems are only computed for the floors of the current
+    chunk, so memory stays bounded by the largest chunk.
+    """
+    shafts = elevator_shafts(spec)
+    yield "Tower", np.concatenate([structural_columns(spec), core_walls(spec), lobby_feature(spec)]), [
+        (*shaft_geometry(shaft['center'], shaft['size'], spec.elev_door_w, spec.elev_door_h,
+                         elevator_door_bottoms(spec), 0.1), int(shaft['material']))
+        for shaft in shafts
+    ]
+
+    # Tower-wide arrays with one record per floor are small; split them by floor
+    slabs = floor_slabs(spec)
+    flights = stair_flights(spec)
+    landings = stair_landings(spec)
+    slab_floors = element_floors(spec, slabs['z'] - slabs['thick'], slabs['z'])
+    flight_floors = box_floors(spec, flight_boxes(spec, flights))
+    landing_floors = box_floors(spec, landings)
+
+    for name, floors in chunk_floors(spec, split):
+        boxes = [landings[np.isin(landing_floors, floors)]]
+        for subsystem, (_, floors_fn) in FLOOR_SUBSYSTEMS.items():
+            subset = [floor for floor in floors_fn(spec) if floor in floors]
+            if subset:
+                boxes.append(floor_layout(spec, subsystem, subset))
+        parts = [(*slab_geometry(slab), 0) for slab in slabs[np.isin(slab_floors, floors)]]
+        parts += [(*stair_flight_geometry(flight['start'], flight['direction'], flight['steps'],
+                                          spec.stair_tread, spec.stair_riser, spec.stair_width,
+                                          spec.stair_tread_detail), 0)
+                  for flight in flights[np.isin(flight_floors, floors)]]
+        yield name, np.concatenate(boxes), parts
+
+def merge_parts(parts):
+    """material -> (verts (N, 3), faces as lists of indices into verts)"""
+    merged = {}
+    for verts, faces, material in parts:
+        all_verts, all_faces, count = merged.setdefault(material, ([], [], [0]))
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        all_verts.append(verts)
+        all_faces.extend([int(i) + count[0] for i in face] for face in faces)
+        count[0] += len(verts)
+    return {material: (np.concatenate(verts), faces) for material, (verts, faces, _) in merged.items()}
+
+# ===== glTF =====
+FLOAT, UNSIGNED_INT = 5126, 5125
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+GLB_MAGIC, GLB_JSON, GLB_BIN = 0x46546C67, 0x4E4F534A, 0x004E4942
+
+def fan_triangles(verts, faces):
+    """Flat uint32 triangle indices for polygons, fanned from each face's first corner.
+
+    Every face the layout emits is convex, but some have collinear corners
+    (the shaft door column, stair risers); their zero-area triangles are dropped.
+    """
+    triangles = np.array([(face[0], face[i], face[i + 1]) for face in faces
+                          for i in range(1, len(face) - 1)], dtype=np.int64).reshape(-1, 3)
+    corners = np.asarray(verts, dtype=np.float64)[triangles]
+    area = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]),
+                          axis=1)
+    return triangles[area > 1e-12].astype(np.uint32).ravel()
+
+class GltfWriter:
+    """Stream meshes and instanced boxes into a .glb or .gltf file.
+
+    Buffer data goes to disk as each chunk arrives (a temporary file for
+    .glb, the .bin next to a .gltf); only the JSON index stays in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.binary = path.endswith(".glb")
+        if self.binary:
+            self.buffer = tempfile.TemporaryFile()
+        else:
+            self.bin_path = os.path.splitext(path)[0] + ".bin"
+            self.buffer = open(self.bin_path, "wb")
+        self.offset = 0
+        self.cubes = {}
+        self.gltf = {
+            'asset': {'version': "2.0", 'generator': "skyscraper_export.py"},
+            'extensionsUsed': ["EXT_mesh_gpu_instancing", "KHR_materials_transmission"],
+            'extensionsRequired': ["EXT_mesh_gpu_instancing"],
+            'scene': 0,
+            'scenes': [{'nodes': []}],
+            'nodes': [], 'meshes': [], 'materials': [], 'accessors': [], 'bufferViews': [],
+        }
+        for material in MATERIALS:
+            name, color, metallic, roughness, transmission = MATERIAL_PBR[material]
+            entry = {'name': name, 'pbrMetallicRoughness': {
+                'baseColorFactor': [*color, 1.0], 'metallicFactor': metallic,
+                'roughnessFactor': roughness}}
+            if transmission:
+                entry['extensions'] = {'KHR_materials_transmission': {'transmissionFactor': transmission}}
+            self.gltf['materials'].append(entry)
+
+    def accessor(self, data, target=None, bounds=False):
+        """Append float32 VEC3 or uint32 SCALAR data to the buffer; returns the accessor index"""
+        data = np.ascontiguousarray(data)
+        self.buffer.write(data.tobytes())
+        view = {'buffer': 0, 'byteOffset': self.offset, 'byteLength': data.nbytes}
+        if target:
+            view['target'] = target
+        # Every component is 4 bytes, so views stay aligned without padding
+        self.offset += data.nbytes
+        self.gltf['bufferViews'].append(view)
+        accessor = {'bufferView': len(self.gltf['bufferViews']) - 1, 'count': len(data),
+                    'componentType': FLOAT if data.dtype == np.float32 else UNSIGNED_INT,
+                    'type': 'VEC3' if data.ndim == 2 else 'SCALAR'}
+        if bounds:
+            accessor['min'] = data.min(axis=0).tolist()
+            accessor['max'] = data.max(axis=0).tolist()
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def add_node(self, node):
+        self.gltf['nodes'].append(node)
+        self.gltf['scenes'][0]['nodes'].append(len(self.gltf['nodes']) - 1)
+
+    def add_mesh(self, name, parts):
+        """One mesh with a triangle primitive per material"""
+        primitives = []
+        for material, (verts, faces) in merge_parts(parts).items():
+            primitives.append({
+                'attributes': {'POSITION': self.accessor(verts.astype(np.float32), ARRAY_BUFFER, True)},
+                'indices': self.accessor(fan_triangles(verts, faces), ELEMENT_ARRAY_BUFFER),
+                'material': material,
+            })
+        if primitives:
+            self.gltf['meshes'].append({'name': name, 'primitives': primitives})
+            self.add_node({'name': name, 'mesh': len(self.gltf['meshes']) - 1})
+
+    def cube(self, material):
+        """Mesh index of the unit cube instanced for `material`"""
+        if material not in self.cubes:
+            self.gltf['meshes'].append({'name': f"{MATERIAL_PBR[MATERIALS[material]][0]}_Cube", 'primitives': [{
+                'attributes': {'POSITION': self.accessor(BOX_CORNERS.astype(np.float32), ARRAY_BUFFER, True)},
+                'indices': self.accessor(fan_triangles(BOX_CORNERS, BOX_FACES),
+                                         ELEMENT_ARRAY_BUFFER),
+                'material': material,
+            }]})
+            self.cubes[material] = len(self.gltf['meshes']) - 1
+        return self.cubes[material]
+
+    def add_instances(self, name, boxes):
+        """One EXT_mesh_gpu_instancing node per material, scaling the unit cube to each box"""
+        for material in np.unique(boxes['material']):
+            members = boxes[boxes['material'] == material]
+            self.add_node({
+                'name': f"{name}_{MATERIAL_PBR[MATERIALS[material]][0]}",
+                'mesh': self.cube(int(material)),
+                'extensions': {'EXT_mesh_gpu_instancing': {'attributes': {
+                    'TRANSLATION': self.accessor(members['center'].astype(np.float32)),
+                    'SCALE': self.accessor(members['size'].astype(np.float32)),
+                }}},
+            })
+
+    def close(self):
+        """Write the JSON index (and, for .glb, copy the buffer in after it)"""
+        buffer = {'byteLength': self.offset}
+        if not self.binary:
+            buffer['uri'] = os.path.basename(self.bin_path)
+        self.gltf['buffers'] = [buffer]
+        index = json.dumps(self.gltf, separators=(",", ":")).encode()
+        if not self.binary:
+            self.buffer.close()
+            with open(self.path, "wb") as f:
+                f.write(index)
+            return
+
+        index += b" " * (-len(index) % 4)
+        padding = -self.offset % 4
+        total = 12 + 8 + len(index) + 8 + self.offset + padding
+        with open(self.path, "wb") as f:
+            f.write(struct.pack("<III", GLB_MAGIC, 2, total))
+            f.write(struct.pack("<II", len(index), GLB_JSON) + index)
+            f.write(struct.pack("<II", self.offset + padding, GLB_BIN))
+            self.buffer.seek(0)
+            shutil.copyfileobj(self.buffer, f)
+            f.write(b"\0" * padding)
+        self.buffer.close()
+
+# ===== USD =====
+def usd_array(values, fmt="{:.6g}"):
+    """USDA array literal of scalars or of tuples"""
+    values = np.asarray(values)
+    if values.ndim == 1:
+        return "[" + ", ".join(fmt.format(v) for v in values.tolist()) + "]"
+    return "[" + ", ".join("(" + ", ".join(fmt.format(c) for c in row) + ")"
+                           for row in values.tolist()) + "]"
+
+class UsdaWriter:
+    """Stream meshes and instanced boxes into a text .usda layer.
+
+    Prims are written as each chunk arrives. Unit cubes live under an
+    `over` so they are only drawn through the PointInstancers.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.root = "/Tower"
+        write = self.file.write
+        write('#usda 1.0\n(\n    defaultPrim = "Tower"\n    metersPerUnit = 1\n    upAxis = "Z"\n)\n\n')
+        write('def Xform "Tower"\n{\n    def Scope "Materials"\n    {\n')
+        for material in MATERIALS:
+            name, color, metallic, roughness, transmission = MATERIAL_PBR[material]
+            path = f"{self.root}/Materials/{name}"
+            write(f'        def Material "{name}"\n        {{\n'
+                  f'            token outputs:surface.connect = <{path}/Surface.outputs:surface>\n'
+                  f'            def Shader "Surface"\n            {{\n'
+                  f'                uniform token info:id = "UsdPreviewSurface"\n'
+                  f'                color3f inputs:diffuseColor = {usd_array([color])[1:-1]}\n'
+                  f'                float inputs:metallic = {metallic}\n'
+                  f'                float inputs:roughness = {roughness}\n'
+                  f'                float inputs:opacity = {1.0 - transmission:.6g}\n'
+                  f'                token outputs:surface\n            }}\n        }}\n')
+        write('    }\n\n    over "Prototypes"\n    {\n')
+        for material, name in enumerate(MATERIALS):
+            self.write_mesh(f"{MATERIAL_PBR[name][0]}_Cube", BOX_CORNERS, BOX_FACES, material, indent=8)
+        write('    }\n')
+
+    def write_mesh(self, name, verts, faces, material, indent=4):
+        pad = " " * indent
+        self.file.write(
+            f'\n{pad}def Mesh "{name}" (\n{pad}    prepend apiSchemas = ["MaterialBindingAPI"]\n{pad})\n{pad}{{\n'
+            f'{pad}    int[] faceVertexCounts = {usd_array([len(face) for face in faces])}\n'
+            f'{pad}    int[] faceVertexIndices = {usd_array([int(i) for face in faces for i in face])}\n'
+            f'{pad}    point3f[] points = {usd_array(verts)}\n'
+            f'{pad}    uniform token subdivisionScheme = "none"\n'
+            f'{pad}    rel material:binding = <{self.root}/Materials/{MATERIAL_PBR[MATERIALS[material]][0]}>\n'
+            f'{pad}}}\n')
+
+    def add_mesh(self, name, parts):
+        """One Mesh prim per material"""
+        for material, (verts, faces) in merge_parts(parts).items():
+            self.write_mesh(f"{name}_{MATERIAL_PBR[MATERIALS[material]][0]}", verts, faces, material)
+
+    def add_instances(self, name, boxes):
+        """One PointInstancer for the chunk, scaling each material's unit cube to each box"""
+        if not len(boxes):
+            return
+        prototypes = ", ".join(f"<{self.root}/Prototypes/{MATERIAL_PBR[material][0]}_Cube>"
+                               for material in MATERIALS)
+        self.file.write(
+            f'\n    def PointInstancer "{name}_Instances"\n    {{\n'
+            f'        rel prototypes = [{prototypes}]\n'
+            f'        int[] protoIndices = {usd_array(boxes["material"])}\n'
+            f'        point3f[] positions = {usd_array(boxes["center"])}\n'
+            f'        float3[] scales = {usd_array(boxes["size"])}\n'
+            f'    }}\n')
+
+    def close(self):
+        self.file.write("}\n")
+        self.file.close()
+
+# ===== EXPORT =====
+WRITERS = {".glb": GltfWriter, ".gltf": GltfWriter, ".usda": UsdaWriter}
+
+def export_tower(spec, path, split='floor', instr=None):
+    """Stream the tower described by `spec` to a .glb, .gltf or .usda file.
+
+    Each chunk (see export_chunks) is laid out in the 'layout' phase of
+    `instr` and written in the 'write' phase before the next one is
+    computed.
+    """
+    instr = instr or Instrumentation()
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in WRITERS:
+        raise ValueError(f"Unsupported export format: {path} (expected .glb, .gltf or .usda)")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    writer = WRITERS[suffix](path)
+    chunks = export_chunks(spec, split)
+    while True:
+        with instr.phase('layout'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        name, boxes, parts = chunk
+        with instr.phase('write'):
+            writer.add_instances(name, boxes)
+            writer.add_mesh(name, parts)
+            instr.count('instances', len(boxes))
+            instr.count('vertices', sum(len(part[0]) for part in parts))
+    with instr.phase('write'):
+        writer.close()
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--spec", help="JSON or TOML building spec (default: the 50-story tower)")
+    parser.add_argument("--output", required=True, help="Output .glb, .gltf or .usda file")
+    parser.add_argument("--split", choices=("floor", "zone"), default="floor",
+                        help="Generate and write one floor or one zone at a time (default: floor)")
+    args = parser.parse_args(argv)
+
+    spec = TowerSpec.from_dict(load_spec(args.spec)) if args.spec else TowerSpec()
+    instr = Instrumentation()
+    export_tower(spec, args.output, args.split, instr)
+    print(instr.format_report())
+    print(f"Saved: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
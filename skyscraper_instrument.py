@@ -0,0 +1,113 @@
+"""
+SKYSCRAPER INSTRUMENTATION
+==========================
+
+Per-phase timing, counters and optional profiling for a generation run.
+Pure Python (no bpy), so the same report format serves the Blender backend,
+the benchmark harness and layout-only runs.
+
+Usage:
+    instr = Instrumentation(profiler='cprofile')
+    with instr.profile():
+        with instr.phase('facade', "curtain wall facade"):
+            ...
+            instr.count('objects', 12)
+    print(instr.format_report())
+    instr.save_profile("facade.prof")
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+class Instrumentation:
+    """Phase timings and counters for one generation run.
+
+    Counters are attributed to the phase that is active when count() is
+    called, and also summed over the whole run.
+    """
+
+    def __init__(self, profiler=None, verbose=True):
+        if profiler not in (None,) + PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler!r}; expected one of {PROFILERS}")
+        self.profiler = profiler
+        self.verbose = verbose
+        self.phases = {}
+        self.totals = Counter()
+        self.current = None
+        self.started = time.perf_counter()
+        self._profile = None
+
+    @contextmanager
+    def phase(self, name, label=None):
+        """Time a named phase; prints 'Generating <label>...' like the original script"""
+        if self.verbose and label:
+            print(f"Generating {label}...")
+        record = self.phases.setdefault(name, {'seconds': 0.0, 'counters': Counter()})
+        outer, self.current = self.current, name
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] += time.perf_counter() - start
+            self.current = outer
+
+    def count(self, counter, n=1):
+        """Add `n` to a counter (objects, meshes, vertices, operator_calls, ...)"""
+        self.totals[counter] += n
+        if self.current is not None:
+            self.phases[self.current]['counters'][counter] += n
+
+    @contextmanager
+    def profile(self):
+        """Run the enclosed block under the configured profiler, if any"""
+        if self.profiler == 'cprofile':
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.profiler == 'pyinstrument':
+            from pyinstrument import Profiler  # Optional dependency
+            self._profile = Profiler()
+            self._profile.start()
+        try:
+            yield
+        finally:
+            if self.profiler == 'cprofile':
+                self._profile.disable()
+            elif self.profiler == 'pyinstrument':
+                self._profile.stop()
+
+    def save_profile(self, path):
+        """Write profiler output: pstats data for cProfile, HTML for pyinstrument"""
+        if self._profile is None:
+            return
+        if self.profiler == 'cprofile':
+            self._profile.dump_stats(path)
+        else:
+            with open(path, "w") as f:
+                f.write(self._profile.output_html())
+
+    def report(self):
+        """JSON-ready summary: total time, per-phase seconds and counters, counter totals"""
+        return {
+            'total_seconds': time.perf_counter() - self.started,
+            'phases': {name: {'seconds': record['seconds'], **record['counters']}
+                       for name, record in self.phases.items()},
+            'counters': dict(self.totals),
+        }
+
+    def format_report(self):
+        """Human-readable phase table, slowest phases easy to spot by share of total"""
+        report = self.report()
+        total = report['total_seconds'] or 1.0
+        counter_names = sorted(self.totals)
+        lines = [f"{'Phase':<14}{'Seconds':>10}{'Share':>8}" +
+                 "".join(f"{name:>16}" for name in counter_names)]
+        for name, record in report['phases'].items():
+            lines.append(f"{name:<14}{record['seconds']:>10.3f}{record['seconds'] / total:>8.1%}" +
+                         "".join(f"{record.get(counter, 0):>16,}" for counter in counter_names))
+        lines.append(f"{'total':<14}{report['total_seconds']:>10.3f}{'':>8}" +
+                     "".join(f"{self.totals[counter]:>16,}" for counter in counter_names))
+        return "\n".join(lines)
@@ -0,0 +1,880 @@
+"""
+SKYSCRAPER LAYOUT (bpy-free geometry core)
+==========================================
+
+Turns a building spec into compact NumPy arrays: where every column, slab,
+wall, stair tread, shaft, facade panel and interior block goes, how big it is
+and which material it uses. Nothing here imports bpy, so the layout can be
+run, profiled and tested in plain CPython; skyscraper_blender.py turns the
+arrays into Blender meshes.
+
+Usage:
+    from skyscraper_layout import TowerSpec, compute_layout
+    layout = compute_layout(TowerSpec(num_floors=30))
+    layout['facade']['center']   # (N, 3) panel centers
+
+    towers = load_district("examples/districts/midtown_district.json")
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+# ===== ELEMENT RECORDS =====
+# Material IDs stored in element arrays (index into the backend's material list)
+MATERIALS = ('leather', 'glass', 'spandrel', 'mullion', 'column', 'facade_bands')
+LEATHER, GLASS, SPANDREL, MULLION, COLUMN, FACADE_BANDS = range(len(MATERIALS))
+
+# Axis-aligned box: center, full extents, material ID
+ELEMENT_DTYPE = np.dtype([('center', 'f8', 3), ('size', 'f8', 3), ('material', 'u1')])
+
+# Straight stair flight: center of its first tread box, run direction along X
+# (+1/-1, one riser up per tread), number of treads, index into stair_locations()
+FLIGHT_DTYPE = np.dtype([('start', 'f8', 3), ('direction', 'i1'), ('steps', 'i2'), ('stair', 'u1')])
+
+# Floor slab: top elevation, outer and core-void half widths (0 = no void), thickness
+SLAB_DTYPE = np.dtype([('z', 'f8'), ('outer_half', 'f8'), ('inner_half', 'f8'), ('thick', 'f8')])
+
+# Plan placements the element arrays are derived from, one record per item:
+# core wall centerline along X (axis 0) or Y (axis 1)
+WALL_DTYPE = np.dtype([('start', 'f8', 2), ('end', 'f8', 2), ('axis', 'u1')])
+# Scissor stair origin and the name its mesh is labelled with
+STAIR_DTYPE = np.dtype([('x', 'f8'), ('y', 'f8'), ('name', 'U5')])
+# Elevator shaft position and type (index into ELEVATOR_TYPES)
+ELEVATOR_TYPES = ('passenger', 'service')
+PASSENGER, SERVICE = range(len(ELEVATOR_TYPES))
+ELEVATOR_DTYPE = np.dtype([('x', 'f8'), ('y', 'f8'), ('type', 'u1')])
+# Restroom block center and plan extents
+RESTROOM_DTYPE = np.dtype([('x', 'f8'), ('y', 'f8'), ('width', 'f8'), ('depth', 'f8')])
+
+def elements(records):
+    """Pack (center, size, material) tuples into an ELEMENT_DTYPE array"""
+    return np.array(records, dtype=ELEMENT_DTYPE)
+
+def boxes(centers, sizes, material):
+    """ELEMENT_DTYPE array from (N, 3) centers and sizes (either may broadcast)"""
+    centers, sizes = np.broadcast_arrays(np.asarray(centers, dtype=float),
+                                         np.asarray(sizes, dtype=float))
+    records = np.zeros(len(centers), dtype=ELEMENT_DTYPE)
+    records['center'], records['size'], records['material'] = centers, sizes, material
+    return records
+
+# ===== BUILDING SPEC =====
+# 'python' builds meshes from the layout arrays (skyscraper_blender.py), 'nodes'
+# one Geometry Nodes tower driven by modifier inputs (skyscraper_nodes.py)
+BACKENDS = ('python', 'nodes')
+
+@dataclass(slots=True)
+class TowerSpec:
+    """Building parameters; the defaults describe the 50-story tower"""
+    # Building Dimensions
+    num_floors: int = 50
+    floor_height: float = 4.0
+    slab_thick: float = 0.3
+    building_size: float = 50.0
+
+    # Core Dimensions
+    core_size: float = 25.0
+    wall_thick: float = 0.3
+
+    # Structural System
+    column_size: float = 3.0
+    perimeter_column_size: float = 0.8
+    column_spacing: float = 10.0
+
+    # Vertical Circulation
+    stair_width: float = 1.8
+    stair_run: float = 3.0
+    stair_tread: float = 0.28
+    stair_riser: float = 0.18
+    stair_tread_detail: bool = True
+
+    # Elevators
+    elev_width: float = 2.2
+    elev_depth: float = 2.5
+    elev_door_w: float = 1.2
+    elev_door_h: float = 2.4
+
+    # Facade System
+    curtain_wall_thick: float = 0.15
+    mullion_width: float = 0.08
+    vision_glass_h: float = 1.8
+    spandrel_h: float = 2.2
+    window_module: float = 1.5
+    facade_mode: str = 'mesh'
+    use_floor_templates: bool = False
+
+    # Output Meshes
+    merge_mode: str = 'subsystem'
+    merge_split: str = 'none'
+    element_ids: bool = False
+
+    # Level of Detail
+    lod_levels: list = field(default_factory=lambda: [0])
+    lod_distances: list = field(default_factory=lambda: [250.0, 1000.0])
+    lod_camera_switch: bool = False
+
+    # Materials
+    material_library: str = ''
+
+    # Special Floors
+    lobby_floors: list = field(default_factory=lambda: [0, 1, 2])
+    mechanical_floors: list = field(default_factory=lambda: [14, 29, 44, 49])
+    office_detail_frequency: int = 5
+
+    # Interiors
+    interior_mode: str = 'full'
+    interior_cache_floors: int = 8
+
+    # Backend (see BACKENDS)
+    backend: str = 'python'
+
+    @classmethod
+    def from_dict(cls, params):
+        """Build a spec from a parameter dict, rejecting unknown names and backends"""
+        unknown = sorted(set(params) - set(SPEC_PARAMETERS))
+        if unknown:
+            raise ValueError(f"Unknown building parameters: {', '.join(unknown)}")
+        if params.get('backend', 'python') not in BACKENDS:
+            raise ValueError(f"Unknown backend {params['backend']!r}; expected 'python' or 'nodes'")
+        return cls(**params)
+
+    @property
+    def total_height(self):
+        return self.num_floors * self.floor_height
+
+    @property
+    def build_half(self):
+        return self.building_size / 2
+
+    @property
+    def core_half(self):
+        return self.core_size / 2
+
+    @property
+    def num_steps(self):
+        return int(self.floor_height / self.stair_riser)
+
+    @property
+    def typical_office_floors(self):
+        return [i for i in range(max(self.lobby_floors, default=-1) + 1, self.num_floors)
+                if i not in self.mechanical_floors]
+
+    def floor_type(self, floor):
+        """Classify a floor as 'lobby', 'mechanical', 'typical' or 'other'"""
+        if floor in self.lobby_floors:
+            return 'lobby'
+        if floor in self.mechanical_floors:
+            return 'mechanical'
+        if floor in self.typical_office_floors:
+            return 'typical'
+        return 'other'
+
+SPEC_PARAMETERS = tuple(f.name for f in fields(TowerSpec))
+
+# Parameters each generated subsystem depends on, for incremental rebuilds
+TOWER_SHAPE = ('num_floors', 'floor_height', 'building_size', 'core_size')
+OUTPUT_PARAMETERS = ('merge_mode', 'merge_split', 'element_ids', 'lod_levels', 'lod_camera_switch',
+                     'material_library')
+FLOOR_TYPES = ('lobby_floors', 'mechanical_floors', 'use_floor_templates')
+SUBSYSTEM_PARAMETERS = {
+    'structure': TOWER_SHAPE + ('column_size', 'perimeter_column_size', 'column_spacing',
+                                'wall_thick'),
+    'slabs': TOWER_SHAPE + ('slab_thick',),
+    'core_walls': TOWER_SHAPE + ('wall_thick',),
+    'stairs': TOWER_SHAPE + ('slab_thick', 'stair_width', 'stair_run', 'stair_tread',
+                             'stair_riser', 'stair_tread_detail'),
+    'elevators': TOWER_SHAPE + ('elev_width', 'elev_depth', 'elev_door_w', 'elev_door_h'),
+    'facade': TOWER_SHAPE + FLOOR_TYPES + ('column_size', 'curtain_wall_thick', 'vision_glass_h',
+                                           'window_module', 'facade_mode'),
+    'offices': TOWER_SHAPE + FLOOR_TYPES + ('slab_thick', 'wall_thick', 'office_detail_frequency'),
+    'restrooms': TOWER_SHAPE + FLOOR_TYPES + ('slab_thick',),
+    'mechanical': TOWER_SHAPE + FLOOR_TYPES,
+    'lobby': ('floor_height', 'lobby_floors'),
+    'interiors': TOWER_SHAPE + FLOOR_TYPES + ('slab_thick', 'wall_thick', 'office_detail_frequency',
+                                              'interior_mode', 'interior_cache_floors'),
+}
+
+def subsystem_hash(spec, name, *extra):
+    """Digest of everything subsystem `name` is generated from.
+
+    Covers the parameters in SUBSYSTEM_PARAMETERS[name] (all of them for
+    other names), the output options and any `extra` inputs.
+    """
+    names = SUBSYSTEM_PARAMETERS.get(name, SPEC_PARAMETERS) + OUTPUT_PARAMETERS
+    inputs = [name, {param: getattr(spec, param) for param in names}, extra]
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def load_spec(path):
+    """Read a JSON or TOML building spec file into a parameter dict"""
+    if str(path).endswith(".toml"):
+        import tomllib  # Python 3.11+ (Blender 4.1 and later)
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+def spec_hash(spec):
+    """Digest of every building parameter; equal for towers that generate identical data"""
+    params = {name: getattr(spec, name) for name in SPEC_PARAMETERS}
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+# ===== DISTRICTS =====
+@dataclass(slots=True)
+class DistrictTower:
+    """One tower of a district: its spec and where it stands"""
+    name: str
+    spec: TowerSpec
+    location: tuple = (0.0, 0.0, 0.0)
+    rotation: float = 0.0  # Degrees about Z, around the tower's own origin
+
+def load_district(path):
+    """Read a district file (JSON or TOML) into a list of DistrictTower.
+
+    The file has an optional "defaults" parameter dict and a "towers" list.
+    Each tower may name a "spec" file (relative to the district file) and
+    inline "params", applied in that order over the defaults, plus a "name",
+    a "location" ([x, y] or [x, y, z]) and a "rotation" in degrees.
+    """
+    district = load_spec(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    unknown = sorted(set(district) - {'defaults', 'towers'})
+    if unknown:
+        raise ValueError(f"Unknown district keys: {', '.join(unknown)}")
+
+    towers = []
+    for i, entry in enumerate(district.get('towers', [])):
+        unknown = sorted(set(entry) - {'name', 'spec', 'params', 'location', 'rotation'})
+        if unknown:
+            raise ValueError(f"Unknown keys in district tower {i}: {', '.join(unknown)}")
+        params = dict(district.get('defaults', {}))
+        if 'spec' in entry:
+            params.update(load_spec(os.path.join(base_dir, entry['spec'])))
+        params.update(entry.get('params', {}))
+        location = tuple(float(v) for v in entry.get('location', (0.0, 0.0)))
+        if len(location) not in (2, 3):
+            raise ValueError(f"District tower {i}: location must be [x, y] or [x, y, z]")
+        towers.append(DistrictTower(name=entry.get('name', f"Tower_{i}"),
+                                    spec=TowerSpec.from_dict(params),
+                                    location=(location + (0.0,))[:3],
+                                    rotation=float(entry.get('rotation', 0.0))))
+    return towers
+
+def group_identical(towers):
+    """spec_hash -> the towers sharing that spec, in district order"""
+    groups = {}
+    for tower in towers:
+        groups.setdefault(spec_hash(tower.spec), []).append(tower)
+    return groups
+
+# ===== STRUCTURAL SYSTEM =====
+def corner_positions(spec):
+    """Plan positions of the four corner mega-columns"""
+    offset = spec.build_half - spec.column_size / 2
+    return [(offset, offset), (offset, -offset), (-offset, offset), (-offset, -offset)]
+
+def perimeter_positions(spec):
+    """Plan positions of the perimeter column grid"""
+    positions = []
+    half = spec.build_half
+    edge = half - spec.wall_thick / 2
+    for side in ['north', 'south', 'east', 'west']:
+        num_columns = int(spec.building_size / spec.column_spacing) - 1
+        for i in range(1, num_columns + 1):
+            offset = -half + i * spec.column_spacing
+            if side == 'north':
+                positions.append((offset, edge))
+            elif side == 'south':
+                positions.append((offset, -edge))
+            elif side == 'east':
+                positions.append((edge, offset))
+            elif side == 'west':
+                positions.append((-edge, offset))
+    return positions
+
+def structural_columns(spec):
+    """Full-height corner mega-columns and perimeter columns"""
+    z = spec.total_height / 2
+    records = [((*pos, z), (spec.column_size, spec.column_size, spec.total_height), COLUMN)
+               for pos in corner_positions(spec)]
+    size = spec.perimeter_column_size
+    records += [((*pos, z), (size, size, spec.total_height), LEATHER)
+                for pos in perimeter_positions(spec)]
+    return elements(records)
+
+# ===== FLOOR SLABS =====
+def floor_slabs(spec):
+    """One slab per floor plus the roof; intermediate slabs have a core void"""
+    slabs = np.zeros(spec.num_floors + 1, dtype=SLAB_DTYPE)
+    slabs['z'] = np.arange(spec.num_floors + 1) * spec.floor_height
+    slabs['outer_half'] = spec.build_half
+    slabs['inner_half'][1:-1] = spec.core_half
+    slabs['thick'] = spec.slab_thick
+    return slabs
+
+# ===== CORE WALLS =====
+def core_wall_segments(spec):
+    """Centerlines of the four core walls, as a WALL_DTYPE array"""
+    h = spec.core_half
+    return np.array([
+        # North wall
+        ((-h, h), (h, h), 0),
+        # South wall
+        ((-h, -h), (h, -h), 0),
+        # East wall
+        ((h, -h), (h, h), 1),
+        # West wall
+        ((-h, -h), (-h, h), 1),
+    ], dtype=WALL_DTYPE)
+
+def core_walls(spec):
+    """Full-height core wall boxes"""
+    segments = core_wall_segments(spec)
+    along = segments['axis'] == 0
+    length = np.abs(segments['end'] - segments['start'])[np.arange(len(segments)), segments['axis']]
+    centers = np.column_stack([(segments['start'] + segments['end']) / 2,
+                               np.full(len(segments), spec.total_height / 2)])
+    sizes = np.column_stack([np.where(along, length, spec.wall_thick),
+                             np.where(along, spec.wall_thick, length),
+                             np.full(len(segments), spec.total_height)])
+    return boxes(centers, sizes, LEATHER)
+
+# ===== SCISSOR STAIRS =====
+def stair_locations(spec):
+    """Plan origins of the three scissor stairs, as a STAIR_DTYPE array"""
+    h = spec.core_half
+    return np.array([
+        (-h + 3, 0, 'West'),
+        (h - 3 - spec.stair_width, 0, 'East'),
+        (0, h - 3 - spec.stair_width, 'North'),
+    ], dtype=STAIR_DTYPE)
+
+def stair_floors(spec):
+    """Floors served by the stairs"""
+    return list(range(int(spec.total_height / spec.floor_height)))
+
+def stair_flights(spec):
+    """Both flights of every scissor stair on every floor (treads only; see stair_landings)"""
+    locations = stair_locations(spec)
+    z = np.asarray(stair_floors(spec), dtype=float)[:, None] * spec.floor_height
+    landing_z = z + spec.floor_height - spec.slab_thick
+    flights = np.zeros((len(z), len(locations), 2), dtype=FLIGHT_DTYPE)
+    # Flight 1 (going up-right), flight 2 (going up-left from the landing)
+    flights['start'][..., 0, 0] = locations['x']
+    flights['start'][..., 0, 1] = locations['y']
+    flights['start'][..., 0, 2] = z
+    flights['start'][..., 1, 0] = locations['x'] + spec.stair_run
+    flights['start'][..., 1, 1] = locations['y'] + spec.stair_width + 0.5
+    flights['start'][..., 1, 2] = landing_z
+    flights['direction'] = [1, -1]
+    flights['steps'] = spec.num_steps // 2
+    flights['stair'] = np.arange(len(locations))[:, None]
+    return flights.ravel()
+
+def stair_landings(spec):
+    """Mid-flight landing boxes, stair by stair and one per floor within each stair"""
+    locations = stair_locations(spec)
+    floors = np.asarray(stair_floors(spec), dtype=float)
+    landing_z = floors * spec.floor_height + spec.floor_height - spec.slab_thick
+    centers = np.zeros((len(locations), len(floors), 3))
+    centers[..., 0] = (locations['x'] + spec.stair_run / 2)[:, None]
+    centers[..., 1] = locations['y'][:, None]
+    centers[..., 2] = landing_z - spec.slab_thick / 2
+    return boxes(centers.reshape(-1, 3), (spec.stair_run, spec.stair_width, spec.slab_thick),
+                 LEATHER)
+
+def flight_boxes(spec, flights):
+    """Bounding box of every flight in a FLIGHT_DTYPE array, as ELEMENT_DTYPE records"""
+    boxes = np.zeros(len(flights), dtype=ELEMENT_DTYPE)
+    run = flights['steps'] * spec.stair_tread
+    rise = flights['steps'] * spec.stair_riser
+    boxes['center'] = flights['start']
+    boxes['center'][:, 0] += flights['direction'] * (run - spec.stair_tread) / 2
+    boxes['center'][:, 2] += (rise - spec.stair_riser) / 2
+    boxes['size'] = np.column_stack([run, np.full(len(flights), spec.stair_width), rise])
+    boxes['material'] = LEATHER
+    return boxes
+
+# ===== ELEVATOR BANKS =====
+def elevator_positions(spec):
+    """Plan positions of the 6 passenger and 2 service elevators, as an ELEVATOR_DTYPE array"""
+    h = spec.core_half
+    return np.array([
+        # West bank (3 passenger)
+        (-h + 5, -8, PASSENGER),
+        (-h + 5, -5, PASSENGER),
+        (-h + 5, -2, PASSENGER),
+        # East bank (3 passenger)
+        (h - 5 - spec.elev_width, -8, PASSENGER),
+        (h - 5 - spec.elev_width, -5, PASSENGER),
+        (h - 5 - spec.elev_width, -2, PASSENGER),
+        # Service elevators (larger)
+        (-2, -h + 3, SERVICE),
+        (2, -h + 3, SERVICE),
+    ], dtype=ELEVATOR_DTYPE)
+
+def elevator_shafts(spec):
+    """Full-height shaft boxes (door openings come from elevator_door_bottoms)"""
+    elevators = elevator_positions(spec)
+    scale = np.where(elevators['type'] == PASSENGER, 1.0, 1.5)
+    height = np.full(len(elevators), spec.total_height)
+    return boxes(np.column_stack([elevators['x'], elevators['y'], height / 2]),
+                 np.column_stack([spec.elev_width * scale, spec.elev_depth * scale, height]),
+                 LEATHER)
+
+def elevator_door_bottoms(spec):
+    """Sill elevation of the door opening on every floor"""
+    return np.arange(spec.num_floors) * spec.floor_height + 0.1
+
+# ===== CURTAIN WALL FACADE =====
+def facade_layout(spec, floors):
+    """Spandrel and vision panels on all four sides of the given floors, as one array.
+
+    Computed for all floors x sides x modules x (spandrel, vision) at once:
+    module positions are shared by every floor, modules at a corner column
+    are masked out, and panel heights are looked up per floor type. Panels
+    come out in floor, side (north, south, east, west), module order with
+    the spandrel below the vision glass, and zero-height panels are dropped.
+    """
+    floors = np.asarray(floors, dtype=int).reshape(-1)
+    half = spec.build_half
+    skin = half + spec.curtain_wall_thick / 2
+    num_modules = int(spec.building_size / spec.window_module)
+    offsets = -half + (np.arange(num_modules) + 0.5) * spec.window_module
+    along = np.full(num_modules, skin)
+
+    # Plan position of every (side, module); skip modules at a corner column
+    x = np.stack([offsets, offsets, along, -along])
+    y = np.stack([along, -along, offsets, offsets])
+    corners = np.array(corner_positions(spec))
+    at_corner = ((np.abs(x[..., None] - corners[:, 0]) < spec.column_size) &
+                 (np.abs(y[..., None] - corners[:, 1]) < spec.column_size)).any(axis=-1)
+
+    # Panel heights by floor type: lobby (full-height glass), mechanical (minimal openings), other
+    floor_type = np.where(np.isin(floors, spec.lobby_floors), 0,
+                          np.where(np.isin(floors, spec.mechanical_floors), 1, 2))
+    spandrel_h = np.array([0.0, spec.floor_height - 0.5,
+                           spec.floor_height - spec.vision_glass_h - 0.2])[floor_type]
+    vision_h = np.array([spec.floor_height - 0.8, 0.5, spec.vision_glass_h])[floor_type]
+    heights = np.stack([spandrel_h, vision_h], axis=-1)
+    z = floors[:, None] * spec.floor_height + np.stack([spandrel_h / 2, spandrel_h + vision_h / 2],
+                                                       axis=-1)
+
+    # Panels as (floor, side, module, spandrel/vision); north/south span X, east/west span Y
+    panels = np.zeros((len(floors), 4, num_modules, 2), dtype=ELEMENT_DTYPE)
+    width = np.array([spec.window_module] * 2 + [spec.curtain_wall_thick] * 2)
+    panels['center'][..., 0] = x[None, :, :, None]
+    panels['center'][..., 1] = y[None, :, :, None]
+    panels['center'][..., 2] = z[:, None, None, :]
+    panels['size'][..., 0] = width[None, :, None, None]
+    panels['size'][..., 1] = width[::-1][None, :, None, None]
+    panels['size'][..., 2] = heights[:, None, None, :]
+    panels['material'] = [SPANDREL, GLASS]
+    return panels[~at_corner[None, :, :, None] & (heights[:, None, None, :] > 0)]
+
+def facade_floor(spec, floor):
+    """Spandrel and vision panels on all four sides of one floor"""
+    return facade_layout(spec, [floor])
+
+# ===== INTERIORS =====
+def office_floors(spec):
+    """Typical floors that get office fit-out (every Nth, to limit complexity)"""
+    return spec.typical_office_floors[::spec.office_detail_frequency]
+
+def office_floor(spec, floor):
+    """Perimeter office ring (north side) for one floor"""
+    z = floor * spec.floor_height + spec.floor_height / 2
+    office_height = spec.floor_height - spec.slab_thick - 0.5  # Account for ceiling
+    office_depth = 6.0
+    y = spec.build_half - office_depth / 2 - spec.wall_thick
+    return elements([((-spec.build_half + 5 + i * 7, y, z), (6.5, office_depth, office_height), LEATHER)
+                     for i in range(6)])
+
+def restroom_positions(spec):
+    """Plan positions of the two restroom blocks, as a RESTROOM_DTYPE array"""
+    return np.array([
+        (8, spec.core_half - 8, 8, 6),
+        (-8, spec.core_half - 8, 8, 6),
+    ], dtype=RESTROOM_DTYPE)
+
+def restroom_floor(spec, floor):
+    """Restroom blocks for one typical floor"""
+    rooms = restroom_positions(spec)
+    z = np.full(len(rooms), floor * spec.floor_height + spec.floor_height / 2)
+    return boxes(np.column_stack([rooms['x'], rooms['y'], z]),
+                 np.column_stack([rooms['width'], rooms['depth'],
+                                  np.full(len(rooms), spec.floor_height - spec.slab_thick)]),
+                 LEATHER)
+
+def mechanical_floor(spec, floor):
+    """HVAC units for one mechanical floor"""
+    z = floor * spec.floor_height + spec.floor_height / 2
+    return elements([((-15 + i * 10, -10, z), (4, 3, 2.5), SPANDREL) for i in range(4)])
+
+def lobby_feature(spec):
+    """Multi-story lobby volume, up to the top lobby floor (none without lobby floors)"""
+    if not spec.lobby_floors:
+        return elements([])
+    lobby_height = (max(spec.lobby_floors) + 1) * spec.floor_height
+    return elements([((0, 15, lobby_height / 2), (30, 10, lobby_height), LEATHER)])
+
+# ===== SUBSYSTEMS =====
+# Per-floor subsystems: name -> (elements for one floor, floors it appears on)
+FLOOR_SUBSYSTEMS = {
+    'facade': (facade_floor, lambda spec: list(range(spec.num_floors))),
+    'offices': (office_floor, office_floors),
+    'restrooms': (restroom_floor, lambda spec: spec.typical_office_floors),
+    'mechanical': (mechanical_floor, lambda spec: list(spec.mechanical_floors)),
+}
+
+# Per-floor subsystems that compute any number of floors as one array
+FLOOR_SUBSYSTEM_ARRAYS = {
+    'facade': facade_layout,
+}
+
+def floor_layout(spec, name, floors=None):
+    """Elements of a per-floor subsystem, for all its floors or the given subset"""
+    floor_fn, floors_fn = FLOOR_SUBSYSTEMS[name]
+    if floors is None:
+        floors = floors_fn(spec)
+    if name in FLOOR_SUBSYSTEM_ARRAYS:
+        return FLOOR_SUBSYSTEM_ARRAYS[name](spec, floors)
+    parts = [floor_fn(spec, floor) for floor in floors]
+    return np.concatenate(parts) if parts else elements([])
+
+# Per-floor subsystems inside the floor plate, built on demand with interior_mode = 'lazy'
+INTERIOR_SUBSYSTEMS = ('offices', 'restrooms', 'mechanical')
+
+def interior_floors(spec):
+    """Sorted floors that have at least one interior subsystem"""
+    floors = set()
+    for name in INTERIOR_SUBSYSTEMS:
+        floors.update(FLOOR_SUBSYSTEMS[name][1](spec))
+    return sorted(floors)
+
+def interior_bounds(spec, floors):
+    """Placeholder box of each floor's interior: the plate inside the facade, slab to ceiling"""
+    floors = np.asarray(floors, dtype=float)
+    height = spec.floor_height - spec.slab_thick
+    centers = np.zeros((len(floors), 3))
+    centers[:, 2] = floors * spec.floor_height + height / 2
+    return boxes(centers, (spec.building_size, spec.building_size, height), LEATHER)
+
+def floor_interior(spec, floor):
+    """Interior subsystem name -> elements on one floor, for the subsystems present there"""
+    return {name: FLOOR_SUBSYSTEMS[name][0](spec, floor) for name in INTERIOR_SUBSYSTEMS
+            if floor in FLOOR_SUBSYSTEMS[name][1](spec)}
+
+def element_floors(spec, z_min, z_max):
+    """Floor of each element spanning z_min..z_max: the one holding its midpoint, clamped
+    to the tower. Every per-floor split (merged meshes, export chunks) goes by this."""
+    middle = (np.asarray(z_min, dtype=float) + np.asarray(z_max, dtype=float)) / 2
+    return np.clip((middle // spec.floor_height).astype(int), 0, spec.num_floors - 1)
+
+def vertical_zones(spec, floors):
+    """Zone index of each floor; a new zone starts above every mechanical floor"""
+    return np.searchsorted(np.sort(spec.mechanical_floors), floors, side='left')
+
+def zone_tasks(spec):
+    """(subsystem, floors) work items: each per-floor subsystem split by vertical zone.
+
+    Floors keep their FLOOR_SUBSYSTEMS order; a task is a run of consecutive
+    floors in the same zone, so concatenating the results task by task gives
+    exactly the serial layout.
+    """
+    tasks = []
+    for name, (_, floors_fn) in FLOOR_SUBSYSTEMS.items():
+        floors = list(floors_fn(spec))
+        zones = vertical_zones(spec, floors)
+        for run in np.split(np.asarray(floors, dtype=int), np.flatnonzero(np.diff(zones)) + 1):
+            if len(run):
+                tasks.append((name, run.tolist()))
+    return tasks
+
+def layout_pool(workers=None):
+    """Process pool for compute_layout().
+
+    Children are forked on Linux only. Elsewhere fork is unavailable or
+    unsafe (on macOS system libraries break in forked children), so they
+    are spawned through skyscraper_worker, which keeps them from re-running
+    the calling script (under Blender that script imports bpy).
+    """
+    # Imported here: most runs never start a pool, and these imports add to every startup
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if sys.platform.startswith('linux'):
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    from skyscraper_worker import WorkerContext
+    return ProcessPoolExecutor(workers, mp_context=WorkerContext())
+
+def compute_layout(spec, executor=None):
+    """Complete building layout: subsystem name -> element (or slab) array.
+
+    With an `executor` (e.g. layout_pool()), the per-floor subsystems are
+    computed zone by zone in parallel (see zone_tasks) and only the compact
+    arrays come back; the result is identical to the serial layout.
+    """
+    layout = {
+        'structure': structural_columns(spec),
+        'slabs': floor_slabs(spec),
+        'core_walls': core_walls(spec),
+        'stairs': stair_flights(spec),
+        'landings': stair_landings(spec),
+        'elevators': elevator_shafts(spec),
+        'lobby': lobby_feature(spec),
+    }
+    if executor is None:
+        for name in FLOOR_SUBSYSTEMS:
+            layout[name] = floor_layout(spec, name)
+        return layout
+
+    tasks = zone_tasks(spec)
+    parts = {name: [] for name in FLOOR_SUBSYSTEMS}
+    names = [name for name, _ in tasks]
+    floors = [floors for _, floors in tasks]
+    for name, array in zip(names, executor.map(floor_layout, [spec] * len(tasks), names, floors)):
+        parts[name].append(array)
+    for name in FLOOR_SUBSYSTEMS:
+        layout[name] = np.concatenate(parts[name]) if parts[name] else elements([])
+    return layout
+
+def layout_element_ids(layout):
+    """Global element IDs: subsystem name -> one ID per record, numbered in layout order"""
+    ids = {}
+    start = 0
+    for name, array in layout.items():
+        ids[name] = np.arange(start, start + len(array))
+        start += len(array)
+    return ids
+
+# ===== LEVELS OF DETAIL =====
+def stair_volumes(spec):
+    """Full-height box around each scissor stair (both flights and landings)"""
+    depth = 2 * spec.stair_width + 0.5
+    locations = stair_locations(spec)
+    return boxes(np.column_stack([locations['x'] + spec.stair_run / 2,
+                                  locations['y'] + (depth - spec.stair_width) / 2,
+                                  np.full(len(locations), spec.total_height / 2)]),
+                 (spec.stair_run + spec.stair_tread, depth, spec.total_height), LEATHER)
+
+def facade_planes(spec):
+    """One full-height curtain wall plane per side, banded by the facade_bands material"""
+    skin = spec.build_half + spec.curtain_wall_thick / 2
+    width = spec.building_size
+    z = spec.total_height / 2
+    thick = spec.curtain_wall_thick
+    return elements([((0, skin, z), (width, thick, spec.total_height), FACADE_BANDS),
+                     ((0, -skin, z), (width, thick, spec.total_height), FACADE_BANDS),
+                     ((skin, 0, z), (thick, width, spec.total_height), FACADE_BANDS),
+                     ((-skin, 0, z), (thick, width, spec.total_height), FACADE_BANDS)])
+
+def massing_boxes(spec):
+    """One box per vertical zone (the floors up to and including each mechanical floor)"""
+    floors = np.arange(spec.num_floors)
+    zones = vertical_zones(spec, floors)
+    records = []
+    for zone in np.unique(zones):
+        zone_floors = floors[zones == zone]
+        z_0 = zone_floors[0] * spec.floor_height
+        z_1 = (zone_floors[-1] + 1) * spec.floor_height
+        records.append(((0, 0, (z_0 + z_1) / 2),
+                        (spec.building_size, spec.building_size, z_1 - z_0), FACADE_BANDS))
+    return elements(records)
+
+def lod_layout(spec, level):
+    """Simplified layout for LOD1 (volumes and facade planes) or LOD2 (zone massing).
+
+    LOD0 is the full compute_layout(). LOD1 keeps structure, slabs, core walls
+    and the lobby, turns stairs and shafts into plain boxes, replaces facade
+    modules with one plane per side and drops interiors hidden behind the
+    facade.
+    """
+    if level == 1:
+        return {
+            'structure': structural_columns(spec),
+            'slabs': floor_slabs(spec),
+            'core_walls': core_walls(spec),
+            'stairs': stair_volumes(spec),
+            'elevators': elevator_shafts(spec),
+            'facade': facade_planes(spec),
+            'lobby': lobby_feature(spec),
+        }
+    if level == 2:
+        return {'massing': massing_boxes(spec)}
+    raise ValueError(f"Unknown LOD level {level!r}; expected 1 or 2 (LOD0 is compute_layout)")
+
+# ===== MESH TOPOLOGY =====
+# Unit cube corners (vertex i has x, y, z bits i&1, i&2, i&4) and outward quads
+BOX_CORNERS = np.array([[(i & 1) - 0.5, ((i >> 1) & 1) - 0.5, ((i >> 2) & 1) - 0.5]
+                        for i in range(8)])
+BOX_FACES = np.array([
+    (0, 2, 3, 1),  # -Z
+    (4, 5, 7, 6),  # +Z
+    (0, 1, 5, 4),  # -Y
+    (2, 6, 7, 3),  # +Y
+    (0, 4, 6, 2),  # -X
+    (1, 3, 7, 5),  # +X
+])
+
+def box_geometry(centers, sizes):
+    """Vertices (N*8, 3) and quads (N*6, 4) for N axis-aligned boxes"""
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 3)
+    verts = centers[:, None, :] + BOX_CORNERS[None, :, :] * sizes[:, None, :]
+    faces = BOX_FACES[None, :, :] + (np.arange(len(centers)) * 8)[:, None, None]
+    return verts.reshape(-1, 3), faces.reshape(-1, 4)
+
+def box_projection_uvs(verts, loops, poly_sizes):
+    """Per-loop UVs (in meters) projecting each polygon along the axis closest to its normal.
+
+    `loops` holds the vertex index of every polygon corner, polygon after
+    polygon, and `poly_sizes` the corner count of each polygon.
+    """
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+    loops = np.asarray(loops, dtype=np.int64)
+    sizes = np.asarray(poly_sizes, dtype=np.int64)
+    if not len(sizes):
+        return np.zeros((0, 2))
+    starts = np.cumsum(sizes) - sizes
+    poly = np.repeat(np.arange(len(sizes)), sizes)
+    following = loops[starts[poly] + (np.arange(len(loops)) - starts[poly] + 1) % sizes[poly]]
+    # Newell normal: sum of the cross products of consecutive corners
+    normals = np.add.reduceat(np.cross(verts[loops], verts[following]), starts, axis=0)
+    planes = np.array([[1, 2], [0, 2], [0, 1]])[np.abs(normals).argmax(axis=1)]
+    return np.take_along_axis(verts[loops], planes[poly], axis=1)
+
+def ring_slab_geometry(z_top, outer_half, inner_half, thick):
+    """Square slab with a square void, as (verts, faces) - no boolean needed"""
+    z_bot = z_top - thick
+    square = [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+    verts = ([(sx * outer_half, sy * outer_half, z_top) for sx, sy in square] +
+             [(sx * inner_half, sy * inner_half, z_top) for sx, sy in square] +
+             [(sx * outer_half, sy * outer_half, z_bot) for sx, sy in square] +
+             [(sx * inner_half, sy * inner_half, z_bot) for sx, sy in square])
+
+    faces = []
+    for k in range(4):
+        k1 = (k + 1) % 4
+        faces.append((k, k1, 4 + k1, 4 + k))             # Top
+        faces.append((8 + k, 12 + k, 12 + k1, 8 + k1))   # Bottom
+        faces.append((8 + k, 8 + k1, k1, k))             # Outer edge
+        faces.append((4 + k, 4 + k1, 12 + k1, 12 + k))   # Core void edge
+
+    return verts, faces
+
+def slab_geometry(slab):
+    """One SLAB_DTYPE record as (verts, faces): a ring around the core void, or a plain box"""
+    if slab['inner_half']:
+        return ring_slab_geometry(slab['z'], slab['outer_half'], slab['inner_half'], slab['thick'])
+    width = slab['outer_half'] * 2
+    return box_geometry((0, 0, slab['z'] - slab['thick'] / 2), (width, width, slab['thick']))
+
+def stair_flight_geometry(start, direction, steps, tread, riser, width, detail=True):
+    """One stair flight as a single closed stepped solid, as (verts, faces).
+
+    Covers the same treads as one riser-thick box per step, but each step
+    sits on a soffit that follows the pitch, so neighbouring steps share
+    edges instead of touching at corners. The side faces are one polygon
+    per step. Without detail the flight is a ramp from the first tread to
+    the last.
+    """
+    right = (np.arange(steps) + 0.5) * tread
+    bottom = (np.arange(steps) - 0.5) * riser
+    top = bottom + riser
+
+    if detail:
+        # Profile (run, height): front edge, then bottom, top and next nosing at each riser
+        profile = [(-tread / 2, bottom[0]), (-tread / 2, top[0])]
+        for k in range(steps):
+            profile += [(right[k], bottom[k]), (right[k], top[k])]
+            if k < steps - 1:
+                profile.append((right[k], top[k + 1]))
+        # Vertex index of the bottom, top and next nosing at riser k
+        B, T, N = (lambda k: 2 + 3 * k), (lambda k: 3 + 3 * k), (lambda k: 4 + 3 * k)
+        sides = [[0, B(0), T(0), 1]] + [[B(k - 1), B(k), T(k), N(k - 1), T(k - 1)]
+                                         for k in range(1, steps)]
+        outline = ([0] + [B(k) for k in range(steps)] + [T(steps - 1)] +
+                   [i for k in range(steps - 2, -1, -1) for i in (N(k), T(k))] + [1])
+    else:
+        profile = [(-tread / 2, bottom[0]), (right[-1], bottom[-1]),
+                   (right[-1], top[-1]), (-tread / 2, top[0])]
+        sides = [[0, 1, 2, 3]]
+        outline = [0, 1, 2, 3]
+
+    # Extrude the profile across the stair width: side A at -Y, side B at +Y
+    profile = np.array(profile)
+    m = len(profile)
+    verts = np.empty((2 * m, 3))
+    verts[:, 0] = start[0] + direction * np.tile(profile[:, 0], 2)
+    verts[:m, 1] = start[1] - width / 2
+    verts[m:, 1] = start[1] + width / 2
+    verts[:, 2] = start[2] + np.tile(profile[:, 1], 2)
+
+    faces = sides + [[m + i for i in reversed(face)] for face in sides]
+    faces += [[i, m + i, m + j, j] for i, j in zip(outline, outline[1:] + outline[:1])]
+    if direction < 0:
+        # Mirrored along X, so flip the winding to keep normals outward
+        faces = [face[::-1] for face in faces]
+    return verts, faces
+
+def shaft_geometry(center, size, door_w, door_h, door_bottoms, door_depth):
+    """Closed shaft box with door recesses built into its south (-Y) face.
+
+    Produces the same shape as cutting one boolean per door, but the openings
+    come straight from the door dimensions: the south face is split into a
+    left strip, a right strip and a center column interrupted by each door.
+    """
+    cx, cy, cz = center
+    w, d, h = size
+    x_l, x_r = cx - w/2, cx + w/2
+    x_a, x_b = cx - door_w/2, cx + door_w/2
+    y_s, y_n = cy - d/2, cy + d/2
+    y_back = y_s + door_depth
+    z_0, z_1 = cz - h/2, cz + h/2
+
+    verts = []
+    lookup = {}
+
+    def v(x, y, z):
+        key = (x, y, z)
+        if key not in lookup:
+            lookup[key] = len(verts)
+            verts.append(key)
+        return lookup[key]
+
+    doors = [(zb, zb + door_h) for zb in door_bottoms]
+    levels = [z_0] + [z for door in doors for z in door] + [z_1]
+
+    faces = [
+        # Left and right strips of the south face (n-gons share the door-column edges)
+        [v(x_l, y_s, z_0)] + [v(x_a, y_s, z) for z in levels] + [v(x_l, y_s, z_1)],
+        [v(x_b, y_s, z_0), v(x_r, y_s, z_0), v(x_r, y_s, z_1)] +
+        [v(x_b, y_s, z) for z in reversed(levels[1:])],
+        # Bottom, top, north, west, east
+        [v(x_l, y_s, z_0), v(x_l, y_n, z_0), v(x_r, y_n, z_0), v(x_r, y_s, z_0),
+         v(x_b, y_s, z_0), v(x_a, y_s, z_0)],
+        [v(x_l, y_s, z_1), v(x_a, y_s, z_1), v(x_b, y_s, z_1), v(x_r, y_s, z_1),
+         v(x_r, y_n, z_1), v(x_l, y_n, z_1)],
+        [v(x_l, y_n, z_0), v(x_l, y_n, z_1), v(x_r, y_n, z_1), v(x_r, y_n, z_0)],
+        [v(x_l, y_s, z_0), v(x_l, y_s, z_1), v(x_l, y_n, z_1), v(x_l, y_n, z_0)],
+        [v(x_r, y_s, z_0), v(x_r, y_n, z_0), v(x_r, y_n, z_1), v(x_r, y_s, z_1)],
+    ]
+
+    # Solid center-column segments between door openings
+    for lo, hi in zip(levels[0::2], levels[1::2]):
+        faces.append([v(x_a, y_s, lo), v(x_b, y_s, lo), v(x_b, y_s, hi), v(x_a, y_s, hi)])
+
+    # Door recesses: back, sill, head and both jambs
+    for lo, hi in doors:
+        faces.append([v(x_a, y_back, lo), v(x_b, y_back, lo), v(x_b, y_back, hi), v(x_a, y_back, hi)])
+        faces.append([v(x_a, y_s, lo), v(x_b, y_s, lo), v(x_b, y_back, lo), v(x_a, y_back, lo)])
+        faces.append([v(x_a, y_s, hi), v(x_a, y_back, hi), v(x_b, y_back, hi), v(x_b, y_s, hi)])
+        faces.append([v(x_a, y_s, lo), v(x_a, y_back, lo), v(x_a, y_back, hi), v(x_a, y_s, hi)])
+        faces.append([v(x_b, y_s, lo), v(x_b, y_s, hi), v(x_b, y_back, hi), v(x_b, y_back, lo)])
+
+    return verts, faces
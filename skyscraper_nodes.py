@@ -0,0 +1,327 @@
+"""
+SKYSCRAPER GEOMETRY NODES BACKEND
+=================================
+
+Builds the tower as a single Geometry Nodes tree instead of Python-made
+meshes. The building parameters are inputs of the modifier, so changing
+num_floors, floor_height, window_module or column_spacing in the modifier
+panel re-evaluates the tower in Blender's geometry engine at interactive
+rates - no objects are created or deleted from Python.
+
+The tree builds the structural columns, slabs with core voids, core walls,
+elevator shafts and the curtain wall facade as instances of boxes, following
+the same rules as skyscraper_layout.py. It is a massing and facade study
+backend: stairs, interiors, elevator door openings and the mechanical floor
+facade pattern are left to the Python backend, and the lobby has to be the
+bottom floors (lobby_floors = [0, 1, ..., n - 1]).
+
+Usage (inside Blender):
+    from skyscraper_layout import TowerSpec
+    from skyscraper_nodes import build_node_tower
+    build_node_tower(TowerSpec(num_floors=30))
+
+    blender --python skyscraper_superior_design.py -- --backend nodes
+"""
+
+import math
+
+import bpy
+
+from skyscraper_blender import create_materials
+from skyscraper_layout import COLUMN, GLASS, LEATHER, SPANDREL
+
+# Modifier inputs: spec parameter -> socket type. "Lobby Floors" is the
+# number of lobby floors, from lobby_floor_count()
+NODE_PARAMETERS = {
+    'num_floors': 'NodeSocketInt',
+    'floor_height': 'NodeSocketFloat',
+    'slab_thick': 'NodeSocketFloat',
+    'building_size': 'NodeSocketFloat',
+    'core_size': 'NodeSocketFloat',
+    'wall_thick': 'NodeSocketFloat',
+    'column_size': 'NodeSocketFloat',
+    'perimeter_column_size': 'NodeSocketFloat',
+    'column_spacing': 'NodeSocketFloat',
+    'elev_width': 'NodeSocketFloat',
+    'elev_depth': 'NodeSocketFloat',
+    'curtain_wall_thick': 'NodeSocketFloat',
+    'vision_glass_h': 'NodeSocketFloat',
+    'window_module': 'NodeSocketFloat',
+    'lobby_floors': 'NodeSocketInt',
+}
+
+# Material inputs, by layout material ID
+NODE_MATERIALS = {'Leather': LEATHER, 'Column': COLUMN, 'Glass': GLASS, 'Spandrel': SPANDREL}
+
+# Custom property marking the object that carries the tower modifier
+NODE_TOWER_TAG = "skyscraper_node_tower"
+
+def socket_name(param):
+    """Modifier input label of a spec parameter"""
+    return param.replace('_', ' ').title()
+
+# ===== NODE BUILDER =====
+class NodeBuilder:
+    """Terse node creation for a Geometry Nodes tree.
+
+    Inputs are given as {socket name or index: value}; a value is either an
+    output socket, which gets linked, or a constant for the socket's
+    default_value. Nodes are laid out on a grid in creation order.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.count = 0
+
+    def node(self, node_type, inputs=None, **props):
+        node = self.tree.nodes.new(node_type)
+        node.location = (200 * (self.count // 10), -160 * (self.count % 10))
+        self.count += 1
+        for name, value in props.items():
+            setattr(node, name, value)
+        for key, value in (inputs or {}).items():
+            self.set(node.inputs[key], value)
+        return node
+
+    def set(self, socket, value):
+        if isinstance(value, bpy.types.NodeSocket):
+            self.tree.links.new(value, socket)
+        else:
+            socket.default_value = value
+
+    def math(self, operation, a, b=0.0):
+        return self.node('ShaderNodeMath', {0: a, 1: b}, operation=operation).outputs[0]
+
+    def add(self, a, b):
+        return self.math('ADD', a, b)
+
+    def sub(self, a, b):
+        return self.math('SUBTRACT', a, b)
+
+    def mul(self, a, b):
+        return self.math('MULTIPLY', a, b)
+
+    def div(self, a, b):
+        return self.math('DIVIDE', a, b)
+
+    def compare(self, operation, a, b):
+        return self.node('FunctionNodeCompare', {0: a, 1: b}, data_type='FLOAT',
+                         operation=operation).outputs['Result']
+
+    def vector(self, x=0.0, y=0.0, z=0.0):
+        return self.node('ShaderNodeCombineXYZ', {'X': x, 'Y': y, 'Z': z}).outputs['Vector']
+
+    def xyz(self, vector):
+        """(X, Y, Z) outputs of a vector"""
+        outputs = self.node('ShaderNodeSeparateXYZ', {'Vector': vector}).outputs
+        return outputs['X'], outputs['Y'], outputs['Z']
+
+    def line(self, count, start, offset):
+        """`count` vertices from `start`, `offset` apart"""
+        return self.node('GeometryNodeMeshLine', {'Count': count, 'Start Location': start,
+                                                  'Offset': offset},
+                         mode='OFFSET').outputs['Mesh']
+
+    def transform(self, geometry, translation=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0)):
+        return self.node('GeometryNodeTransform', {'Geometry': geometry, 'Translation': translation,
+                                                   'Rotation': rotation}).outputs['Geometry']
+
+    def material(self, geometry, material):
+        return self.node('GeometryNodeSetMaterial', {'Geometry': geometry,
+                                                     'Material': material}).outputs['Geometry']
+
+    def box(self, size, center, material):
+        """Cube of `size` around `center`, with `material`"""
+        cube = self.node('GeometryNodeMeshCube', {'Size': size}).outputs['Mesh']
+        return self.material(self.transform(cube, center), material)
+
+    def instance(self, points, instance, selection=True, scale=(1.0, 1.0, 1.0)):
+        return self.node('GeometryNodeInstanceOnPoints', {'Points': points, 'Selection': selection,
+                                                          'Instance': instance,
+                                                          'Scale': scale}).outputs['Instances']
+
+    def join(self, *geometries):
+        join = self.node('GeometryNodeJoinGeometry')
+        for geometry in geometries:
+            self.tree.links.new(geometry, join.inputs['Geometry'])
+        return join.outputs['Geometry']
+
+    def around(self, geometry):
+        """`geometry` (built for the north side) repeated on all four sides"""
+        return self.join(*[self.transform(geometry, rotation=(0.0, 0.0, angle))
+                           for angle in (0.0, math.pi, -math.pi / 2, math.pi / 2)])
+
+# ===== TOWER TREE =====
+def structure_nodes(nb, p, height, half):
+    """Corner mega-columns and the perimeter column grid"""
+    offset = nb.sub(half, nb.div(p['column_size'], 2))
+    span = nb.mul(offset, 2)
+    corners = nb.node('GeometryNodeMeshGrid', {'Size X': span, 'Size Y': span,
+                                               'Vertices X': 2, 'Vertices Y': 2}).outputs['Mesh']
+    mega = nb.box(nb.vector(p['column_size'], p['column_size'], height),
+                  nb.vector(z=nb.div(height, 2)), p['Column'])
+
+    count = nb.sub(nb.math('FLOOR', nb.div(p['building_size'], p['column_spacing'])), 1)
+    edge = nb.sub(half, nb.div(p['wall_thick'], 2))
+    north = nb.line(count, nb.vector(nb.add(nb.mul(half, -1), p['column_spacing']), edge),
+                    nb.vector(p['column_spacing']))
+    perimeter = nb.box(nb.vector(p['perimeter_column_size'], p['perimeter_column_size'], height),
+                       nb.vector(z=nb.div(height, 2)), p['Leather'])
+    return nb.join(nb.instance(corners, mega), nb.instance(nb.around(north), perimeter))
+
+def slab_nodes(nb, p, half, core_half):
+    """One slab per floor plus the roof: a ring of four bands, filled at ground and roof"""
+    thick = p['slab_thick']
+    levels = nb.line(nb.add(p['num_floors'], 1), (0.0, 0.0, 0.0), nb.vector(z=p['floor_height']))
+    band = nb.sub(half, core_half)
+    band_center = nb.div(nb.add(half, core_half), 2)
+    z = nb.mul(thick, -0.5)
+    north = nb.box(nb.vector(p['building_size'], band, thick), nb.vector(0.0, band_center, z),
+                   p['Leather'])
+    east = nb.box(nb.vector(band, p['core_size'], thick), nb.vector(band_center, 0.0, z),
+                  p['Leather'])
+    ring = nb.join(north, nb.transform(north, rotation=(0.0, 0.0, math.pi)),
+                   east, nb.transform(east, rotation=(0.0, 0.0, math.pi)))
+    void = nb.box(nb.vector(p['core_size'], p['core_size'], thick), nb.vector(z=z), p['Leather'])
+
+    index = nb.node('GeometryNodeInputIndex').outputs['Index']
+    ends = nb.node('FunctionNodeBooleanMath', {0: nb.compare('EQUAL', index, 0),
+                                               1: nb.compare('EQUAL', index, p['num_floors'])},
+                   operation='OR').outputs['Boolean']
+    return nb.join(nb.instance(levels, ring), nb.instance(levels, void, selection=ends))
+
+def core_nodes(nb, p, height, core_half):
+    """Four full-height core walls"""
+    north = nb.box(nb.vector(p['core_size'], p['wall_thick'], height),
+                   nb.vector(0.0, core_half, nb.div(height, 2)), p['Leather'])
+    east = nb.box(nb.vector(p['wall_thick'], p['core_size'], height),
+                  nb.vector(core_half, 0.0, nb.div(height, 2)), p['Leather'])
+    return nb.join(north, nb.transform(north, rotation=(0.0, 0.0, math.pi)),
+                   east, nb.transform(east, rotation=(0.0, 0.0, math.pi)))
+
+def elevator_nodes(nb, p, height, core_half):
+    """Two banks of three passenger shafts and two larger service shafts"""
+    passenger = nb.box(nb.vector(p['elev_width'], p['elev_depth'], height),
+                       nb.vector(z=nb.div(height, 2)), p['Leather'])
+    service = nb.box(nb.vector(nb.mul(p['elev_width'], 1.5), nb.mul(p['elev_depth'], 1.5), height),
+                     nb.vector(z=nb.div(height, 2)), p['Leather'])
+    west = nb.line(3, nb.vector(nb.sub(5.0, core_half), -8.0), (0.0, 3.0, 0.0))
+    east = nb.line(3, nb.vector(nb.sub(nb.sub(core_half, 5.0), p['elev_width']), -8.0),
+                   (0.0, 3.0, 0.0))
+    services = nb.line(2, nb.vector(-2.0, nb.sub(3.0, core_half)), (4.0, 0.0, 0.0))
+    return nb.join(nb.instance(nb.join(west, east), passenger), nb.instance(services, service))
+
+def facade_nodes(nb, p, half):
+    """Spandrel and vision panels on every floor and side, skipping the corner columns"""
+    module = p['window_module']
+    floor_height = p['floor_height']
+    skin = nb.add(half, nb.div(p['curtain_wall_thick'], 2))
+    modules = nb.line(nb.math('FLOOR', nb.div(p['building_size'], module)),
+                      nb.vector(nb.add(nb.mul(half, -1), nb.div(module, 2)), skin),
+                      nb.vector(module))
+    floors = nb.line(p['num_floors'], (0.0, 0.0, 0.0), nb.vector(z=floor_height))
+    grid = nb.node('GeometryNodeRealizeInstances',
+                   {'Geometry': nb.instance(floors, modules)}).outputs['Geometry']
+
+    # Modules within a column width of a corner column
+    corner = nb.sub(half, nb.div(p['column_size'], 2))
+    x, y, z = nb.xyz(nb.node('GeometryNodeInputPosition').outputs['Position'])
+    near_x = nb.compare('LESS_THAN', nb.math('ABSOLUTE', nb.sub(nb.math('ABSOLUTE', x), corner)),
+                        p['column_size'])
+    near_y = nb.compare('LESS_THAN', nb.math('ABSOLUTE', nb.sub(nb.math('ABSOLUTE', y), corner)),
+                        p['column_size'])
+    at_corner = nb.node('FunctionNodeBooleanMath', {0: near_x, 1: near_y},
+                        operation='AND').outputs['Boolean']
+    grid = nb.node('GeometryNodeDeleteGeometry', {'Geometry': grid, 'Selection': at_corner},
+                   domain='POINT').outputs['Geometry']
+
+    # Panel heights from the floor at each point (before or after moving up to the vision glass)
+    floor = nb.math('FLOOR', nb.add(nb.div(z, floor_height), 0.01))
+    lobby = nb.compare('LESS_THAN', floor, p['lobby_floors'])
+    typical_spandrel = nb.sub(nb.sub(floor_height, p['vision_glass_h']), 0.2)
+    spandrel_h = nb.mul(typical_spandrel, nb.sub(1.0, lobby))
+    vision_h = nb.add(p['vision_glass_h'],
+                      nb.mul(lobby, nb.sub(nb.sub(floor_height, 0.8), p['vision_glass_h'])))
+
+    # Unit panel standing on its point, scaled per point
+    panel = nb.transform(nb.node('GeometryNodeMeshCube', {'Size': (1.0, 1.0, 1.0)}).outputs['Mesh'],
+                         (0.0, 0.0, 0.5))
+    spandrels = nb.instance(grid, nb.material(panel, p['Spandrel']),
+                            selection=nb.compare('GREATER_THAN', spandrel_h, 0.0),
+                            scale=nb.vector(module, p['curtain_wall_thick'], spandrel_h))
+    raised = nb.node('GeometryNodeSetPosition', {'Geometry': grid,
+                                                 'Offset': nb.vector(z=spandrel_h)}).outputs['Geometry']
+    visions = nb.instance(raised, nb.material(panel, p['Glass']),
+                          scale=nb.vector(module, p['curtain_wall_thick'], vision_h))
+    return nb.around(nb.join(spandrels, visions))
+
+def get_tower_tree():
+    """Shared Geometry Nodes tree generating the tower from its modifier inputs"""
+    tree = bpy.data.node_groups.get("SkyscraperTower")
+    if tree:
+        return tree
+
+    tree = bpy.data.node_groups.new("SkyscraperTower", 'GeometryNodeTree')
+    tree.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    for param, socket_type in NODE_PARAMETERS.items():
+        socket = tree.interface.new_socket(socket_name(param), in_out='INPUT', socket_type=socket_type)
+        socket.min_value = 1 if param == 'num_floors' else 0
+    for name in NODE_MATERIALS:
+        tree.interface.new_socket(name, in_out='INPUT', socket_type='NodeSocketMaterial')
+    tree.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nb = NodeBuilder(tree)
+    group_in = nb.node('NodeGroupInput')
+    p = {param: group_in.outputs[socket_name(param)] for param in NODE_PARAMETERS}
+    p.update({name: group_in.outputs[name] for name in NODE_MATERIALS})
+
+    height = nb.mul(p['num_floors'], p['floor_height'])
+    half = nb.div(p['building_size'], 2)
+    core_half = nb.div(p['core_size'], 2)
+    tower = nb.join(structure_nodes(nb, p, height, half),
+                    slab_nodes(nb, p, half, core_half),
+                    core_nodes(nb, p, height, core_half),
+                    elevator_nodes(nb, p, height, core_half),
+                    facade_nodes(nb, p, half))
+    nb.set(nb.node('NodeGroupOutput').inputs['Geometry'], tower)
+    return tree
+
+def lobby_floor_count(spec):
+    """The "Lobby Floors" input: the tree treats floors below it as lobby, so the
+    spec's lobby has to be floors 0..n-1"""
+    count = len(spec.lobby_floors)
+    if sorted(spec.lobby_floors) != list(range(count)):
+        raise ValueError(f"The nodes backend needs the lobby on the bottom floors "
+                         f"(lobby_floors = [0, 1, ...]), got {spec.lobby_floors}")
+    return count
+
+def set_tower_inputs(modifier, spec, materials):
+    """Copy the spec (and materials) onto the modifier's inputs"""
+    items = modifier.node_group.interface.items_tree
+    for param, socket_type in NODE_PARAMETERS.items():
+        value = lobby_floor_count(spec) if param == 'lobby_floors' else getattr(spec, param)
+        # The ID property type has to match the socket (specs may give 50 for 50.0)
+        cast = int if socket_type == 'NodeSocketInt' else float
+        modifier[items[socket_name(param)].identifier] = cast(value)
+    for name, material in NODE_MATERIALS.items():
+        modifier[items[name].identifier] = materials[material]
+
+def build_node_tower(spec, materials=None, collection=None):
+    """Tower object driven by the SkyscraperTower tree, with `spec` as its inputs.
+
+    An existing node tower in `collection` (default: the current one) only
+    gets its inputs updated, so rerunning with other parameters does not
+    create any data.
+    """
+    lobby_floor_count(spec)  # Rejects lobbies the tree cannot express before creating data
+    collection = collection or bpy.context.collection
+    materials = materials or create_materials(spec)
+    obj = next((obj for obj in collection.objects if obj.get(NODE_TOWER_TAG)), None)
+    if obj is None:
+        obj = bpy.data.objects.new("SkyscraperTower", bpy.data.meshes.new("SkyscraperTower"))
+        obj[NODE_TOWER_TAG] = True
+        collection.objects.link(obj)
+        obj.modifiers.new(name="Tower", type='NODES').node_group = get_tower_tree()
+    set_tower_inputs(obj.modifiers["Tower"], spec, materials)
+    obj.update_tag()  # Inputs set as ID properties do not trigger a re-evaluation themselves
+    return obj
@@ -0,0 +1,94 @@
+"""
+SKYSCRAPER GENERATOR SERVER
+===========================
+
+Keeps one Blender process alive for many builds. Blender starts, imports the
+generator and creates the materials once; every job then only resets the
+scene (one batch_remove, materials and node trees kept) and builds geometry.
+Jobs are JSON lines on stdin, results JSON lines on stdout, so a batch
+runner can keep a few servers busy instead of starting Blender per spec.
+
+Job:    {"id": 1, "spec": "examples/specs/compact_tower_30floors.json",
+         "params": {"num_floors": 35}, "output": "build/compact.glb", "stats": "build/compact.json"}
+Result: SKYSCRAPER_RESULT {"id": 1, "ok": true, "seconds": 2.1, "instrumentation": {...}}
+        (or "ok": false with the "error" traceback; the server keeps running)
+
+Every key of a job is optional: "params" apply over the "spec" file, over
+the defaults. The server exits at the end of stdin.
+
+Usage:
+    blender --background --factory-startup --python skyscraper_server.py -- --cache ~/.cache/skyscraper
+    python skyscraper_batch.py examples/specs/ --server --jobs 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+# Started as `blender --python skyscraper_server.py`, so the generator modules
+# next to this file are only importable once its folder is on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skyscraper_artifacts import DEFAULT_MAX_SIZE, ArtifactCache
+from skyscraper_instrument import Instrumentation
+from skyscraper_layout import TowerSpec, load_spec
+
+# Marks result lines among Blender's own console output
+RESULT_PREFIX = "SKYSCRAPER_RESULT "
+
+def job_spec(job):
+    """TowerSpec of a job: its "params" over its "spec" file over the defaults"""
+    params = load_spec(job['spec']) if job.get('spec') else {}
+    params.update(job.get('params', {}))
+    return TowerSpec.from_dict(params)
+
+def run_job(blender, job, artifacts=None):
+    """Build one job in a freshly reset scene; returns its result fields"""
+    instr = Instrumentation(verbose=False)
+    start = time.perf_counter()
+    spec = job_spec(job)
+    with instr.phase('reset'):
+        blender.reset_scene()
+    blender.build_tower(spec, instr=instr, artifacts=artifacts)
+    if job.get('output'):
+        with instr.phase('output'):
+            blender.save_output(job['output'], instr)
+    if job.get('stats'):
+        with open(job['stats'], "w") as f:
+            json.dump({**blender.scene_stats(), 'instrumentation': instr.report()}, f, indent=2)
+    return {'seconds': time.perf_counter() - start, 'instrumentation': instr.report()}
+
+def serve(blender, lines, artifacts=None):
+    """Run every job line and print one result line for each"""
+    for line in lines:
+        if not line.strip():
+            continue
+        job = {}
+        try:
+            job = json.loads(line)
+            result = {'ok': True, **run_job(blender, job, artifacts)}
+        except Exception:
+            result = {'ok': False, 'error': traceback.format_exc()}
+        print(RESULT_PREFIX + json.dumps({'id': job.get('id'), **result}), flush=True)
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="skyscraper_server.py")
+    parser.add_argument("--cache", help="Artifact cache directory shared with other runs")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_SIZE / 1024 ** 2,
+                        help="Artifact cache size limit in MB (default: 2048)")
+    args = parser.parse_args(argv)
+
+    import skyscraper_blender as blender  # Imports bpy: only inside Blender
+
+    artifacts = ArtifactCache(args.cache, int(args.cache_size * 1024 ** 2)) if args.cache else None
+    # Warm up once: empty the startup scene and create the default materials
+    blender.reset_scene()
+    blender.create_materials(TowerSpec())
+    serve(blender, sys.stdin, artifacts)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+SKYSCRAPER SPATIAL INDEX
+========================
+
+Axis-aligned bounding-box index over the floor plate, for overlap queries
+and clash detection between generated elements. Boxes are bucketed into a
+uniform plan grid per floor, so finding everything near an element, or every
+overlapping pair in the tower, only compares elements that share a cell.
+Pure NumPy (no bpy), like the layout it checks.
+
+Usage:
+    from skyscraper_spatial import layout_index
+    index = layout_index(spec, compute_layout(spec))
+    clashes = index.clashes()
+    print(index.format_clashes(clashes))
+
+    python skyscraper_spatial.py --spec examples/specs/compact_tower_30floors.json
+    python skyscraper_spatial.py --ignore elevators:stairs --ignore elevators:landings
+
+The script exits with 1 when it finds clashes; the intentional overlaps in
+ALLOWED_CLASHES are not reported unless --all is given.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from skyscraper_layout import ELEMENT_DTYPE, TowerSpec, compute_layout, flight_boxes, load_spec
+
+# Overlapping pair: element numbers in the index (insertion order) and the
+# smallest penetration over the three axes
+CLASH_DTYPE = np.dtype([('first', 'i8'), ('second', 'i8'), ('depth', 'f8')])
+
+# Subsystem pairs that overlap by design: curtain wall panels run past the
+# perimeter columns they hang from
+ALLOWED_CLASHES = frozenset({frozenset(('facade', 'structure'))})
+
+class SpatialIndex:
+    """Uniform (floor, x, y) grid of ELEMENT_DTYPE boxes.
+
+    Each box is registered in every cell it touches: full-height columns
+    and walls in one cell stack per floor, a facade panel in one or two.
+    Boxes outside the plate land in the edge cells. The grid is built on
+    the first query after an insert().
+    """
+
+    def __init__(self, spec, cell=2.0):
+        self.spec = spec
+        self.cell = cell
+        self.origin = -spec.build_half
+        self.cells = max(1, int(np.ceil(spec.building_size / cell)))
+        self.groups = []
+        self.boxes = np.zeros(0, dtype=ELEMENT_DTYPE)
+        self.group_of = np.zeros(0, dtype=int)
+        self._keys = None
+
+    def insert(self, name, boxes):
+        """Register the boxes of subsystem `name`; returns their element numbers"""
+        start = len(self.boxes)
+        self.groups.append((name, start))
+        self.boxes = np.concatenate([self.boxes, boxes.astype(ELEMENT_DTYPE)])
+        self.group_of = np.concatenate([self.group_of, np.full(len(boxes), len(self.groups) - 1)])
+        self._keys = None
+        return np.arange(start, len(self.boxes))
+
+    def element(self, number):
+        """(subsystem name, index within that subsystem) of element `number`"""
+        name, start = self.groups[self.group_of[number]]
+        return name, int(number - start)
+
+    def bounds(self, boxes):
+        """(min, max) corners of ELEMENT_DTYPE boxes"""
+        return boxes['center'] - boxes['size'] / 2, boxes['center'] + boxes['size'] / 2
+
+    def cell_ranges(self, lo, hi):
+        """First and last (floor, x cell, y cell) touched by each box, clamped to the grid"""
+        limits = np.array([self.spec.num_floors - 1, self.cells - 1, self.cells - 1])
+        scale = np.array([self.spec.floor_height, self.cell, self.cell])
+        shift = np.array([0.0, self.origin, self.origin])
+        # Boxes that end exactly on a cell boundary do not reach into the next cell
+        first = np.floor((lo[:, [2, 0, 1]] - shift) / scale).astype(int)
+        last = np.ceil((hi[:, [2, 0, 1]] - shift) / scale).astype(int) - 1
+        return np.clip(first, 0, limits), np.clip(np.maximum(last, first), 0, limits)
+
+    def cell_entries(self, lo, hi):
+        """(cell key, row) for every cell each box touches; row indexes lo/hi"""
+        first, last = self.cell_ranges(lo, hi)
+        extent = last - first + 1
+        counts = extent.prod(axis=1)
+        rows = np.repeat(np.arange(len(lo)), counts)
+        # Position of each entry within its box's cell block, decoded into (floor, x, y) steps
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ny, nx = extent[rows, 2], extent[rows, 1]
+        cell = first[rows] + np.column_stack([step // (nx * ny), step // ny % nx, step % ny])
+        return (cell[:, 0] * self.cells + cell[:, 1]) * self.cells + cell[:, 2], rows
+
+    def build(self):
+        """Sort every (cell, element) entry by cell"""
+        keys, elements = self.cell_entries(*self.bounds(self.boxes))
+        order = np.lexsort((elements, keys))
+        self._keys, self._elements = keys[order], elements[order]
+
+    def overlap_depth(self, first, second):
+        """Smallest per-axis penetration of each (first, second) pair; <= 0 means apart"""
+        lo, hi = self.bounds(self.boxes)
+        depth = np.minimum(hi[first], hi[second]) - np.maximum(lo[first], lo[second])
+        return depth.min(axis=1)
+
+    def query(self, center, size, tolerance=1e-6):
+        """Element numbers of every box that overlaps the given box by more than `tolerance`"""
+        if self._keys is None:
+            self.build()
+        box = np.zeros(1, dtype=ELEMENT_DTYPE)
+        box['center'], box['size'] = center, size
+        keys, _ = self.cell_entries(*self.bounds(box))
+        starts = np.searchsorted(self._keys, keys, side='left')
+        ends = np.searchsorted(self._keys, keys, side='right')
+        candidates = np.unique(np.concatenate([self._elements[s:e] for s, e in zip(starts, ends)]))
+        lo, hi = self.bounds(self.boxes[candidates])
+        box_lo, box_hi = self.bounds(box)
+        depth = (np.minimum(hi, box_hi) - np.maximum(lo, box_lo)).min(axis=1)
+        return candidates[depth > tolerance]
+
+    def clashes(self, tolerance=1e-6, within_subsystem=False, ignore=()):
+        """Every pair of boxes overlapping by more than `tolerance` on all three axes.
+
+        Pairs from the same subsystem (core walls meeting at the corners,
+        abutting panels) are skipped unless within_subsystem is True, and so
+        are pairs between the subsystems of any (name, name) pair in `ignore`
+        (e.g. ALLOWED_CLASHES). Returns a CLASH_DTYPE array sorted by element
+        number.
+        """
+        if self._keys is None:
+            self.build()
+        keys, elements = self._keys, self._elements
+        # Every entry pairs with the entries after it in the same cell
+        cell_end = np.searchsorted(keys, keys, side='right')
+        after = cell_end - np.arange(len(keys)) - 1
+        left = np.repeat(np.arange(len(keys)), after)
+        right = left + 1 + np.arange(after.sum()) - np.repeat(np.cumsum(after) - after, after)
+        pairs = np.column_stack([elements[left], elements[right]])
+        if not within_subsystem:
+            pairs = pairs[self.group_of[pairs[:, 0]] != self.group_of[pairs[:, 1]]]
+        if ignore:
+            ignored = {frozenset(pair) for pair in ignore}
+            names = [name for name, _ in self.groups]
+            skip = np.array([[frozenset((a, b)) in ignored for b in names] for a in names])
+            pairs = pairs[~skip[self.group_of[pairs[:, 0]], self.group_of[pairs[:, 1]]]]
+        # Boxes spanning several cells meet in each of them
+        pairs = np.unique(np.sort(pairs, axis=1), axis=0).reshape(-1, 2)
+
+        depth = self.overlap_depth(pairs[:, 0], pairs[:, 1])
+        hits = depth > tolerance
+        clashes = np.zeros(hits.sum(), dtype=CLASH_DTYPE)
+        clashes['first'], clashes['second'] = pairs[hits, 0], pairs[hits, 1]
+        clashes['depth'] = depth[hits]
+        return clashes
+
+    def clash_summary(self, clashes):
+        """Number of clashes per pair of subsystems"""
+        return Counter(tuple(sorted((self.element(first)[0], self.element(second)[0])))
+                       for first, second in zip(clashes['first'], clashes['second']))
+
+    def format_clashes(self, clashes, limit=20):
+        """Human-readable clash report: counts per subsystem pair, then the deepest clashes"""
+        if not len(clashes):
+            return "No clashes"
+        lines = [f"{len(clashes)} clashes"]
+        for (a, b), count in self.clash_summary(clashes).most_common():
+            lines.append(f"  {a} x {b}: {count}")
+        lines.append(f"Deepest {min(limit, len(clashes))}:")
+        for clash in np.sort(clashes, order='depth')[::-1][:limit]:
+            (a, i), (b, j) = self.element(clash['first']), self.element(clash['second'])
+            lines.append(f"  {a}[{i}] x {b}[{j}]: {clash['depth']:.3f}m")
+        return "\n".join(lines)
+
+def layout_index(spec, layout, cell=2.0):
+    """SpatialIndex of every box in a compute_layout() result.
+
+    Stair flights are registered by their bounding boxes; slabs are left
+    out, since every vertical element passes through them by design.
+    """
+    index = SpatialIndex(spec, cell)
+    for name, array in layout.items():
+        if name == 'stairs':
+            index.insert(name, flight_boxes(spec, array))
+        elif array.dtype == ELEMENT_DTYPE:
+            index.insert(name, array)
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--spec", help="JSON or TOML building spec (default: the 50-story tower)")
+    parser.add_argument("--cell", type=float, default=2.0, help="Grid cell size in meters (default: 2)")
+    parser.add_argument("--within", action="store_true",
+                        help="Also report clashes between elements of the same subsystem")
+    parser.add_argument("--ignore", action="append", default=[], metavar="A:B",
+                        help="Skip clashes between subsystems A and B (repeatable)")
+    parser.add_argument("--all", action="store_true",
+                        help="Also report the intentional overlaps in ALLOWED_CLASHES")
+    args = parser.parse_args(argv)
+
+    ignore = set() if args.all else set(ALLOWED_CLASHES)
+    for pair in args.ignore:
+        names = pair.split(":")
+        if len(names) != 2:
+            parser.error(f"--ignore expects two subsystem names as A:B, got {pair!r}")
+        ignore.add(frozenset(names))
+
+    spec = TowerSpec.from_dict(load_spec(args.spec)) if args.spec else TowerSpec()
+    layout = compute_layout(spec)
+    start = time.perf_counter()
+    index = layout_index(spec, layout, args.cell)
+    clashes = index.clashes(within_subsystem=args.within, ignore=ignore)
+    seconds = time.perf_counter() - start
+    print(index.format_clashes(clashes))
+    print(f"Checked {len(index.boxes):,} elements in {seconds * 1000:.1f}ms")
+    return 1 if len(clashes) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
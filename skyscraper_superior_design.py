@@ -21,27 +21,59 @@ Building Stats:
 - Vertical Circulation: 625 m² (25%)
 """
 
-import bpy
-import bmesh
-from mathutils import Vector
-import math
-
-# ===== CLEAR SCENE =====
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
+import argparse
+import json
+import os
+import sys
+
+# Blender does not put the script's folder on sys.path; the layout and backend modules live there
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skyscraper_artifacts import DEFAULT_MAX_SIZE, ArtifactCache
+from skyscraper_instrument import PROFILERS, Instrumentation
+from skyscraper_layout import (
+    BACKENDS, SPEC_PARAMETERS, TowerSpec, group_identical, layout_pool, load_district, load_spec,
+)
+from skyscraper_blender import (
+    build_district, build_tower, clear_scene, save_output, scene_stats, start_generation,
+)
+from skyscraper_nodes import build_node_tower
+
+# ===== COMMAND LINE (headless runs) =====
+# blender --background --python skyscraper_superior_design.py -- --spec tower.json --output tower.blend
+def parse_cli_args():
+    """Parse the arguments Blender passes through after `--`"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="skyscraper_superior_design.py")
+    parser.add_argument("--spec", help="JSON or TOML building spec overriding the parameters below")
+    parser.add_argument("--district", help="JSON or TOML district file: many placed towers instead of one")
+    parser.add_argument("--output", help="Write the generated tower to a .blend, .glb or .gltf file")
+    parser.add_argument("--stats", help="Write object/mesh/vertex counts, phase timings and peak memory to a JSON file")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep the scene and rebuild only subsystems whose parameters changed")
+    parser.add_argument("--layout-workers", type=int,
+                        help="Compute the per-floor layout in this many worker processes")
+    parser.add_argument("--backend", choices=BACKENDS,
+                        help="'nodes' builds a Geometry Nodes tower driven by modifier inputs")
+    parser.add_argument("--cache", help="Artifact cache directory: reuse layouts and meshes of earlier runs")
+    parser.add_argument("--cache-size", type=float, help="Artifact cache size limit in MB (default: 2048)")
+    parser.add_argument("--profile", choices=PROFILERS, help="Profile the whole run")
+    parser.add_argument("--profile-output", default="skyscraper.prof",
+                        help="Profiler output (.prof for cprofile, .html for pyinstrument)")
+    return parser.parse_args(argv)
+
+cli_args = parse_cli_args()
+instr = Instrumentation(profiler=cli_args.profile)
 
 # ===== PARAMETERS =====
 # Building Dimensions
 num_floors = 50
 floor_height = 4.0
-total_height = num_floors * floor_height
 slab_thick = 0.3  # Increased for structural realism
 building_size = 50.0
-build_half = building_size / 2
 
 # Core Dimensions (25% of floor plate - code compliant)
 core_size = 25.0
-core_half = core_size / 2
 wall_thick = 0.3
 
 # Structural System
@@ -54,7 +86,7 @@ stair_width = 1.8  # Code minimum
 stair_run = 3.0
 stair_tread = 0.28
 stair_riser = 0.18
-num_steps = int(floor_height / stair_riser)
+stair_tread_detail = True  # False = each flight as a plain ramp (for distant views)
 
 # Elevators (8 banks - 6 passenger + 2 service)
 elev_width = 2.2
@@ -68,455 +100,145 @@ mullion_width = 0.08
 vision_glass_h = 1.8
 spandrel_h = 2.2  # Floor-to-floor - vision glass
 window_module = 1.5  # Curtain wall module
+facade_mode = 'mesh'  # 'mesh' = one merged mesh, 'instanced' = Geometry Nodes panel instances
+
+# Repeated floors: build facade/restrooms/HVAC once per floor type and
+# place the other floors as collection instances of that template
+use_floor_templates = False
+
+# Output meshes: 'subsystem' = one object per subsystem, 'material' = one mesh per
+# material, optionally split per 'floor' or per 'zone' between mechanical floors
+merge_mode = 'subsystem'
+merge_split = 'none'
+element_ids = False  # Store each element's layout index in an 'element_id' face attribute
+
+# Levels of detail: 0 = full detail, 1 = facade planes and stair/shaft volumes,
+# 2 = one massing box per zone between mechanical floors; each goes in an LOD<n>
+# collection. With lod_camera_switch, LOD k hands over to LOD k+1 when the
+# active camera is farther than lod_distances[k] from the tower
+lod_levels = [0]
+lod_distances = [250.0, 1000.0]
+lod_camera_switch = False
+
+# Materials are reused from earlier runs and other towers in the file; set a
+# .blend path to link them from a shared library instead (see save_material_library)
+material_library = ''
 
 # Special Floors
 lobby_floors = [0, 1, 2]  # 3-story lobby
 mechanical_floors = [14, 29, 44, 49]  # Every 15 floors + penthouse
-typical_office_floors = [i for i in range(3, num_floors) if i not in mechanical_floors]
-
-# ===== MATERIALS =====
-def create_advanced_material(name, base_color, metallic=0.0, roughness=0.5, 
-                            emission=0.0, ior=1.45, transmission=0.0):
-    """Create physically-based material with advanced properties"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    # Create shader nodes
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    
-    # Position nodes
-    bsdf.location = (0, 0)
-    output.location = (300, 0)
-    
-    # Configure BSDF
-    bsdf.inputs['Base Color'].default_value = (*base_color, 1.0)
-    bsdf.inputs['Metallic'].default_value = metallic
-    bsdf.inputs['Roughness'].default_value = roughness
-    bsdf.inputs['IOR'].default_value = ior
-    bsdf.inputs['Transmission Weight'].default_value = transmission
-    
-    if emission > 0:
-        bsdf.inputs['Emission Strength'].default_value = emission
-        bsdf.inputs['Emission Color'].default_value = (*base_color, 1.0)
-    
-    # Link nodes
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    return mat
-
-def create_leather_material(name):
-    """Enhanced shiny black leather with proper subsurface"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    # Nodes
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    noise = nodes.new(type='ShaderNodeTexNoise')
-    bump = nodes.new(type='ShaderNodeBump')
-    color_ramp = nodes.new(type='ShaderNodeValToRGB')
-    mapping = nodes.new(type='ShaderNodeMapping')
-    tex_coord = nodes.new(type='ShaderNodeTexCoord')
-    
-    # Position
-    tex_coord.location = (-800, 0)
-    mapping.location = (-600, 0)
-    noise.location = (-400, 0)
-    color_ramp.location = (-200, 100)
-    bump.location = (-200, -100)
-    bsdf.location = (100, 0)
-    output.location = (400, 0)
-    
-    # Configure
-    bsdf.inputs['Base Color'].default_value = (0.01, 0.01, 0.01, 1.0)
-    bsdf.inputs['Metallic'].default_value = 0.2
-    bsdf.inputs['Roughness'].default_value = 0.05  # Very shiny
-    bsdf.inputs['Sheen Weight'].default_value = 0.3  # Leather sheen
-    bsdf.inputs['Subsurface Weight'].default_value = 0.08
-    bsdf.inputs['Subsurface Radius'].default_value = (0.1, 0.1, 0.1)
-    
-    noise.inputs['Scale'].default_value = 20.0
-    noise.inputs['Detail'].default_value = 8.0
-    noise.inputs['Roughness'].default_value = 0.6
-    
-    bump.inputs['Strength'].default_value = 0.2
-    
-    mapping.inputs['Scale'].default_value = (2.0, 2.0, 2.0)
-    
-    color_ramp.color_ramp.elements[0].color = (0.008, 0.008, 0.008, 1.0)
-    color_ramp.color_ramp.elements[1].color = (0.018, 0.018, 0.018, 1.0)
-    
-    # Link
-    mat.node_tree.links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
-    mat.node_tree.links.new(mapping.outputs['Vector'], noise.inputs['Vector'])
-    mat.node_tree.links.new(noise.outputs['Fac'], color_ramp.inputs['Fac'])
-    mat.node_tree.links.new(noise.outputs['Fac'], bump.inputs['Height'])
-    mat.node_tree.links.new(color_ramp.outputs['Color'], bsdf.inputs['Base Color'])
-    mat.node_tree.links.new(bump.outputs['Normal'], bsdf.inputs['Normal'])
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    return mat
-
-# Create material library
-leather_mat = create_leather_material("ShinyBlackLeather")
-glass_mat = create_advanced_material("VisionGlass", (0.8, 0.9, 1.0), 
-                                     metallic=0.1, roughness=0.05, 
-                                     transmission=0.95, ior=1.52)
-spandrel_mat = create_advanced_material("SpandrelPanel", (0.02, 0.02, 0.02), 
-                                       metallic=0.8, roughness=0.15)
-mullion_mat = create_advanced_material("Mullion", (0.3, 0.3, 0.3), 
-                                      metallic=0.9, roughness=0.2)
-column_mat = create_leather_material("StructuralColumn")
-
-def assign_material(obj, mat):
-    """Assign material to object"""
-    if obj and obj.data:
-        obj.data.materials.clear()
-        obj.data.materials.append(mat)
-
-# ===== STRUCTURAL SYSTEM =====
-print("Generating structural system...")
-
-# 1. Corner Mega-Columns (Full Height)
-corner_positions = [
-    (build_half - column_size/2, build_half - column_size/2),
-    (build_half - column_size/2, -build_half + column_size/2),
-    (-build_half + column_size/2, build_half - column_size/2),
-    (-build_half + column_size/2, -build_half + column_size/2)
-]
-
-for pos in corner_positions:
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(*pos, total_height/2))
-    col = bpy.context.object
-    col.scale = (column_size, column_size, total_height)
-    bpy.ops.object.transform_apply(scale=True)
-    assign_material(col, column_mat)
-    col.name = f"CornerColumn_{pos[0]}_{pos[1]}"
-
-# 2. Perimeter Column Grid
-perimeter_positions = []
-for side in ['north', 'south', 'east', 'west']:
-    num_columns = int(building_size / column_spacing) - 1
-    for i in range(1, num_columns + 1):
-        offset = -build_half + i * column_spacing
-        if side == 'north':
-            perimeter_positions.append((offset, build_half - wall_thick/2))
-        elif side == 'south':
-            perimeter_positions.append((offset, -build_half + wall_thick/2))
-        elif side == 'east':
-            perimeter_positions.append((build_half - wall_thick/2, offset))
-        elif side == 'west':
-            perimeter_positions.append((-build_half + wall_thick/2, offset))
-
-for pos in perimeter_positions:
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(*pos, total_height/2))
-    col = bpy.context.object
-    col.scale = (perimeter_column_size, perimeter_column_size, total_height)
-    bpy.ops.object.transform_apply(scale=True)
-    assign_material(col, leather_mat)
-    col.name = f"PerimColumn_{pos[0]:.1f}_{pos[1]:.1f}"
-
-# ===== FLOOR SLABS =====
-print("Generating floor slabs...")
-
-for n in range(num_floors + 1):  # Include roof
-    z = n * floor_height
-    
-    # Full floor plate
-    bpy.ops.mesh.primitive_plane_add(size=building_size, location=(0, 0, z))
-    slab = bpy.context.object
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value": (0, 0, -slab_thick)})
-    bpy.ops.object.mode_set(mode='OBJECT')
-    assign_material(slab, leather_mat)
-    slab.name = f"Floor_{n}"
-    
-    # Cut core opening (except ground and roof)
-    if 0 < n < num_floors:
-        bpy.ops.mesh.primitive_cube_add(size=core_size, location=(0, 0, z - slab_thick/2))
-        core_cut = bpy.context.object
-        core_cut.scale = (1, 1, slab_thick * 2)
-        bpy.ops.object.transform_apply(scale=True)
-        
-        bpy.context.view_layer.objects.active = slab
-        slab.select_set(True)
-        core_cut.select_set(True)
-        mod = slab.modifiers.new(name="CoreCut", type='BOOLEAN')
-        mod.operation = 'DIFFERENCE'
-        mod.object = core_cut
-        bpy.ops.object.modifier_apply(modifier="CoreCut")
-        bpy.data.objects.remove(core_cut, do_unlink=True)
-
-# ===== CORE WALLS =====
-print("Generating core walls...")
-
-core_wall_segments = [
-    # North wall
-    {'start': (-core_half, core_half), 'end': (core_half, core_half), 'axis': 'x'},
-    # South wall
-    {'start': (-core_half, -core_half), 'end': (core_half, -core_half), 'axis': 'x'},
-    # East wall
-    {'start': (core_half, -core_half), 'end': (core_half, core_half), 'axis': 'y'},
-    # West wall
-    {'start': (-core_half, -core_half), 'end': (-core_half, core_half), 'axis': 'y'},
-]
-
-for segment in core_wall_segments:
-    length = abs(segment['end'][0] - segment['start'][0]) if segment['axis'] == 'x' else abs(segment['end'][1] - segment['start'][1])
-    center_x = (segment['start'][0] + segment['end'][0]) / 2
-    center_y = (segment['start'][1] + segment['end'][1]) / 2
-    
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(center_x, center_y, total_height/2))
-    wall = bpy.context.object
-    if segment['axis'] == 'x':
-        wall.scale = (length, wall_thick, total_height)
-    else:
-        wall.scale = (wall_thick, length, total_height)
-    bpy.ops.object.transform_apply(scale=True)
-    assign_material(wall, leather_mat)
-    wall.name = f"CoreWall_{center_x:.1f}_{center_y:.1f}"
-
-# ===== SCISSOR STAIRS (3 locations for code compliance) =====
-print("Generating scissor stair system...")
-
-stair_locations = [
-    {'x': -core_half + 3, 'y': 0, 'name': 'West'},
-    {'x': core_half - 3 - stair_width, 'y': 0, 'name': 'East'},
-    {'x': 0, 'y': core_half - 3 - stair_width, 'name': 'North'}
-]
+office_detail_frequency = 5  # Office interiors on every Nth typical floor
+
+# Interiors: 'full' builds offices, restrooms and HVAC units up front; 'lazy'
+# places one box per floor and builds a floor's interior when its box is
+# selected, isolated in local view or touched by an object with a
+# 'skyscraper_section_box' custom property. Up to interior_cache_floors
+# interiors that are no longer viewed are kept hidden for reuse
+interior_mode = 'full'
+interior_cache_floors = 8
+
+# 'python' builds every subsystem as meshes from the layout arrays; 'nodes'
+# builds one Geometry Nodes tower (structure, slabs, core, shafts, facade) whose
+# modifier inputs can be edited interactively (see skyscraper_nodes.py; it
+# needs the lobby on the bottom floors and ignores `interactive`)
+backend = 'python'
+
+# Worker processes for the bpy-free per-floor layout (0 = in this process);
+# meshes are still built on Blender's main thread
+layout_workers = 0
+
+# Directory of cached layouts and mesh arrays keyed by the parameters they
+# come from, shared by every run and spec ('' = no cache); least recently
+# used artifacts are deleted beyond artifact_cache_mb
+artifact_cache = ''
+artifact_cache_mb = DEFAULT_MAX_SIZE / 1024 ** 2
+
+# With Blender's UI open, build a few subsystems at a time with a progress bar
+# so the viewport stays usable (Esc cancels); ignored in background mode
+interactive = False
+
+# Rerunning in the same scene rebuilds only the subsystems whose parameters
+# changed (e.g. only the facade after editing window_module) instead of
+# clearing the scene first
+incremental = False
+
+# Everything above can be overridden by a --spec file
+params = {name: globals()[name] for name in SPEC_PARAMETERS}
+if cli_args.spec:
+    params.update(load_spec(cli_args.spec))
+if cli_args.backend:
+    params['backend'] = cli_args.backend
+spec = TowerSpec.from_dict(params)
+incremental = incremental or cli_args.incremental
+if cli_args.layout_workers is not None:
+    layout_workers = cli_args.layout_workers
+artifact_cache = cli_args.cache or artifact_cache
+if cli_args.cache_size is not None:
+    artifact_cache_mb = cli_args.cache_size
 
-def create_scissor_stair(x, y, z_start, z_end, name):
-    """Create a scissor stair (two interleaved flights)"""
-    num_floors_served = int((z_end - z_start) / floor_height)
-    
-    for floor in range(num_floors_served):
-        z = z_start + floor * floor_height
-        
-        # Flight 1 (going up-right)
-        for step in range(num_steps // 2):
-            step_x = x + step * stair_tread
-            step_z = z + step * stair_riser
-            bpy.ops.mesh.primitive_cube_add(size=1, location=(step_x, y, step_z))
-            step_obj = bpy.context.object
-            step_obj.scale = (stair_tread, stair_width, stair_riser)
-            bpy.ops.object.transform_apply(scale=True)
-            assign_material(step_obj, leather_mat)
-        
-        # Landing
-        landing_z = z + floor_height - slab_thick
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x + stair_run/2, y, landing_z - slab_thick/2))
-        landing = bpy.context.object
-        landing.scale = (stair_run, stair_width, slab_thick)
-        bpy.ops.object.transform_apply(scale=True)
-        assign_material(landing, leather_mat)
-        
-        # Flight 2 (going down-left from landing)
-        for step in range(num_steps // 2):
-            step_x = x + stair_run - step * stair_tread
-            step_z = landing_z + step * stair_riser
-            bpy.ops.mesh.primitive_cube_add(size=1, location=(step_x, y + stair_width + 0.5, step_z))
-            step_obj = bpy.context.object
-            step_obj.scale = (stair_tread, stair_width, stair_riser)
-            bpy.ops.object.transform_apply(scale=True)
-            assign_material(step_obj, leather_mat)
-
-for loc in stair_locations:
-    create_scissor_stair(loc['x'], loc['y'], 0, total_height, loc['name'])
-
-# ===== ELEVATOR BANKS (8 total: 6 passenger + 2 service) =====
-print("Generating elevator banks...")
-
-elevator_positions = [
-    # West bank (3 passenger)
-    {'x': -core_half + 5, 'y': -8, 'type': 'passenger'},
-    {'x': -core_half + 5, 'y': -5, 'type': 'passenger'},
-    {'x': -core_half + 5, 'y': -2, 'type': 'passenger'},
-    # East bank (3 passenger)
-    {'x': core_half - 5 - elev_width, 'y': -8, 'type': 'passenger'},
-    {'x': core_half - 5 - elev_width, 'y': -5, 'type': 'passenger'},
-    {'x': core_half - 5 - elev_width, 'y': -2, 'type': 'passenger'},
-    # Service elevators (larger)
-    {'x': -2, 'y': -core_half + 3, 'type': 'service'},
-    {'x': 2, 'y': -core_half + 3, 'type': 'service'},
-]
-
-for elev in elevator_positions:
-    width = elev_width if elev['type'] == 'passenger' else elev_width * 1.5
-    depth = elev_depth if elev['type'] == 'passenger' else elev_depth * 1.5
-    
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(elev['x'], elev['y'], total_height/2))
-    shaft = bpy.context.object
-    shaft.scale = (width, depth, total_height)
-    bpy.ops.object.transform_apply(scale=True)
-    assign_material(shaft, leather_mat)
-    shaft.name = f"Elevator_{elev['type']}_{elev['x']}_{elev['y']}"
-    
-    # Cut doors on each floor
-    for floor in range(num_floors):
-        z = floor * floor_height + floor_height/2
-        door_y = elev['y'] - depth/2
-        
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(elev['x'], door_y, z - floor_height/2 + elev_door_h/2 + 0.1))
-        door_cut = bpy.context.object
-        door_cut.scale = (elev_door_w, 0.2, elev_door_h)
-        bpy.ops.object.transform_apply(scale=True)
-        
-        bpy.context.view_layer.objects.active = shaft
-        shaft.select_set(True)
-        door_cut.select_set(True)
-        mod = shaft.modifiers.new(name=f"Door_{floor}", type='BOOLEAN')
-        mod.operation = 'DIFFERENCE'
-        mod.object = door_cut
-        bpy.ops.object.modifier_apply(modifier=f"Door_{floor}")
-        bpy.data.objects.remove(door_cut, do_unlink=True)
-
-# ===== CURTAIN WALL FACADE SYSTEM =====
-print("Generating curtain wall facade...")
-
-def create_curtain_wall_panel(x, y, z, width, height, is_vision=True):
-    """Create a curtain wall panel with mullions"""
-    # Main panel
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z))
-    panel = bpy.context.object
-    
-    # Determine orientation
-    if abs(y - build_half) < 1 or abs(y + build_half) < 1:  # North/South
-        panel.scale = (width, curtain_wall_thick, height)
-    else:  # East/West
-        panel.scale = (curtain_wall_thick, width, height)
-    
-    bpy.ops.object.transform_apply(scale=True)
-    assign_material(panel, glass_mat if is_vision else spandrel_mat)
-    
-    return panel
-
-# Generate facade for each floor
-for floor in range(num_floors):
-    z_base = floor * floor_height
-    is_lobby = floor in lobby_floors
-    is_mech = floor in mechanical_floors
-    
-    # Determine panel heights
-    if is_lobby:
-        vision_h = floor_height - 0.8  # Full height glass
-        spandrel_h = 0.0
-    elif is_mech:
-        vision_h = 0.5  # Minimal openings
-        spandrel_h = floor_height - 0.5
-    else:
-        vision_h = vision_glass_h
-        spandrel_h = floor_height - vision_glass_h - 0.2
-    
-    # Generate panels on each facade
-    num_modules = int(building_size / window_module)
-    
-    for side in ['north', 'south', 'east', 'west']:
-        for module in range(num_modules):
-            offset = -build_half + module * window_module + window_module/2
-            
-            if side == 'north':
-                x, y = offset, build_half + curtain_wall_thick/2
-            elif side == 'south':
-                x, y = offset, -build_half - curtain_wall_thick/2
-            elif side == 'east':
-                x, y = build_half + curtain_wall_thick/2, offset
-            else:  # west
-                x, y = -build_half - curtain_wall_thick/2, offset
-            
-            # Skip if at corner column
-            if any(abs(x - cp[0]) < column_size and abs(y - cp[1]) < column_size for cp in corner_positions):
-                continue
-            
-            # Spandrel panel (bottom)
-            if spandrel_h > 0:
-                z_spandrel = z_base + spandrel_h/2
-                create_curtain_wall_panel(x, y, z_spandrel, window_module, spandrel_h, is_vision=False)
-            
-            # Vision glass (top)
-            if vision_h > 0:
-                z_vision = z_base + spandrel_h + vision_h/2
-                create_curtain_wall_panel(x, y, z_vision, window_module, vision_h, is_vision=True)
-
-# ===== INTERIOR TYPICAL OFFICE LAYOUT =====
-print("Generating interior office layouts...")
-
-# Only for typical office floors
-for floor_num in typical_office_floors[::5]:  # Every 5th floor to reduce complexity
-    z = floor_num * floor_height + floor_height/2
-    office_height = floor_height - slab_thick - 0.5  # Account for ceiling
-    
-    # Perimeter office ring
-    office_depth = 6.0
-    corridor_width = 2.5
-    
-    # North offices
-    for i in range(6):
-        x = -build_half + 5 + i * 7
-        y = build_half - office_depth/2 - wall_thick
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z))
-        office = bpy.context.object
-        office.scale = (6.5, office_depth, office_height)
-        bpy.ops.object.transform_apply(scale=True)
-        assign_material(office, leather_mat)
-
-# ===== RESTROOM CORES =====
-print("Generating restroom cores...")
-
-restroom_positions = [
-    {'x': 8, 'y': core_half - 8, 'width': 8, 'depth': 6},
-    {'x': -8, 'y': core_half - 8, 'width': 8, 'depth': 6}
-]
-
-for floor_num in typical_office_floors:
-    z = floor_num * floor_height + floor_height/2
-    for rr in restroom_positions:
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(rr['x'], rr['y'], z))
-        restroom = bpy.context.object
-        restroom.scale = (rr['width'], rr['depth'], floor_height - slab_thick)
-        bpy.ops.object.transform_apply(scale=True)
-        assign_material(restroom, leather_mat)
-
-# ===== MECHANICAL FLOOR EQUIPMENT =====
-print("Generating mechanical equipment...")
-
-for mech_floor in mechanical_floors:
-    z = mech_floor * floor_height + floor_height/2
-    
-    # HVAC units
-    for i in range(4):
-        x = -15 + i * 10
-        y = -10
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z))
-        hvac = bpy.context.object
-        hvac.scale = (4, 3, 2.5)
-        bpy.ops.object.transform_apply(scale=True)
-        assign_material(hvac, spandrel_mat)
-
-# ===== LOBBY FEATURES =====
-print("Generating lobby features...")
-
-# Double-height lobby ceiling
-lobby_height = lobby_floors[-1] * floor_height + floor_height
-bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 15, lobby_height/2))
-lobby_feature = bpy.context.object
-lobby_feature.scale = (30, 10, lobby_height)
-bpy.ops.object.transform_apply(scale=True)
-assign_material(lobby_feature, leather_mat)
-
-print("=" * 60)
-print("SUPERIOR 50-STORY SKYSCRAPER GENERATION COMPLETE")
-print("=" * 60)
-print(f"Total Height: {total_height}m")
-print(f"Floor Plate: {building_size}m x {building_size}m")
-print(f"Core Size: {core_size}m x {core_size}m (25%)")
-print(f"Floors: {num_floors} ({len(typical_office_floors)} typical office)")
-print(f"Structural System: 4 mega-columns + perimeter grid")
-print(f"Vertical Circulation: 3 scissor stairs + 8 elevators")
-print(f"Facade: Curtain wall with vision glass and spandrel panels")
-print(f"MEP: 4 mechanical floors + restroom cores")
-print("=" * 60)
+# ===== CLEAR SCENE =====
+if not incremental:
+    with instr.phase('clear'):
+        clear_scene(instr)
+
+# ===== GENERATE =====
+# Layout (bpy-free arrays) in skyscraper_layout.py, Blender meshes in skyscraper_blender.py
+artifacts = ArtifactCache(artifact_cache, int(artifact_cache_mb * 1024 ** 2)) if artifact_cache else None
+started = False
+if interactive and not cli_args.district and spec.backend == 'python':
+    # SKYSCRAPER_OT_generate finishes the tower from timer events, on its own layout
+    # workers, and prints its own report; False without a window (background mode)
+    started = start_generation(spec, incremental, artifacts=artifacts,
+                               layout_workers=layout_workers, instr=instr)
+executor = layout_pool(layout_workers) if layout_workers > 0 and not started else None
+if started:
+    print("Generating in the background of the UI: see the progress bar, Esc cancels")
+elif cli_args.district:
+    # Every tower comes from the district file; identical specs are built once and instanced
+    towers = load_district(cli_args.district)
+    with instr.profile():
+        build_district(towers, instr=instr, incremental=incremental, executor=executor,
+                       artifacts=artifacts)
+    print("=" * 60)
+    print(f"DISTRICT GENERATION COMPLETE: {len(towers)} towers, "
+          f"{len(group_identical(towers))} distinct specs")
+elif spec.backend == 'nodes':
+    # One object whose Geometry Nodes modifier inputs carry the parameters
+    with instr.profile(), instr.phase('nodes', "Geometry Nodes tower"):
+        build_node_tower(spec)
+    print("=" * 60)
+    print(f"GEOMETRY NODES {spec.num_floors}-STORY TOWER READY: edit the 'Tower' modifier inputs")
+else:
+    with instr.profile():
+        build_tower(spec, instr=instr, incremental=incremental, executor=executor,
+                    artifacts=artifacts)
+    print("=" * 60)
+    print(f"SUPERIOR {spec.num_floors}-STORY SKYSCRAPER GENERATION COMPLETE")
+    print("=" * 60)
+    print(f"Total Height: {spec.total_height}m")
+    print(f"Floor Plate: {spec.building_size}m x {spec.building_size}m")
+    print(f"Core Size: {spec.core_size}m x {spec.core_size}m (25%)")
+    print(f"Floors: {spec.num_floors} ({len(spec.typical_office_floors)} typical office)")
+    print("Structural System: 4 mega-columns + perimeter grid")
+    print("Vertical Circulation: 3 scissor stairs + 8 elevators")
+    print("Facade: Curtain wall with vision glass and spandrel panels")
+    print(f"MEP: {len(spec.mechanical_floors)} mechanical floors + restroom cores")
+if executor:
+    executor.shutdown()
+
+if not started:
+    print("=" * 60)
+    print(instr.format_report())
+    print("=" * 60)
+
+    if cli_args.profile:
+        instr.save_profile(cli_args.profile_output)
+        print(f"Profile: {cli_args.profile_output}")
+
+    if cli_args.stats:
+        with open(cli_args.stats, "w") as f:
+            json.dump({**scene_stats(), 'instrumentation': instr.report()}, f, indent=2)
+
+    if cli_args.output:
+        save_output(cli_args.output, instr)
+        print(f"Saved: {cli_args.output}")
@@ -0,0 +1,35 @@
+"""
+SKYSCRAPER LAYOUT WORKERS
+=========================
+
+Entry module for spawned layout_pool() workers. A spawned child imports the
+parent's __main__ before it runs anything; under Blender that is the
+generator script, which imports bpy and starts building. Processes started
+through WorkerContext import this module as their __main__ instead, so the
+children only load multiprocessing and the bpy-free skyscraper_layout
+functions they are sent.
+
+Usage:
+    from concurrent.futures import ProcessPoolExecutor
+    from skyscraper_worker import WorkerContext
+    executor = ProcessPoolExecutor(4, mp_context=WorkerContext())
+"""
+
+import sys
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+class WorkerProcess(SpawnProcess):
+    """Spawned process whose child runs this module, not the caller's script, as __main__"""
+
+    def start(self):
+        # The spawn preparation data names the __main__ module as the process starts
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = sys.modules[__name__]
+        try:
+            super().start()
+        finally:
+            sys.modules['__main__'] = main
+
+class WorkerContext(SpawnContext):
+    """'spawn' start method with WorkerProcess children"""
+    Process = WorkerProcess
@@ -0,0 +1,83 @@
+"""ArtifactCache storage, eviction and layout caching"""
+
+import os
+import time
+
+import numpy as np
+
+import skyscraper_artifacts
+from skyscraper_artifacts import STALE_TEMP_AGE, ArtifactCache, cached_layout
+from skyscraper_layout import TowerSpec, compute_layout
+
+def noise(seed, count=2000):
+    """Incompressible array, so every artifact has about the same size on disk"""
+    return {'data': np.random.default_rng(seed).random(count)}
+
+def test_store_and_load(tmp_path):
+    artifacts = ArtifactCache(tmp_path)
+    key = artifacts.key('test', 1)
+    assert artifacts.load(key) is None
+    artifacts.store(key, {'a': np.arange(5), 'b': np.eye(2)})
+    loaded = artifacts.load(key)
+    assert list(loaded) == ['a', 'b']
+    np.testing.assert_array_equal(loaded['b'], np.eye(2))
+    assert (artifacts.hits, artifacts.misses) == (1, 1)
+
+def test_unreadable_artifact_is_a_miss(tmp_path):
+    artifacts = ArtifactCache(tmp_path)
+    key = artifacts.key('broken')
+    os.makedirs(os.path.dirname(artifacts.path(key)))
+    with open(artifacts.path(key), "wb") as f:
+        f.write(b"not a zip file")
+    assert artifacts.load(key) is None
+    assert not os.path.exists(artifacts.path(key))
+
+def test_eviction_keeps_recently_used(tmp_path):
+    artifacts = ArtifactCache(tmp_path)
+    artifacts.store(artifacts.key(0), noise(0))
+    artifact_size = artifacts.size()
+    artifacts.max_size = int(artifact_size * 5.5)
+    for i in range(1, 20):
+        artifacts.store(artifacts.key(i), noise(i))
+        # Keep the first artifact in use; mtimes are too coarse to order the others reliably
+        os.utime(artifacts.path(artifacts.key(0)), (time.time() + 60, time.time() + 60))
+        assert artifacts.size() <= artifacts.max_size
+    assert artifacts.load(artifacts.key(0)) is not None
+    assert artifacts.load(artifacts.key(19)) is not None
+    assert len(artifacts.entries()) < 20
+
+def test_store_scans_only_when_over_the_limit(tmp_path, monkeypatch):
+    artifacts = ArtifactCache(tmp_path)
+    artifacts.store(artifacts.key(0), noise(0))
+    artifacts.max_size = artifacts.size() * 40
+    scans = []
+    walk = os.walk
+    monkeypatch.setattr(skyscraper_artifacts.os, 'walk', lambda *args: scans.append(1) or walk(*args))
+    for i in range(1, 100):
+        artifacts.store(artifacts.key(i), noise(i))
+    # Nothing is scanned below the limit; past it, each eviction frees room for several stores
+    assert 0 < len(scans) <= 20
+    assert artifacts.size() <= artifacts.max_size
+
+def test_evict_removes_stale_temporary_files(tmp_path):
+    artifacts = ArtifactCache(tmp_path)
+    stale, fresh = tmp_path / "ab" / "stale.npz.tmp", tmp_path / "ab" / "fresh.npz.tmp"
+    stale.parent.mkdir()
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    old = time.time() - STALE_TEMP_AGE - 1
+    os.utime(stale, (old, old))
+    artifacts.evict()
+    assert not stale.exists()
+    assert fresh.exists()  # May still be written by a concurrent run
+
+def test_cached_layout(tmp_path):
+    spec = TowerSpec(num_floors=10, mechanical_floors=[4, 9])
+    artifacts = ArtifactCache(tmp_path)
+    first = cached_layout(artifacts, spec)
+    second = cached_layout(artifacts, spec)
+    assert (artifacts.hits, artifacts.misses) == (1, 1)
+    expected = compute_layout(spec)
+    for name in expected:
+        assert second[name].dtype == expected[name].dtype
+        np.testing.assert_array_equal(second[name], first[name])
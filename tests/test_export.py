@@ -0,0 +1,32 @@
+"""Export chunks split floors the same way as the Blender material merger"""
+
+import numpy as np
+import pytest
+
+from skyscraper_export import box_floors, chunk_floors, export_chunks, fan_triangles
+from skyscraper_layout import TowerSpec, element_floors, shaft_geometry
+
+@pytest.mark.parametrize("split", ["floor", "zone"])
+def test_chunk_elements_belong_to_chunk_floors(split):
+    spec = TowerSpec(num_floors=12, lobby_floors=[0, 1], mechanical_floors=[5, 11])
+    chunk_of = dict(chunk_floors(spec, split))
+    for name, boxes, parts in export_chunks(spec, split):
+        if name == "Tower":
+            continue
+        floors = box_floors(spec, boxes).tolist()
+        for verts, _, _ in parts:
+            z = np.asarray(verts)[:, 2]
+            floors.append(int(element_floors(spec, z.min(), z.max())))
+        assert floors and set(floors) <= set(chunk_of[name]), name
+
+def test_fan_triangles_skip_collinear_corners():
+    verts, faces = shaft_geometry((0.0, 0.0, 10.0), (2.2, 2.5, 20.0), 1.2, 2.4,
+                                  [0.1, 4.1, 8.1], 0.3)
+    verts = np.asarray(verts)
+    triangles = verts[fan_triangles(verts, faces).reshape(-1, 3).astype(int)]
+    area = np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0],
+                                   triangles[:, 2] - triangles[:, 0]), axis=1) / 2
+    assert (area > 1e-9).all()
+    # Only zero-area triangles were dropped: the surface area is unchanged
+    surface = 2 * (2.2 * 2.5 + 2.2 * 20.0 + 2.5 * 20.0) + 3 * 2 * (1.2 + 2.4) * 0.3
+    assert area.sum() == pytest.approx(surface)
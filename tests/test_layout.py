@@ -0,0 +1,219 @@
+"""Layout and mesh topology tests (plain CPython, no bpy)"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from skyscraper_layout import (GLASS, SPANDREL, TowerSpec, box_geometry, compute_layout,
+                               corner_positions, elements, facade_layout, load_spec, lobby_feature,
+                               ring_slab_geometry, shaft_geometry, stair_flight_geometry)
+
+SPECS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "examples", "specs")
+
+# Element count of every subsystem, per example spec
+EXPECTED_COUNTS = {
+    'compact_tower_30floors': {
+        'structure': 16, 'slabs': 31, 'core_walls': 4, 'stairs': 180, 'landings': 90,
+        'elevators': 8, 'lobby': 1, 'facade': 5104, 'offices': 30, 'restrooms': 50,
+        'mechanical': 12},
+    'residential_tower_40floors': {
+        'structure': 16, 'slabs': 41, 'core_walls': 4, 'stairs': 240, 'landings': 120,
+        'elevators': 8, 'lobby': 1, 'facade': 3792, 'offices': 48, 'restrooms': 72,
+        'mechanical': 12},
+    'standard_tower_50floors': {
+        'structure': 20, 'slabs': 51, 'core_walls': 4, 'stairs': 300, 'landings': 150,
+        'elevators': 8, 'lobby': 1, 'facade': 10476, 'offices': 54, 'restrooms': 86,
+        'mechanical': 16},
+    'supertall_tower_100floors': {
+        'structure': 24, 'slabs': 101, 'core_walls': 4, 'stairs': 600, 'landings': 300,
+        'elevators': 8, 'lobby': 1, 'facade': 24960, 'offices': 54, 'restrooms': 180,
+        'mechanical': 20},
+}
+
+SPEC_FILES = sorted(glob.glob(os.path.join(SPECS_DIR, "*.json")))
+
+def spec_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+# ===== LAYOUT =====
+def test_every_example_spec_has_expected_counts():
+    assert sorted(map(spec_name, SPEC_FILES)) == sorted(EXPECTED_COUNTS)
+
+@pytest.mark.parametrize("path", SPEC_FILES, ids=spec_name)
+def test_compute_layout_counts(path):
+    layout = compute_layout(TowerSpec.from_dict(load_spec(path)))
+    assert {name: len(array) for name, array in layout.items()} == EXPECTED_COUNTS[spec_name(path)]
+
+def reference_facade_floor(spec, floor):
+    """Per-panel loop facade_layout() replaced; kept as the reference it must match"""
+    z_base = floor * spec.floor_height
+    half = spec.build_half
+    skin = half + spec.curtain_wall_thick / 2
+    if floor in spec.lobby_floors:
+        vision_h, spandrel_h = spec.floor_height - 0.8, 0.0
+    elif floor in spec.mechanical_floors:
+        vision_h, spandrel_h = 0.5, spec.floor_height - 0.5
+    else:
+        vision_h, spandrel_h = spec.vision_glass_h, spec.floor_height - spec.vision_glass_h - 0.2
+
+    records = []
+    for side in ['north', 'south', 'east', 'west']:
+        for module in range(int(spec.building_size / spec.window_module)):
+            offset = -half + module * spec.window_module + spec.window_module / 2
+            x, y = {'north': (offset, skin), 'south': (offset, -skin),
+                    'east': (skin, offset), 'west': (-skin, offset)}[side]
+            if any(abs(x - cx) < spec.column_size and abs(y - cy) < spec.column_size
+                   for cx, cy in corner_positions(spec)):
+                continue
+            along_x = side in ('north', 'south')
+            for height, z, material in ((spandrel_h, z_base + spandrel_h / 2, SPANDREL),
+                                        (vision_h, z_base + spandrel_h + vision_h / 2, GLASS)):
+                if height > 0:
+                    size = ((spec.window_module, spec.curtain_wall_thick, height) if along_x else
+                            (spec.curtain_wall_thick, spec.window_module, height))
+                    records.append(((x, y, z), size, material))
+    return elements(records)
+
+def assert_elements_equal(actual, expected):
+    assert actual.dtype == expected.dtype and len(actual) == len(expected)
+    np.testing.assert_allclose(actual['center'], expected['center'])
+    np.testing.assert_allclose(actual['size'], expected['size'])
+    np.testing.assert_array_equal(actual['material'], expected['material'])
+
+@pytest.mark.parametrize("path", SPEC_FILES, ids=spec_name)
+def test_facade_layout_matches_per_panel_loop(path):
+    spec = TowerSpec.from_dict(load_spec(path))
+    floors = list(range(spec.num_floors))
+    expected = np.concatenate([reference_facade_floor(spec, floor) for floor in floors])
+    assert_elements_equal(facade_layout(spec, floors), expected)
+
+def test_facade_layout_floor_subset():
+    spec = TowerSpec(lobby_floors=[0, 3], mechanical_floors=[7])
+    floors = [7, 0, 3, 12]
+    expected = np.concatenate([reference_facade_floor(spec, floor) for floor in floors])
+    assert_elements_equal(facade_layout(spec, floors), expected)
+
+def test_lobby_floors_in_any_order():
+    spec = TowerSpec(num_floors=10, lobby_floors=[2, 0, 1], mechanical_floors=[6])
+    assert spec.typical_office_floors == [3, 4, 5, 7, 8, 9]
+    assert lobby_feature(spec)['size'][0, 2] == 3 * spec.floor_height
+
+def test_no_lobby_floors():
+    spec = TowerSpec(num_floors=10, lobby_floors=[], mechanical_floors=[6])
+    assert spec.typical_office_floors == [0, 1, 2, 3, 4, 5, 7, 8, 9]
+    layout = compute_layout(spec)
+    assert len(layout['lobby']) == 0 and len(layout['facade'])
+
+# ===== MESH TOPOLOGY =====
+def assert_closed_outward(verts, faces, volume):
+    """Every edge is shared by exactly two faces with opposite winding, and the
+    signed volume (divergence theorem over fan triangles) is `volume`."""
+    verts = np.asarray(verts, dtype=float)
+    edges = [(face[i], face[(i + 1) % len(face)]) for face in faces for i in range(len(face))]
+    assert len(set(edges)) == len(edges), "edge used twice in the same direction"
+    assert set(edges) == {(b, a) for a, b in edges}, "mesh is not closed"
+    assert all(a != b for a, b in edges)
+
+    signed = 0.0
+    for face in faces:
+        p = verts[list(face)]
+        signed += sum(np.dot(p[0], np.cross(p[i], p[i + 1])) for i in range(1, len(p) - 1)) / 6
+    assert signed == pytest.approx(volume)
+
+def test_box_geometry():
+    centers = [(0, 0, 0), (10, -3, 2.5)]
+    sizes = [(1, 2, 3), (4.5, 0.5, 2)]
+    verts, faces = box_geometry(centers, sizes)
+    assert verts.shape == (16, 3) and faces.shape == (12, 4)
+    for box in range(2):
+        assert_closed_outward(verts, faces[box * 6:(box + 1) * 6].tolist(), np.prod(sizes[box]))
+
+def test_ring_slab_geometry():
+    verts, faces = ring_slab_geometry(z_top=8.0, outer_half=25.0, inner_half=12.5, thick=0.3)
+    assert_closed_outward(verts, faces, (50.0 ** 2 - 25.0 ** 2) * 0.3)
+
+@pytest.mark.parametrize("direction", [1, -1])
+@pytest.mark.parametrize("steps", [1, 2, 11])
+def test_stair_flight_geometry_treads(direction, steps):
+    tread, riser, width = 0.28, 0.18, 1.8
+    verts, faces = stair_flight_geometry((1.0, 2.0, 3.0), direction, steps, tread, riser, width)
+    # First step is a full riser-thick box; every later one sits on the pitched soffit
+    assert_closed_outward(verts, faces, width * tread * riser * (1 + 1.5 * (steps - 1)))
+
+@pytest.mark.parametrize("direction", [1, -1])
+@pytest.mark.parametrize("steps", [1, 11])
+def test_stair_flight_geometry_ramp(direction, steps):
+    tread, riser, width = 0.28, 0.18, 1.8
+    verts, faces = stair_flight_geometry((1.0, 2.0, 3.0), direction, steps, tread, riser, width,
+                                         detail=False)
+    assert len(faces) == 6
+    assert_closed_outward(verts, faces, width * steps * tread * riser)
+
+@pytest.mark.parametrize("doors", [0, 1, 5])
+def test_shaft_geometry(doors):
+    size, door_w, door_h, depth = (2.2, 2.5, 20.0), 1.2, 2.4, 0.3
+    bottoms = [0.1 + 4.0 * i for i in range(doors)]
+    verts, faces = shaft_geometry((3.0, -8.0, 10.0), size, door_w, door_h, bottoms, depth)
+    assert_closed_outward(verts, faces, np.prod(size) - doors * door_w * door_h * depth)
+
+# ===== SPEC FILES =====
+def test_from_dict_round_trip():
+    spec = TowerSpec(num_floors=35, lobby_floors=[0, 1], facade_mode='instanced')
+    assert TowerSpec.from_dict(asdict(spec)) == spec
+
+def test_from_dict_rejects_unknown_parameters():
+    with pytest.raises(ValueError, match="num_floor"):
+        TowerSpec.from_dict({'num_floor': 30})
+
+def test_from_dict_rejects_unknown_backend():
+    assert TowerSpec.from_dict({'backend': 'nodes'}).backend == 'nodes'
+    with pytest.raises(ValueError, match="backend 'node'"):
+        TowerSpec.from_dict({'backend': 'node'})
+
+@pytest.mark.parametrize("path", SPEC_FILES, ids=spec_name)
+def test_load_spec_json_round_trip(path, tmp_path):
+    spec = TowerSpec.from_dict(load_spec(path))
+    copy = tmp_path / "spec.json"
+    copy.write_text(json.dumps(asdict(spec)))
+    assert TowerSpec.from_dict(load_spec(copy)) == spec
+
+def test_load_spec_toml(tmp_path):
+    path = tmp_path / "spec.toml"
+    path.write_text('num_floors = 30\nbuilding_size = 40.0\n'
+                    'lobby_floors = [0, 1]\nfacade_mode = "instanced"\n')
+    spec = TowerSpec.from_dict(load_spec(path))
+    assert spec == TowerSpec(num_floors=30, building_size=40.0, lobby_floors=[0, 1],
+                             facade_mode='instanced')
+
+# ===== LAYOUT WORKERS =====
+def test_spawned_workers_skip_calling_script(tmp_path):
+    """Workers started through skyscraper_worker do not re-run the script that created them"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    marker = tmp_path / "runs.txt"
+    script = tmp_path / "script.py"
+    # No __main__ guard, like a script run by Blender: re-running it would recurse
+    script.write_text(f"""
+import sys
+sys.path.insert(0, {root!r})
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from skyscraper_layout import TowerSpec, compute_layout
+from skyscraper_worker import WorkerContext
+
+with open({str(marker)!r}, "a") as f:
+    f.write("run\\n")
+spec = TowerSpec(num_floors=12, mechanical_floors=[5, 11])
+with ProcessPoolExecutor(2, mp_context=WorkerContext()) as executor:
+    layout = compute_layout(spec, executor)
+serial = compute_layout(spec)
+assert all(np.array_equal(layout[name], serial[name]) for name in serial)
+""")
+    subprocess.run([sys.executable, str(script)], check=True, timeout=120)
+    assert marker.read_text() == "run\n"
@@ -0,0 +1,88 @@
+"""SpatialIndex against brute-force all-pairs overlap checks"""
+
+import numpy as np
+import pytest
+
+from skyscraper_layout import ELEMENT_DTYPE, TowerSpec, compute_layout
+from skyscraper_spatial import ALLOWED_CLASHES, SpatialIndex, layout_index, main
+
+def brute_force_depth(index, center, size):
+    """Penetration depth of one box against every indexed box"""
+    lo, hi = index.bounds(index.boxes)
+    center, half = np.asarray(center), np.asarray(size) / 2
+    box_lo, box_hi = center - half, center + half
+    return (np.minimum(hi, box_hi) - np.maximum(lo, box_lo)).min(axis=1)
+
+def brute_force_clashes(index, tolerance=1e-6, within_subsystem=False, ignore=()):
+    """Set of (first, second) element numbers overlapping by more than `tolerance`"""
+    names = [index.element(number)[0] for number in range(len(index.boxes))]
+    ignored = {frozenset(pair) for pair in ignore}
+    lo, hi = index.bounds(index.boxes)
+    found = set()
+    for first in range(len(index.boxes)):
+        depth = (np.minimum(hi[first + 1:], hi[first]) -
+                 np.maximum(lo[first + 1:], lo[first])).min(axis=1)
+        for second in np.flatnonzero(depth > tolerance) + first + 1:
+            same = index.group_of[first] == index.group_of[second]
+            pair = frozenset((names[first], names[second]))
+            if (same and not within_subsystem) or pair in ignored:
+                continue
+            found.add((first, int(second)))
+    return found
+
+def random_boxes(rng, spec, count):
+    boxes = np.zeros(count, dtype=ELEMENT_DTYPE)
+    boxes['center'][:, :2] = rng.uniform(-spec.build_half - 2, spec.build_half + 2, (count, 2))
+    boxes['center'][:, 2] = rng.uniform(-1, spec.total_height + 1, count)
+    boxes['size'] = rng.uniform(0.1, 6.0, (count, 3))
+    # A few full-height boxes, which span every floor
+    boxes['size'][:count // 20, 2] = spec.total_height
+    return boxes
+
+@pytest.fixture
+def tower():
+    spec = TowerSpec(num_floors=8, lobby_floors=[0, 1], mechanical_floors=[4, 7])
+    return spec, layout_index(spec, compute_layout(spec))
+
+@pytest.mark.parametrize("within_subsystem", [False, True])
+@pytest.mark.parametrize("ignore", [(), ALLOWED_CLASHES])
+def test_layout_clashes_match_brute_force(tower, within_subsystem, ignore):
+    spec, index = tower
+    clashes = index.clashes(within_subsystem=within_subsystem, ignore=ignore)
+    found = set(zip(clashes['first'].tolist(), clashes['second'].tolist()))
+    assert len(found) == len(clashes)
+    assert found == brute_force_clashes(index, within_subsystem=within_subsystem, ignore=ignore)
+    np.testing.assert_allclose(clashes['depth'],
+                               index.overlap_depth(clashes['first'], clashes['second']))
+
+@pytest.mark.parametrize("cell", [0.7, 2.0, 9.0])
+def test_random_clashes_match_brute_force(cell):
+    rng = np.random.default_rng(17)
+    spec = TowerSpec(num_floors=5, building_size=20.0)
+    index = SpatialIndex(spec, cell)
+    for name in ('a', 'b', 'c'):
+        index.insert(name, random_boxes(rng, spec, 150))
+    clashes = index.clashes(within_subsystem=True)
+    assert set(zip(clashes['first'].tolist(), clashes['second'].tolist())) == \
+        brute_force_clashes(index, within_subsystem=True)
+    clashes = index.clashes(ignore=[('a', 'c')])
+    assert set(zip(clashes['first'].tolist(), clashes['second'].tolist())) == \
+        brute_force_clashes(index, ignore=[('a', 'c')])
+
+@pytest.mark.parametrize("cell", [0.7, 2.0, 9.0])
+def test_query_matches_brute_force(cell):
+    rng = np.random.default_rng(3)
+    spec = TowerSpec(num_floors=5, building_size=20.0)
+    index = SpatialIndex(spec, cell)
+    index.insert('boxes', random_boxes(rng, spec, 300))
+    for probe in random_boxes(rng, spec, 60):
+        expected = np.flatnonzero(brute_force_depth(index, probe['center'], probe['size']) > 1e-6)
+        np.testing.assert_array_equal(index.query(probe['center'], probe['size']), expected)
+
+def test_allowed_clashes_ignored_by_default(tower, capsys):
+    spec, index = tower
+    assert len(index.clashes(ignore=ALLOWED_CLASHES)) < len(index.clashes())
+    main([])
+    assert "facade x structure" not in capsys.readouterr().out
+    main(["--all"])
+    assert "facade x structure" in capsys.readouterr().out